@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""Short-lived cache of the signed payloads returned to WaterButler by ``get_auth``.
+
+Entries are keyed by everything an authorization depends on: the user, the view only
+key, the bearer token, the node, the provider and the action. They are invalidated
+when a contributor, the node itself or one of its addons changes (see the signal
+listeners below). Invalidations are only seen by the process that made them, so
+other processes may keep serving an entry for up to
+``settings.WATERBUTLER_AUTH_CACHE_TIMEOUT`` seconds, which must be well below
+``settings.WATERBUTLER_JWT_EXPIRATION``.
+"""
+import hashlib
+import time
+
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from addons.base.models import BaseNodeSettings
+from framework.sessions.store import LRUCache
+from osf.models import AbstractNode, Contributor, ExternalAccount
+from website import settings
+
+
+class AuthorizationCache(object):
+
+    def __init__(self, max_size, timeout):
+        self.timeout = timeout
+        self._payloads = LRUCache(max_size, timeout)
+        # Node id -> time of its last invalidation. Entries cached before that are stale
+        self._invalidated = LRUCache(max_size, timeout)
+
+    @staticmethod
+    def key(user, private_key, access_token, node, provider, action):
+        return (
+            user.id if user else None,
+            private_key,
+            hashlib.sha256(access_token).hexdigest() if access_token else None,
+            node.id,
+            provider,
+            action,
+        )
+
+    def get(self, key):
+        if not self.timeout:
+            return None
+        entry = self._payloads.get(key)
+        if entry is None:
+            return None
+        cached_at, payload = entry
+        invalidated_at = self._invalidated.get(key[3])
+        if invalidated_at is not None and invalidated_at >= cached_at:
+            return None
+        return payload
+
+    def set(self, key, payload):
+        if self.timeout:
+            self._payloads.set(key, (time.time(), payload))
+
+    def invalidate(self, node_ids):
+        if not len(self._payloads):
+            return
+        node_ids = list(node_ids)
+        if len(self._invalidated) + len(node_ids) > self._invalidated.max_size:
+            # Forgetting an invalidation could resurrect a stale entry
+            self.clear()
+            return
+        now = time.time()
+        for node_id in node_ids:
+            self._invalidated.set(node_id, now)
+
+    def invalidate_tree(self, node_id):
+        """Invalidate ``node_id``, its components and its registrations, whose access
+        may be derived from permissions on ``node_id``.
+        """
+        if not len(self._payloads):
+            return
+        affected = AbstractNode.objects.filter(
+            Q(_closure_ancestors__ancestor_id=node_id) | Q(registered_from_id=node_id)
+        ).values_list('id', flat=True)
+        self.invalidate([node_id] + list(affected))
+
+    def clear(self):
+        self._payloads.clear()
+        self._invalidated.clear()
+
+
+authorizations = AuthorizationCache(settings.WATERBUTLER_AUTH_CACHE_SIZE, settings.WATERBUTLER_AUTH_CACHE_TIMEOUT)
+
+
+##### Signal listeners #####
+@receiver(post_save, sender=Contributor)
+@receiver(post_delete, sender=Contributor)
+def invalidate_contributor_node(sender, instance, **kwargs):
+    authorizations.invalidate_tree(instance.node_id)
+
+
+@receiver(post_save)
+def invalidate_node_or_addon(sender, instance, **kwargs):
+    if isinstance(instance, AbstractNode):
+        # Privacy, deletion or a change of parent
+        authorizations.invalidate([instance.id])
+    elif isinstance(instance, BaseNodeSettings):
+        authorizations.invalidate([instance.owner_id])
+    elif isinstance(instance, ExternalAccount):
+        # Credentials are shared by every node the account is connected to
+        authorizations.clear()
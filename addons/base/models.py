@@ -523,6 +523,29 @@ class BaseNodeSettings(BaseAddonSettings):
         """
         return None, None
 
+    @classmethod
+    def after_fork_many(cls, forks, user):
+        """Run ``after_fork`` for every node of a forked component tree. Add-ons
+        that can copy their data for many nodes at once override this.
+
+        :param list forks: (node settings, node, fork) triples
+        :param User user:
+        :returns: list of cloned settings
+
+        """
+        return [addon.after_fork(node, fork, user) for addon, node, fork in forks]
+
+    @classmethod
+    def after_register_many(cls, registrations, user):
+        """Run ``after_register`` for every node of a registered component tree.
+
+        :param list registrations: (node settings, node, registration) triples
+        :param User user:
+        :returns: list of tuples of cloned settings and alert message
+
+        """
+        return [addon.after_register(node, registration, user) for addon, node, registration in registrations]
+
     def after_delete(self, node, user):
         """
 
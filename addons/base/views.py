@@ -13,6 +13,7 @@ import furl
 import jwe
 import jwt
 from django.db import transaction
+from django.db.models import Q
 
 from addons.base.models import BaseStorageAddon
 from addons.osfstorage.models import OsfStorageFile
@@ -31,10 +32,11 @@ from framework.transactions.handlers import no_auto_transaction
 from website import mails
 from website import settings
 from addons.base import exceptions
+from addons.base.authorization import authorizations
 from addons.base import signals as file_signals
 from osf.models import (BaseFileNode, TrashedFileNode,
                         OSFUser, AbstractNode,
-                        NodeLog, DraftRegistration, MetaSchema)
+                        NodeLog, DraftRegistration)
 from website.profile.utils import get_profile_image_url
 from website.project import decorators
 from website.project.decorators import must_be_contributor_or_public, must_be_valid_project
@@ -189,28 +191,21 @@ def check_access(node, auth, action, cas_resp):
     # `copyfrom` actions are originating from a node being registered.
     # TODO This is raise UNAUTHORIZED for registrations that have not been archived yet
     if action == 'copyfrom' or (action == 'copyto' and node.is_registration):
-        parent = node.parent_node
-        while parent:
+        for parent in node.parents:
             if parent.can_edit(auth):
                 return True
-            parent = parent.parent_node
 
     # Users with the prereg admin permission should be allowed to download files
     # from prereg challenge draft registrations.
-    try:
-        prereg_schema = MetaSchema.objects.get(name='Prereg Challenge', schema_version=2)
-        allowed_nodes = [node] + node.parents
-        prereg_draft_registration = DraftRegistration.objects.filter(
-            branched_from__in=allowed_nodes,
-            registration_schema=prereg_schema
-        )
-        if action == 'download' and \
-                    auth.user is not None and \
-                    prereg_draft_registration.count() > 0 and \
-                    auth.user.has_perm('osf.administer_prereg'):
+    if action == 'download' and \
+            auth.user is not None and \
+            auth.user.has_perm('osf.administer_prereg'):
+        if DraftRegistration.objects.filter(
+            Q(branched_from=node) | Q(branched_from___closure_descendants__descendant=node),
+            registration_schema__name='Prereg Challenge',
+            registration_schema__schema_version=2,
+        ).exists():
             return True
-    except MetaSchema.DoesNotExist:
-        pass
 
     raise HTTPError(httplib.FORBIDDEN if auth.user else httplib.UNAUTHORIZED)
 
@@ -225,21 +220,62 @@ def make_auth(user):
     return {}
 
 
-@collect_auth
-def get_auth(auth, **kwargs):
+def authorize(auth, node, provider_name, action, cas_resp=None, access_token=None):
+    """Return the signed payload that lets WaterButler perform `action` with the
+    `provider_name` addon of `node`, or raise an HTTPError.
+
+    Payloads are cached for WATERBUTLER_AUTH_CACHE_TIMEOUT seconds, see
+    addons.base.authorization.
+    """
+    cache_key = authorizations.key(auth.user, auth.private_key, access_token, node, provider_name, action)
+    payload = authorizations.get(cache_key)
+    if payload is not None:
+        return payload
+
+    check_access(node, auth, action, cas_resp)
+
+    provider_settings = node.get_addon(provider_name)
+    if not provider_settings:
+        raise HTTPError(httplib.BAD_REQUEST)
+
+    try:
+        credentials = provider_settings.serialize_waterbutler_credentials()
+        waterbutler_settings = provider_settings.serialize_waterbutler_settings()
+    except exceptions.AddonError:
+        log_exception()
+        raise HTTPError(httplib.BAD_REQUEST)
+
+    payload = jwe.encrypt(jwt.encode({
+        'exp': timezone.now() + datetime.timedelta(seconds=settings.WATERBUTLER_JWT_EXPIRATION),
+        'data': {
+            'auth': make_auth(auth.user),  # A waterbutler auth dict not an Auth object
+            'credentials': credentials,
+            'settings': waterbutler_settings,
+            'callback_url': node.api_url_for(
+                ('create_waterbutler_log' if not node.is_registration else 'registration_callbacks'),
+                _absolute=True,
+                _internal=True
+            ),
+        }
+    }, settings.WATERBUTLER_JWT_SECRET, algorithm=settings.WATERBUTLER_JWT_ALGORITHM), WATERBUTLER_JWE_KEY)
+    authorizations.set(cache_key, payload)
+    return payload
+
+
+def authenticate_waterbutler_request(auth):
+    """Authenticate a request from WaterButler by its bearer token, or failing that by
+    the cookie in its payload.
+
+    :return: The decrypted payload, the CAS response and the access token, if any
+    """
     cas_resp = None
+    access_token = None
     if not auth.user:
         # Central Authentication Server OAuth Bearer Token
         authorization = request.headers.get('Authorization')
         if authorization and authorization.startswith('Bearer '):
-            client = cas.get_client()
-            try:
-                access_token = cas.parse_auth_header(authorization)
-                cas_resp = client.profile(access_token)
-            except cas.CasError as err:
-                sentry.log_exception()
-                # NOTE: We assume that the request is an AJAX request
-                return json_renderer(err)
+            access_token = cas.parse_auth_header(authorization)
+            cas_resp = cas.token_cache.profile(cas.get_client(), access_token)
             if cas_resp.authenticated:
                 auth.user = OSFUser.load(cas_resp.user)
 
@@ -257,6 +293,18 @@ def get_auth(auth, **kwargs):
     if not auth.user:
         auth.user = OSFUser.from_cookie(data.get('cookie', ''))
 
+    return data, cas_resp, access_token
+
+
+@collect_auth
+def get_auth(auth, **kwargs):
+    try:
+        data, cas_resp, access_token = authenticate_waterbutler_request(auth)
+    except cas.CasError as err:
+        sentry.log_exception()
+        # NOTE: We assume that the request is an AJAX request
+        return json_renderer(err)
+
     try:
         action = data['action']
         node_id = data['nid']
@@ -268,32 +316,41 @@ def get_auth(auth, **kwargs):
     if not node:
         raise HTTPError(httplib.NOT_FOUND)
 
-    check_access(node, auth, action, cas_resp)
+    return {'payload': authorize(auth, node, provider_name, action, cas_resp, access_token)}
 
-    provider_settings = node.get_addon(provider_name)
-    if not provider_settings:
-        raise HTTPError(httplib.BAD_REQUEST)
 
+@collect_auth
+def get_auth_bulk(auth, **kwargs):
+    """Authorize many file operations at once. The payload's data holds a list of
+    ``operations``, each with an ``action``, ``nid`` and ``provider`` as for
+    ``get_auth``. Returns a result for each operation, in order: either a ``payload``
+    or the ``code`` of the error ``get_auth`` would have raised.
+    """
     try:
-        credentials = provider_settings.serialize_waterbutler_credentials()
-        waterbutler_settings = provider_settings.serialize_waterbutler_settings()
-    except exceptions.AddonError:
-        log_exception()
+        data, cas_resp, access_token = authenticate_waterbutler_request(auth)
+    except cas.CasError as err:
+        sentry.log_exception()
+        return json_renderer(err)
+
+    try:
+        operations = [(op['action'], op['nid'], op['provider']) for op in data['operations']]
+    except (KeyError, TypeError):
         raise HTTPError(httplib.BAD_REQUEST)
 
-    return {'payload': jwe.encrypt(jwt.encode({
-        'exp': timezone.now() + datetime.timedelta(seconds=settings.WATERBUTLER_JWT_EXPIRATION),
-        'data': {
-            'auth': make_auth(auth.user),  # A waterbutler auth dict not an Auth object
-            'credentials': credentials,
-            'settings': waterbutler_settings,
-            'callback_url': node.api_url_for(
-                ('create_waterbutler_log' if not node.is_registration else 'registration_callbacks'),
-                _absolute=True,
-                _internal=True
-            ),
-        }
-    }, settings.WATERBUTLER_JWT_SECRET, algorithm=settings.WATERBUTLER_JWT_ALGORITHM), WATERBUTLER_JWE_KEY)}
+    nodes = {
+        node._id: node
+        for node in AbstractNode.objects.filter(guids___id__in=set(node_id for _, node_id, _ in operations))
+    }
+    results = []
+    for action, node_id, provider_name in operations:
+        node = nodes.get(node_id)
+        try:
+            if not node:
+                raise HTTPError(httplib.NOT_FOUND)
+            results.append({'payload': authorize(auth, node, provider_name, action, cas_resp, access_token)})
+        except HTTPError as error:
+            results.append({'code': error.code})
+    return {'results': results}
 
 
 LOG_ACTION_MAP = {
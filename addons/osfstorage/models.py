@@ -4,6 +4,8 @@ import logging
 
 from django.apps import apps
 from django.db import models, connection
+from django.db.models import Value
+from django.db.models.functions import Concat, Substr
 from psycopg2._psycopg import AsIs
 
 from addons.base.models import BaseNodeSettings, BaseStorageAddon
@@ -24,42 +26,30 @@ class OsfStorageFileNode(BaseFileNode):
 
     @property
     def materialized_path(self):
-        sql = """
-            WITH RECURSIVE materialized_path_cte(parent_id, GEN_PATH) AS (
-              SELECT
-                T.parent_id,
-                T.name :: TEXT AS GEN_PATH
-              FROM %s AS T
-              WHERE T.id = %s
-              UNION ALL
-              SELECT
-                T.parent_id,
-                (T.name || '/' || R.GEN_PATH) AS GEN_PATH
-              FROM materialized_path_cte AS R
-                JOIN %s AS T ON T.id = R.parent_id
-              WHERE R.parent_id IS NOT NULL
-            )
-            SELECT gen_path
-            FROM materialized_path_cte AS N
-            WHERE parent_id IS NULL
-            LIMIT 1;
+        """Stored in _materialized_path by save, which also rewrites the paths of
+        everything below a folder that is renamed or moved.
         """
-        with connection.cursor() as cursor:
-            cursor.execute(sql, [AsIs(self._meta.db_table), self.pk, AsIs(self._meta.db_table)])
-            row = cursor.fetchone()
-            if not row:
-                return '/'
-
-            path = row[0]
-            if not self.is_file:
-                path = path + '/'
-            return path
+        return self._materialized_path or self._compute_materialized_path()
 
     @materialized_path.setter
     def materialized_path(self, val):
         # raise Exception('Cannot set materialized path on OSFStorage as it is computed.')
         logger.warn('Cannot set materialized path on OSFStorage because it\'s computed.')
 
+    def _compute_materialized_path(self):
+        path = self.name + ('' if self.is_file else '/')
+        if self.parent is None:
+            return path
+        return self.parent.materialized_path + path
+
+    @property
+    def lineage(self):
+        """This file node and the folders above it, nearest first, in a single query."""
+        path = self.materialized_path
+        prefixes = [path[:i + 1] for i, char in enumerate(path[:-1]) if char == '/']
+        ancestors = OsfStorageFolder.objects.filter(node_id=self.node_id, _materialized_path__in=prefixes)
+        return [self] + sorted(ancestors, key=lambda folder: len(folder._materialized_path), reverse=True)
+
     @classmethod
     def get(cls, _id, node):
         return cls.objects.get(_id=_id, node=node)
@@ -87,24 +77,23 @@ class OsfStorageFileNode(BaseFileNode):
         if not file_obj:
             file_obj = TrashedFileNode.load(path)
 
-        # At this point, file_obj may be an OsfStorageFile, an OsfStorageFolder, or a
-        # TrashedFileNode. TrashedFileNodes do not have *File and *Folder subclasses, since
-        # only osfstorage trashes folders. To search for children of TrashFileNodes
-        # representing ex-OsfStorageFolders, we will reimplement the `children` method of the
-        # Folder class here.
-        if not file_obj.is_file:
-            children = []
-            if isinstance(file_obj, TrashedFileNode):
-                children = file_obj.trashed_children.all()
-            else:
-                children = file_obj.children
-
-            for item in children:
-                guids.extend(cls.get_file_guids(item.path, provider, node=node))
-        else:
+        if file_obj.is_file:
             guid = file_obj.get_guid()
             if guid:
                 guids.append(guid._id)
+        elif not isinstance(file_obj, TrashedFileNode):
+            guids = list(OsfStorageFile.objects.filter(
+                node_id=file_obj.node_id,
+                _materialized_path__startswith=file_obj.materialized_path,
+                guids__isnull=False,
+            ).values_list('guids___id', flat=True))
+        else:
+            # TrashedFileNodes do not have *File and *Folder subclasses, since only
+            # osfstorage trashes folders. To search for children of TrashFileNodes
+            # representing ex-OsfStorageFolders, we will reimplement the `children`
+            # method of the Folder class here.
+            for item in file_obj.trashed_children.all():
+                guids.extend(cls.get_file_guids(item.path, provider, node=node))
 
         return sorted(guids)
 
@@ -196,10 +185,41 @@ class OsfStorageFileNode(BaseFileNode):
             if save:
                 self.save()
 
+    def _update_node(self, recursive=True, save=True):
+        if self.is_file or not save:
+            return super(OsfStorageFileNode, self)._update_node(recursive=recursive, save=save)
+        from website.search import search
+
+        if self.parent is not None:
+            self.node = self.parent.node
+        # Saving moves everything below this folder along with it
+        self.save()
+        if recursive:
+            for child in OsfStorageFile.objects.filter(node_id=self.node_id, _materialized_path__startswith=self._materialized_path):
+                search.update_file(child)
+
     def save(self):
         self._path = ''
-        self._materialized_path = ''
-        return super(OsfStorageFileNode, self).save()
+        stored = None
+        if self.pk and not self.is_file:
+            stored = OsfStorageFileNode.objects.filter(pk=self.pk).values_list('node_id', '_materialized_path').first()
+        self._materialized_path = self._compute_materialized_path()
+        ret = super(OsfStorageFileNode, self).save()
+        if stored and stored[1] and stored != (self.node_id, self._materialized_path):
+            self._rewrite_descendants(*stored)
+        return ret
+
+    def _rewrite_descendants(self, old_node_id, old_path):
+        """Move everything below this folder from ``old_path`` in ``old_node_id`` to its
+        current path and node, in a single UPDATE.
+        """
+        OsfStorageFileNode.objects.filter(
+            node_id=old_node_id,
+            _materialized_path__startswith=old_path,
+        ).exclude(pk=self.pk).update(
+            node_id=self.node_id,
+            _materialized_path=Concat(Value(self._materialized_path), Substr('_materialized_path', len(old_path) + 1)),
+        )
 
 
 class OsfStorageFile(OsfStorageFileNode, File):
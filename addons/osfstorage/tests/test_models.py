@@ -251,6 +251,17 @@ class TestOsfstorageFileNode(StorageTestCase):
         child = self.node_settings.get_root().append_folder('Cloud').append_file('Carp')
         assert_equals('/Cloud/Carp', child.materialized_path)
 
+    def test_lineage(self):
+        root = self.node_settings.get_root()
+        cloud = root.append_folder('Cloud')
+        carp = cloud.append_folder('Carp')
+        child = carp.append_file('Tuna')
+        # A folder of the same name elsewhere is not an ancestor
+        root.append_folder('Carp')
+
+        assert_equal(child.lineage, [child, carp, cloud, root])
+        assert_equal(root.lineage, [root])
+
     def test_copy(self):
         to_copy = self.node_settings.get_root().append_file('Carp')
         copy_to = self.node_settings.get_root().append_folder('Cloud')
@@ -316,9 +327,16 @@ class TestOsfstorageFileNode(StorageTestCase):
     def test_move_folder_and_rename(self):
         pass
 
-    @unittest.skip
     def test_rename_folder(self):
-        pass
+        folder = self.node_settings.get_root().append_folder('Cloud')
+        child = folder.append_folder('Carp').append_file('Tuna')
+
+        folder.name = 'Sky'
+        folder.save()
+        child.reload()
+
+        assert_equal(folder.materialized_path, '/Sky/')
+        assert_equal(child.materialized_path, '/Sky/Carp/Tuna')
 
     @unittest.skip
     def test_rename_file(self):
@@ -328,9 +346,17 @@ class TestOsfstorageFileNode(StorageTestCase):
     def test_move_across_nodes(self):
         pass
 
-    @unittest.skip
     def test_move_folder_across_nodes(self):
-        pass
+        other_node_settings = ProjectFactory().get_addon('osfstorage')
+        move_to = other_node_settings.get_root().append_folder('Cloud')
+        to_move = self.node_settings.get_root().append_folder('Carp')
+        child = to_move.append_folder('Tuna').append_file('Trout')
+
+        to_move.move_under(move_to, name='Bass')
+        child.reload()
+
+        assert_equal(child.node, other_node_settings.owner)
+        assert_equal(child.materialized_path, '/Cloud/Bass/Tuna/Trout')
 
     @unittest.skip
     def test_copy_across_nodes(self):
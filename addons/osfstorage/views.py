@@ -103,8 +103,7 @@ def osfstorage_get_revisions(file_node, node_addon, payload, **kwargs):
     counter_prefix = 'download:{}:{}:'.format(file_node.node._id, file_node._id)
 
     version_count = file_node.versions.count()
-    # Don't worry. The only % at the end of the LIKE clause, the index is still used
-    counts = dict(PageCounter.objects.filter(_id__startswith=counter_prefix).values_list('_id', 'total'))
+    counts = {page: total for page, (_, total) in PageCounter.get_basic_counters_by_prefix(counter_prefix).items()}
     qs = FileVersion.includable_objects.filter(basefilenode__id=file_node.id).include('creator__guids').order_by('-created')
 
     for i, version in enumerate(qs):
@@ -141,13 +140,7 @@ def osfstorage_move_hook(source, destination, name=None, **kwargs):
 @must_be_signed
 @decorators.autoload_filenode(default_root=True)
 def osfstorage_get_lineage(file_node, node_addon, **kwargs):
-    lineage = []
-
-    while file_node:
-        lineage.append(file_node.serialize())
-        file_node = file_node.parent
-
-    return {'data': lineage}
+    return {'data': [item.serialize() for item in file_node.lineage]}
 
 
 @must_be_signed
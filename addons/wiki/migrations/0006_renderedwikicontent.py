@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('osf', '0080_page_counter_rollups'),
+        ('addons_wiki', '0005_auto_20170713_1125'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RenderedWikiContent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64)),
+                ('renderer_version', models.PositiveIntegerField()),
+                ('html', models.TextField(blank=True)),
+                ('text', models.TextField(blank=True)),
+                ('node', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='osf.AbstractNode')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='renderedwikicontent',
+            unique_together=set([('content_hash', 'node', 'renderer_version')]),
+        ),
+    ]
@@ -1,17 +1,20 @@
 # -*- coding: utf-8 -*-
 import datetime
 import functools
+import hashlib
 import logging
 
 import markdown
 import pytz
 from addons.base.models import BaseNodeSettings
 from bleach.callbacks import nofollow
+from django.contrib.contenttypes.models import ContentType
 from django.db import models
+from django.utils.functional import cached_property
 from framework.forms.utils import sanitize
 from markdown.extensions import codehilite, fenced_code, wikilinks
 from osf.models import AbstractNode, NodeLog
-from osf.models.base import BaseModel, GuidMixin
+from osf.models.base import BaseModel, Guid, GuidMixin, generate_guids
 from osf.utils.fields import NonNaiveDateTimeField
 from website import settings
 from addons.wiki import utils as wiki_utils
@@ -77,6 +80,79 @@ def build_wiki_url(node, label, base, end):
     return '/{pid}/wiki/{wname}/'.format(pid=node._id, wname=label)
 
 
+def render_html(content, node):
+    """The cleaned, linkified HTML of wiki `content` on `node`"""
+    sanitized_content = render_content(content, node=node)
+    try:
+        from bleach import linkify
+
+        return linkify(
+            sanitized_content,
+            [nofollow, ],
+        )
+    except TypeError:
+        logger.warning('Returning unlinkified content.')
+        return sanitized_content
+
+
+class RenderedWikiContent(BaseModel):
+    """The HTML and plain text rendered from wiki content on a node.
+
+    Rows are keyed by the sha256 of the content, so every version of every page with the
+    same content shares one rendering. Links in the HTML point to the node's wiki, hence
+    the node in the key.
+    """
+    # Bump whenever render_html or its settings change, to stop serving older renderings.
+    # `manage.py wiki_render_cache --invalidate --stale` deletes them
+    RENDERER_VERSION = 1
+
+    content_hash = models.CharField(max_length=64)
+    node = models.ForeignKey('osf.AbstractNode', on_delete=models.CASCADE)
+    renderer_version = models.PositiveIntegerField()
+    html = models.TextField(blank=True)
+    text = models.TextField(blank=True)
+
+    class Meta:
+        unique_together = ('content_hash', 'node', 'renderer_version')
+
+    @staticmethod
+    def hash_content(content):
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def get_or_render(cls, content, node):
+        content_hash = cls.hash_content(content)
+        try:
+            return cls.objects.get(content_hash=content_hash, node=node, renderer_version=cls.RENDERER_VERSION)
+        except cls.DoesNotExist:
+            html = render_html(content, node)
+            rendered, _ = cls.objects.get_or_create(
+                content_hash=content_hash,
+                node=node,
+                renderer_version=cls.RENDERER_VERSION,
+                defaults={'html': html, 'text': sanitize(html, tags=[], strip=True)},
+            )
+            return rendered
+
+    @classmethod
+    def prefetch(cls, pages):
+        """Attach the cached renderings of many wiki pages with a single query.
+
+        :param pages: (NodeWikiPage, node) pairs, as passed to NodeWikiPage.html
+        """
+        pages = [(page, node, cls.hash_content(page.content)) for page, node in pages]
+        cached = cls.objects.filter(
+            renderer_version=cls.RENDERER_VERSION,
+            node_id__in=set(node.id for _, node, _ in pages),
+            content_hash__in=set(content_hash for _, _, content_hash in pages),
+        )
+        by_key = {(rendered.content_hash, rendered.node_id): rendered for rendered in cached}
+        for page, node, content_hash in pages:
+            rendered = by_key.get((content_hash, node.id))
+            if rendered:
+                page._rendered[node.id] = rendered
+
+
 class NodeWikiPage(GuidMixin, BaseModel):
     page_name = models.CharField(max_length=200, validators=[validate_page_name, ])
     version = models.IntegerField(default=1)
@@ -137,24 +213,25 @@ class NodeWikiPage(GuidMixin, BaseModel):
     def get_absolute_url(self):
         return self.absolute_api_v2_url
 
+    @cached_property
+    def _rendered(self):
+        # node id -> RenderedWikiContent of the content as loaded
+        return {}
+
+    def rendered(self, node):
+        """The cached rendering of the page on `node`, rendered now if there is none"""
+        rendered = self._rendered.get(node.id)
+        if rendered is None or rendered.content_hash != RenderedWikiContent.hash_content(self.content):
+            rendered = self._rendered[node.id] = RenderedWikiContent.get_or_render(self.content, node)
+        return rendered
+
     def html(self, node):
         """The cleaned HTML of the page"""
-        sanitized_content = render_content(self.content, node=node)
-        try:
-            from bleach import linkify
-
-            return linkify(
-                sanitized_content,
-                [nofollow, ],
-            )
-        except TypeError:
-            logger.warning('Returning unlinkified content.')
-            return sanitized_content
+        return self.rendered(node).html
 
     def raw_text(self, node):
         """ The raw text of the page, suitable for using in a test search"""
-
-        return sanitize(self.html(node), tags=[], strip=True)
+        return self.rendered(node).text
 
     def get_draft(self, node):
         """
@@ -197,6 +274,8 @@ class NodeWikiPage(GuidMixin, BaseModel):
     def save(self, *args, **kwargs):
         rv = super(NodeWikiPage, self).save(*args, **kwargs)
         if self.node:
+            # Render new content now, rather than on its first view
+            self.rendered(self.node)
             self.node.update_search()
         return rv
 
@@ -231,21 +310,58 @@ class NodeWikiPage(GuidMixin, BaseModel):
         :param save: Whether to save the fork/registration
         :return: copy
         """
-        copy.wiki_pages_versions = {}
-        copy.wiki_pages_current = {}
-
-        for key in node.wiki_pages_versions:
-            copy.wiki_pages_versions[key] = []
-            for wiki_id in node.wiki_pages_versions[key]:
-                node_wiki = NodeWikiPage.load(wiki_id)
-                cloned_wiki = node_wiki.clone_wiki(copy._id)
-                copy.wiki_pages_versions[key].append(cloned_wiki._id)
-                if node_wiki.is_current:
-                    copy.wiki_pages_current[key] = cloned_wiki._id
-        if save:
-            copy.save()
+        cls.clone_wiki_versions_many([(node, copy)], save=save)
         return copy
 
+    @classmethod
+    def clone_wiki_versions_many(cls, copies, save=True):
+        """Clone the wiki pages of many forked or registered nodes, with one insert
+        for the pages and one for their guids.
+        :param copies: (node, fork or registration) pairs
+        :param save: Whether to save the forks/registrations
+        """
+        wiki_ids = set(
+            wiki_id
+            for node, _ in copies
+            for versions in node.wiki_pages_versions.values()
+            for wiki_id in versions
+        )
+        pages = {
+            page.guid: page
+            for page in cls.objects.filter(guids___id__in=wiki_ids).annotate(guid=models.F('guids___id'))
+        }
+
+        clones = []
+        for node, copy in copies:
+            for key, versions in node.wiki_pages_versions.items():
+                for wiki_id in versions:
+                    page = pages[wiki_id]
+                    clones.append((node, copy, key, wiki_id, cls(
+                        page_name=page.page_name,
+                        version=page.version,
+                        content=page.content,
+                        user_id=page.user_id,
+                        node=copy,
+                    )))
+        cls.objects.bulk_create([clone for _, _, _, _, clone in clones])
+        guids = generate_guids(len(clones), cls.__guid_min_length__)
+        content_type = ContentType.objects.get_for_model(cls)
+        Guid.objects.bulk_create([
+            Guid(_id=guid, content_type=content_type, object_id=clone.pk)
+            for guid, (_, _, _, _, clone) in zip(guids, clones)
+        ])
+
+        for node, copy in copies:
+            copy.wiki_pages_versions = {}
+            copy.wiki_pages_current = {}
+        for guid, (node, copy, key, wiki_id, _) in zip(guids, clones):
+            copy.wiki_pages_versions.setdefault(key, []).append(guid)
+            if node.wiki_pages_current.get(key) == wiki_id:
+                copy.wiki_pages_current[key] = guid
+        if save:
+            for _, copy in copies:
+                copy.save()
+
 
 class NodeSettings(BaseNodeSettings):
     complete = True
@@ -296,11 +412,26 @@ class NodeSettings(BaseNodeSettings):
     def after_register(self, node, registration, user, save=True):
         """Copy wiki settings and wiki pages to registrations."""
         NodeWikiPage.clone_wiki_versions(node, registration, user, save)
+        return self._clone_for_registration(registration, save), None
+
+    def _clone_for_registration(self, registration, save=True):
         clone = self.clone()
         clone.owner = registration
         if save:
             clone.save()
-        return clone, None
+        return clone
+
+    @classmethod
+    def after_fork_many(cls, forks, user):
+        """Copy wiki settings, and the wiki pages of all forks at once."""
+        NodeWikiPage.clone_wiki_versions_many([(node, fork) for _, node, fork in forks])
+        return [super(NodeSettings, addon).after_fork(node, fork, user) for addon, node, fork in forks]
+
+    @classmethod
+    def after_register_many(cls, registrations, user):
+        """Copy wiki settings, and the wiki pages of all registrations at once."""
+        NodeWikiPage.clone_wiki_versions_many([(node, registration) for _, node, registration in registrations])
+        return [(addon._clone_for_registration(registration), None) for addon, _, registration in registrations]
 
     def after_set_privacy(self, node, permissions):
         """
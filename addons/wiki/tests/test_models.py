@@ -2,7 +2,7 @@ import pytest
 
 from addons.wiki.exceptions import NameMaximumLengthError
 
-from addons.wiki.models import NodeWikiPage
+from addons.wiki.models import NodeWikiPage, RenderedWikiContent
 from addons.wiki.tests.factories import NodeWikiFactory
 from osf_tests.factories import NodeFactory, UserFactory, ProjectFactory
 from tests.base import OsfTestCase
@@ -48,6 +48,60 @@ class TestNodeWikiPageModel:
         assert ver.is_current is False
 
 
+class TestRenderedWikiContent:
+
+    def test_rendered_on_save(self):
+        node = NodeFactory()
+        page = NodeWikiPage(page_name='foo', node=node, content='**bold**')
+        page.save()
+        rendered = RenderedWikiContent.objects.get(node=node)
+        assert rendered.content_hash == RenderedWikiContent.hash_content(u'**bold**')
+        assert rendered.renderer_version == RenderedWikiContent.RENDERER_VERSION
+        assert '<strong>bold</strong>' in rendered.html
+        assert rendered.text.strip() == 'bold'
+
+    def test_versions_with_same_content_share_rendering(self):
+        node = NodeFactory()
+        NodeWikiPage(page_name='foo', node=node, content='same').save()
+        NodeWikiPage(page_name='foo', node=node, content='same').save()
+        assert RenderedWikiContent.objects.filter(node=node).count() == 1
+
+    def test_html_uses_cached_rendering(self):
+        node = NodeFactory()
+        page = NodeWikiPage(page_name='foo', node=node, content='cached')
+        page.save()
+        RenderedWikiContent.objects.filter(node=node).update(html='<p>from cache</p>')
+        assert NodeWikiPage.objects.get(id=page.id).html(node) == '<p>from cache</p>'
+
+    def test_html_follows_changed_content(self):
+        node = NodeFactory()
+        page = NodeWikiPage(page_name='foo', node=node, content='before')
+        page.save()
+        page.content = 'after'
+        assert 'after' in page.html(node)
+        assert RenderedWikiContent.objects.filter(node=node).count() == 2
+
+    def test_stale_renderer_version_is_not_served(self):
+        node = NodeFactory()
+        page = NodeWikiPage(page_name='foo', node=node, content='content')
+        page.save()
+        RenderedWikiContent.objects.filter(node=node).update(
+            renderer_version=RenderedWikiContent.RENDERER_VERSION - 1,
+            html='stale',
+        )
+        assert 'stale' not in NodeWikiPage.objects.get(id=page.id).html(node)
+
+    def test_prefetch(self):
+        node = NodeFactory()
+        pages = [NodeWikiPage(page_name=name, node=node, content=name) for name in ('one', 'two')]
+        for page in pages:
+            page.save()
+        pages = [(NodeWikiPage.objects.get(id=page.id), node) for page in pages]
+        RenderedWikiContent.prefetch(pages)
+        for page, _ in pages:
+            assert node.id in page._rendered
+
+
 class TestNodeWikiPage(OsfTestCase):
 
     def setUp(self):
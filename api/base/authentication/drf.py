@@ -5,13 +5,15 @@ from django.utils.translation import ugettext_lazy as _
 from rest_framework import authentication
 from rest_framework.authentication import BasicAuthentication
 from rest_framework import exceptions
+from rest_framework.permissions import SAFE_METHODS
 
 from addons.twofactor.models import UserSettings as TwoFactorUserSettings
 from api.base.exceptions import (UnconfirmedAccountError, UnclaimedAccountError, DeactivatedAccountError,
                                  MergedAccountError, InvalidAccountError, TwoFactorRequiredError)
 from framework.auth import cas
 from framework.auth.core import get_user
-from osf.models import OSFUser, Session
+from framework.sessions.store import store
+from osf.models import OSFUser
 from website import settings
 
 
@@ -27,11 +29,7 @@ def get_session_from_cookie(cookie_val):
         session_id = itsdangerous.Signer(settings.SECRET_KEY).unsign(cookie_val)
     except itsdangerous.BadSignature:
         return None
-    try:
-        session = Session.objects.get(_id=session_id)
-        return session
-    except Session.DoesNotExist:
-        return None
+    return store.get_session(session_id)
 
 
 def check_user(user):
@@ -98,7 +96,10 @@ class OSFSessionAuthentication(authentication.BaseAuthentication):
         if not session:
             return None
         user_id = session.data.get('auth_user_id')
-        user = OSFUser.load(user_id)
+        if request.method in SAFE_METHODS:
+            user = store.get_user(user_id)
+        else:
+            user = OSFUser.load(user_id)
         if user:
             check_user(user)
             return user, None
@@ -195,14 +196,17 @@ class OSFCASAuthentication(authentication.BaseAuthentication):
             return None
 
         try:
-            cas_auth_response = client.profile(auth_token)
+            cas_auth_response = cas.token_cache.profile(client, auth_token)
         except cas.CasHTTPError:
             raise exceptions.NotAuthenticated(_('User provided an invalid OAuth2 access token'))
 
         if cas_auth_response.authenticated is False:
             raise exceptions.NotAuthenticated(_('CAS server failed to authenticate this token'))
 
-        user = OSFUser.load(cas_auth_response.user)
+        if request.method in SAFE_METHODS:
+            user = store.get_user(cas_auth_response.user)
+        else:
+            user = OSFUser.load(cas_auth_response.user)
         if not user:
             raise exceptions.AuthenticationFailed(_('Could not find the user associated with this token'))
 
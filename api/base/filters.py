@@ -22,6 +22,36 @@ from osf.models.base import GuidMixin
 from osf.utils.workflows import DefaultStates
 
 
+# (serializer class, field name) -> function(view) returning the query expression behind a computed field
+FILTER_ANNOTATIONS = {}
+
+
+def register_filter_annotation(serializer_class, field_name):
+    """Declare the SQL expression behind a computed (e.g. SerializerMethodField) serializer field,
+    so that ListFilterMixin can filter querysets on it in the database. ::
+
+        @register_filter_annotation(FileSerializer, 'size')
+        def size_annotation(view):
+            return Subquery(...)
+
+    The decorated function is called with the view doing the filtering and must return a
+    query expression, which is annotated onto the queryset and filtered on like a model field.
+    Registrations apply to subclasses of ``serializer_class``.
+    """
+    def wrapper(func):
+        FILTER_ANNOTATIONS[(serializer_class, field_name)] = func
+        return func
+    return wrapper
+
+
+def get_filter_annotation(serializer_class, field_name):
+    for klass in serializer_class.__mro__:
+        annotation = FILTER_ANNOTATIONS.get((klass, field_name))
+        if annotation is not None:
+            return annotation
+    return None
+
+
 def lowercase(lower):
     if hasattr(lower, '__call__'):
         return lower()
@@ -372,6 +402,7 @@ class ListFilterMixin(FilterMixin):
                         for operation in operations:
                             queryset = self.get_filtered_queryset(field_name, operation, queryset)
                     else:
+                        queryset = self.annotate_filter_field(queryset, field_name, operations)
                         sub_query_parts.append(
                             functools.reduce(operator.and_, [
                                 self.build_query_from_field(field_name, operation)
@@ -388,6 +419,23 @@ class ListFilterMixin(FilterMixin):
 
         return queryset
 
+    def annotate_filter_field(self, queryset, field_name, operations):
+        """If a SQL expression is registered for ``field_name``, annotate ``queryset`` with it and
+        point ``operations`` at the annotation, so that computed fields are filtered in the database
+        instead of by evaluating the serializer method on every row.
+        """
+        annotation = get_filter_annotation(self.serializer_class, field_name)
+        # Operations postprocess_query_param pointed at a model field don't need the annotation
+        operations = [operation for operation in operations if operation['source_field_name'] == field_name]
+        if annotation is None or not operations:
+            return queryset
+        alias = '_filter_{}'.format(field_name)
+        if alias not in queryset.query.annotations:
+            queryset = queryset.annotate(**{alias: annotation(self)})
+        for operation in operations:
+            operation['source_field_name'] = alias
+        return queryset
+
     def build_query_from_field(self, field_name, operation):
         query_field_name = operation['source_field_name']
         if operation['op'] == 'ne':
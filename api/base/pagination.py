@@ -208,9 +208,14 @@ class NodeContributorPagination(JSONAPIPagination):
         response = super(NodeContributorPagination, self).get_paginated_response(data)
         response_dict = response.data
         kwargs = self.request.parser_context['kwargs'].copy()
-        node_id = kwargs.get('node_id', None)
-        node = AbstractNode.load(node_id)
-        total_bibliographic = node.visible_contributors.count()
+        object_list = self.page.paginator.object_list
+        if kwargs.get('is_embedded') and isinstance(object_list, list):
+            # Embedded contributors loaded in bulk for a page of nodes are already in memory, and unfiltered
+            total_bibliographic = len([contributor for contributor in object_list if contributor.visible])
+        else:
+            node_id = kwargs.get('node_id', None)
+            node = AbstractNode.load(node_id)
+            total_bibliographic = node.visible_contributors.count()
         if self.request.version < '2.1':
             response_dict['links']['meta']['total_bibliographic'] = total_bibliographic
         else:
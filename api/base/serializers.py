@@ -23,6 +23,7 @@ from api.base.settings import BULK_SETTINGS
 from api.base.utils import absolute_reverse, extend_querystring_params, get_user_auth, extend_querystring_if_key_exists
 from framework.auth import core as auth_core
 from osf.models import AbstractNode, MaintenanceState
+from osf.models.permissions import get_permission_resolver
 from website import settings
 from website import util as website_utils
 from website.util.sanitize import strip_html
@@ -483,6 +484,8 @@ class RelationshipField(ser.HyperlinkedIdentityField):
         self.always_embed = always_embed
         self.filter = filter
         self.filter_key = filter_key
+        # The view and kwargs of the last related URL built, see `resolve_related_path`
+        self._related_link = None
 
         assert (related_view is not None or self_view is not None), 'Self or related view must be specified.'
         if related_view:
@@ -578,11 +581,11 @@ class RelationshipField(ser.HyperlinkedIdentityField):
                 field_counts_requested = self.process_related_counts_parameters(show_related_counts, value)
 
                 if utils.is_truthy(show_related_counts):
-                    meta[key] = website_utils.rapply(meta_data[key], _url_val, obj=value, serializer=self.parent, request=self.context['request'])
+                    meta[key] = self.get_related_count(meta_data[key], value)
                 elif utils.is_falsy(show_related_counts):
                     continue
                 elif self.field_name in field_counts_requested:
-                    meta[key] = website_utils.rapply(meta_data[key], _url_val, obj=value, serializer=self.parent, request=self.context['request'])
+                    meta[key] = self.get_related_count(meta_data[key], value)
                 else:
                     continue
             elif key == 'projects_in_common':
@@ -595,6 +598,19 @@ class RelationshipField(ser.HyperlinkedIdentityField):
                 meta[key] = website_utils.rapply(meta_data[key], _url_val, obj=value, serializer=self.parent, request=self.context['request'])
         return meta
 
+    def get_related_count(self, meta_value, obj):
+        """Count (or unread count) ``meta_value`` of ``obj``. List serializers compute
+        counts for their whole page up front (see JSONAPISerializer.prefetch_related_counts);
+        anything else is computed on its own.
+        """
+        serializer = self.parent
+        if getattr(serializer, 'field', None):
+            serializer = serializer.parent
+        counts = getattr(serializer, '_related_counts', {}).get(meta_value) if isinstance(meta_value, basestring) else None
+        if counts is not None and obj.pk in counts:
+            return counts[obj.pk]
+        return website_utils.rapply(meta_value, _url_val, obj=obj, serializer=self.parent, request=self.context['request'])
+
     def lookup_attribute(self, obj, lookup_field):
         """
         Returns attribute from target object unless attribute surrounded in angular brackets where it returns the lookup field.
@@ -648,6 +664,8 @@ class RelationshipField(ser.HyperlinkedIdentityField):
                         view = view(getattr(obj, self.field_name))
                     kwargs.update({'version': request.parser_context['kwargs']['version']})
                     url = self.reverse(view, kwargs=kwargs, request=request, format=format)
+                    if view_name == 'related':
+                        self._related_link = (view, kwargs)
                     if self.filter:
                         formatted_filters = self.format_filter(obj)
                         if formatted_filters:
@@ -729,6 +747,7 @@ class RelationshipField(ser.HyperlinkedIdentityField):
             format = self.format
 
         # Return the hyperlink, or error if incorrectly configured.
+        self._related_link = None
         try:
             url = self.get_url(value, self.view_name, request, format)
         except NoReverseMatch:
@@ -757,23 +776,40 @@ class RelationshipField(ser.HyperlinkedIdentityField):
         self_meta = self.get_meta_information(self.self_meta, value)
         relationship = format_relationship_links(related_url, self_url, related_meta, self_meta)
         if related_url and (len(related_path.split('/')) & 1) == 1:
-            resolved_url = resolve(related_path)
+            resolved_url, resolved_kwargs = self.resolve_related_path(related_path)
             related_class = resolved_url.func.view_class
             if issubclass(related_class, RetrieveModelMixin):
                 related_type = resolved_url.namespace
                 try:
                     # TODO: change kwargs to preprint_provider_id and registration_id
                     if related_type == 'preprint_providers':
-                        related_id = resolved_url.kwargs['provider_id']
+                        related_id = resolved_kwargs['provider_id']
                     elif related_type == 'registrations':
-                        related_id = resolved_url.kwargs['node_id']
+                        related_id = resolved_kwargs['node_id']
                     else:
-                        related_id = resolved_url.kwargs[related_type[:-1] + '_id']
+                        related_id = resolved_kwargs[related_type[:-1] + '_id']
                 except KeyError:
                     return relationship
                 relationship['data'] = {'id': related_id, 'type': related_type}
         return relationship
 
+    def resolve_related_path(self, related_path):
+        """The resolver match of the related path, and the kwargs it resolves to. Paths
+        built from a link template reuse the match of the template instead of going
+        through the URL resolver again.
+        """
+        if self._related_link is not None:
+            view, kwargs = self._related_link
+            template = utils.link_template(view, kwargs)
+            if template is not None and template.fill(template.path, kwargs) == related_path:
+                match = template.resolve()
+                return match, {
+                    name: template.fill(val, kwargs) if isinstance(val, basestring) else val
+                    for name, val in match.kwargs.items()
+                }
+        match = resolve(related_path)
+        return match, match.kwargs
+
 class FileCommentRelationshipField(RelationshipField):
     def get_url(self, obj, view_name, request, format):
         if obj.kind == 'folder':
@@ -1050,6 +1086,19 @@ class JSONAPIListSerializer(ser.ListSerializer):
         if isinstance(data, collections.Mapping):
             errors = data.get('errors', None)
             data = data.get('data', None)
+        data = list(data)
+        # Resolve the permissions of the requesting user on every node of the page at once
+        nodes = [item for item in data if isinstance(item, AbstractNode)]
+        if nodes:
+            get_permission_resolver(get_user_auth(self.context['request']).user).prefetch(nodes)
+        if not enable_esi and hasattr(self.child, 'prefetch_related_counts'):
+            self.child.prefetch_related_counts(data)
+        embeds = self.context.get('embed') or {}
+        if embeds and not enable_esi:
+            # Let embeds load their results for the whole page before any item is serialized
+            for embed in embeds.values():
+                if hasattr(embed, 'prefetch'):
+                    embed.prefetch(data)
         if enable_esi:
             ret = [
                 self.child.to_esi_representation(item, envelope=None) for item in data
@@ -1132,11 +1181,15 @@ class JSONAPIListSerializer(ser.ListSerializer):
 
 class SparseFieldsetMixin(object):
     def parse_sparse_fields(self, allow_unsafe=False, **kwargs):
+        # Once fields are dropped for a request there is nothing left to do, which spares
+        # list serializers a pass over their fields for every object
+        if getattr(self, '_sparse_fields_parsed', False):
+            return
         request = kwargs.get('context', {}).get('request', None)
         if request and (allow_unsafe or request.method in permissions.SAFE_METHODS):
-            sparse_fieldset_query_param = 'fields[{}]'.format(self.Meta.type_)
-            if sparse_fieldset_query_param in request.query_params:
-                fieldset = request.query_params[sparse_fieldset_query_param].split(',')
+            self._sparse_fields_parsed = True
+            fieldset = utils.get_sparse_fieldset(request, self.Meta.type_)
+            if fieldset is not None:
                 for field_name in self.fields.fields.copy().keys():
                     if field_name in ('id', 'links', 'type'):
                         # MUST return these fields
@@ -1167,6 +1220,64 @@ class JSONAPISerializer(BaseAPISerializer):
         'nodes:node-registrations',
     }
 
+    # Sparse fieldset query planning (see JSONAPIBaseView.get_sparse_queryset).
+    # ``sparse_field_columns`` maps fields to the model columns they read, on top of
+    # ``sparse_base_columns``; rows are loaded whole unless every requested field is
+    # listed. ``sparse_field_relations`` maps fields to the relations they read, and
+    # relations listed here are only fetched when a requested field needs them.
+    sparse_base_columns = ('id', )
+    sparse_field_columns = {}
+    sparse_field_relations = {}
+
+    @classmethod
+    def get_sparse_plan(cls, fieldset):
+        """Columns to load and relations to fetch for ``fieldset``. Columns are None if
+        the whole row is needed, and relations None if nothing is known about them.
+        """
+        if fieldset is None:
+            return None, None
+        fieldset = [name for name in fieldset if name in cls._declared_fields]
+        columns = None
+        if all(name in cls.sparse_field_columns for name in fieldset):
+            columns = set(cls.sparse_base_columns)
+            for name in fieldset:
+                columns.update(cls.sparse_field_columns[name])
+        relations = set()
+        for name in fieldset:
+            relations.update(cls.sparse_field_relations.get(name, ()))
+        return columns, relations
+
+    def prefetch_related_counts(self, items):
+        """Compute the related counts asked for with ``related_counts`` for all of ``items``
+        at once. Count methods of relationship meta (e.g. ``get_contrib_count``) take part
+        by having a ``<method>_many`` variant, which maps the pks of a list of objects to
+        their counts.
+        """
+        self._related_counts = {}
+        request = self.context['request']
+        show_related_counts = request.query_params.get('related_counts', False)
+        if not show_related_counts or utils.is_falsy(show_related_counts):
+            return
+        if (request.parser_context.get('kwargs') or {}).get('is_embedded'):
+            return
+        requested = None if utils.is_truthy(show_related_counts) else set(show_related_counts.split(','))
+        items = [item for item in items if getattr(item, 'pk', None) is not None]
+        if not items:
+            return
+
+        for field_name, field in self.fields.items():
+            field = getattr(field, 'field', None) or field
+            if not isinstance(field, RelationshipField) or (requested is not None and field_name not in requested):
+                continue
+            for meta in (field.related_meta, field.self_meta):
+                for key in ('count', 'unread'):
+                    method = (meta or {}).get(key)
+                    if not isinstance(method, basestring) or method in self._related_counts:
+                        continue
+                    batch = getattr(self, '{}_many'.format(method), None)
+                    if batch is not None:
+                        self._related_counts[method] = batch(items)
+
     # overrides Serializer
     @classmethod
     def many_init(cls, *args, **kwargs):
@@ -1,9 +1,12 @@
 # -*- coding: utf-8 -*-
+import re
 import urllib
 import urlparse
 
 from django.core.exceptions import ObjectDoesNotExist
+from django.core.urlresolvers import NoReverseMatch, get_script_prefix, get_urlconf, resolve
 from django.db.models import OuterRef, Exists, Q
+from django.utils.http import urlencode
 from rest_framework.exceptions import NotFound
 from rest_framework.reverse import reverse
 
@@ -65,12 +68,102 @@ def get_user_auth(request):
         auth = Auth(user, private_key=private_key)
     return auth
 
+def get_sparse_fieldset(request, type_):
+    """Names of the fields of ``type_`` requested with ``fields[<type_>]``, or None if
+    every field is. The query parameter is parsed once per request.
+    """
+    try:
+        fieldsets = request._sparse_fieldsets
+    except AttributeError:
+        fieldsets = request._sparse_fieldsets = {}
+    if type_ not in fieldsets:
+        query_param = 'fields[{}]'.format(type_)
+        if query_param in request.query_params:
+            fieldsets[type_] = frozenset(request.query_params[query_param].split(','))
+        else:
+            fieldsets[type_] = None
+    return fieldsets[type_]
+
+
+class LinkTemplate(object):
+    """The absolute URL of a view, reversed once with placeholders for its kwargs (except
+    for the API version), so that URLs are built by substituting the actual kwargs.
+    """
+    PLACEHOLDER = re.compile(r'(linktemplate\d+placeholder)')
+
+    def __init__(self, view_name, kwargs):
+        self.view_name = view_name
+        self.placeholders = {}
+        placeholder_kwargs = {}
+        for index, name in enumerate(sorted(kwargs)):
+            if name == 'version':
+                placeholder_kwargs[name] = kwargs[name]
+            else:
+                placeholder = 'linktemplate{}placeholder'.format(index)
+                self.placeholders[placeholder] = name
+                placeholder_kwargs[name] = placeholder
+        self.path = reverse(view_name, kwargs=placeholder_kwargs)
+        self.parts = self.PLACEHOLDER.split(website_util.api_v2_url(self.path, base_prefix=''))
+        self._match = None
+
+    def fill(self, text, kwargs):
+        """``text`` with the placeholders in it replaced by the values of ``kwargs``"""
+        return self._substitute(self.PLACEHOLDER.split(text), kwargs)
+
+    def format(self, kwargs):
+        return self._substitute(self.parts, kwargs)
+
+    def _substitute(self, parts, kwargs):
+        return ''.join(
+            str(kwargs[self.placeholders[part]]) if index & 1 else part
+            for index, part in enumerate(parts)
+        )
+
+    def resolve(self):
+        """The resolver match of the URL with the placeholders"""
+        if self._match is None:
+            self._match = resolve(self.path)
+        return self._match
+
+
+# (view name, kwarg names, API version, script prefix, urlconf) -> LinkTemplate, or
+# None for views whose URLs cannot be built from a template
+_link_templates = {}
+# Values that reverse() would substitute verbatim into URLs with \w+ kwargs
+_TEMPLATE_SAFE_VALUE = re.compile(r'^[A-Za-z0-9_]+$')
+
+
+def link_template(view_name, kwargs):
+    """The LinkTemplate of ``view_name`` if every value of ``kwargs`` can be substituted
+    into it, else None.
+    """
+    for value in kwargs.values():
+        if isinstance(value, bool):
+            return None
+        if isinstance(value, (int, long)):
+            continue
+        if not isinstance(value, basestring) or not _TEMPLATE_SAFE_VALUE.match(value):
+            return None
+    key = (view_name, tuple(sorted(kwargs)), kwargs.get('version'), get_script_prefix(), get_urlconf())
+    if key not in _link_templates:
+        try:
+            _link_templates[key] = LinkTemplate(view_name, kwargs)
+        except NoReverseMatch:
+            # Some kwarg does not accept the placeholder
+            _link_templates[key] = None
+    return _link_templates[key]
+
 
 def absolute_reverse(view_name, query_kwargs=None, args=None, kwargs=None):
     """Like django's `reverse`, except returns an absolute URL. Also add query parameters."""
-    relative_url = reverse(view_name, kwargs=kwargs)
+    template = link_template(view_name, kwargs) if kwargs and not args else None
+    if template is None:
+        relative_url = reverse(view_name, kwargs=kwargs)
+        return website_util.api_v2_url(relative_url, params=query_kwargs, base_prefix='')
 
-    url = website_util.api_v2_url(relative_url, params=query_kwargs, base_prefix='')
+    url = template.format(kwargs)
+    if query_kwargs:
+        url = '{}?{}'.format(url, urlencode(dict(query_kwargs)))
     return url
 
 
@@ -1,15 +1,19 @@
 from collections import defaultdict
+import copy
+import itertools
 
 from django_bulk_update.helper import bulk_update
 from django.conf import settings as django_settings
 from django.db import transaction
 from django.http import JsonResponse
+from django.utils import timezone
 from rest_framework import generics
 from rest_framework import permissions as drf_permissions
 from rest_framework import status
 from rest_framework.decorators import api_view, throttle_classes
 from rest_framework.exceptions import ValidationError, NotFound
 from rest_framework.mixins import ListModelMixin
+from rest_framework.request import Request
 from rest_framework.response import Response
 
 from api.base import permissions as base_permissions
@@ -32,7 +36,9 @@ from api.nodes.permissions import ContributorOrPublicForRelationshipPointers
 from api.nodes.permissions import ReadOnlyIfRegistration
 from api.users.serializers import UserSerializer
 from framework.auth.oauth_scopes import CoreScopes
+from framework.sessions.store import LRUCache
 from osf.models import Contributor, MaintenanceState, BaseFileNode
+from website import settings as website_settings
 
 
 class JSONAPIBaseView(generics.GenericAPIView):
@@ -43,10 +49,44 @@ class JSONAPIBaseView(generics.GenericAPIView):
         self.view_fqn = ':'.join([self.view_category, self.view_name])
         super(JSONAPIBaseView, self).__init__(**kwargs)
 
+    def _get_embed_cache(self):
+        """Per request cache of embedded results, shared by every embedded view of a request."""
+        request = self.request
+        while isinstance(request, Request):
+            request = request._request
+        if not hasattr(request, '_embed_cache'):
+            request._embed_cache = {}
+        return request._embed_cache
+
+    def _get_embedded_view(self, v, view_args, view_kwargs):
+        if isinstance(self.request, EmbeddedRequest):
+            request = EmbeddedRequest(self.request._request)
+        else:
+            request = EmbeddedRequest(self.request)
+
+        view_kwargs.update({
+            'request': request,
+            'is_embedded': True,
+        })
+
+        # Setup a view ourselves to avoid all the junk DRF throws in
+        # v is a function that hides everything v.cls is the actual view class
+        view = v.cls()
+        view.args = view_args
+        view.kwargs = view_kwargs
+        view.request = request
+        view.request.parser_context['kwargs'] = view_kwargs
+        view.format_kwarg = view.get_format_suffix(**view_kwargs)
+        return view
+
     def _get_embed_partial(self, field_name, field):
         """Create a partial function to fetch the values of an embedded field. A basic
         example is to include a Node's children in a single response.
 
+        The partial has a ``prefetch`` attribute, which list serializers call with every
+        item on the page before serializing any of them. Embedded list views that define
+        ``get_embedded_batch`` then load the results for the whole page at once.
+
         :param str field_name: Name of field of the view's serializer_class to load
         results for
         :return function object -> dict:
@@ -54,37 +94,33 @@ class JSONAPIBaseView(generics.GenericAPIView):
         if getattr(field, 'field', None):
             field = field.field
 
+        cache = self._get_embed_cache()
+
+        def prefetch(items):
+            by_view = defaultdict(list)
+            for item in items:
+                v, view_args, view_kwargs = field.resolve(item, field_name, self.request)
+                if v and issubclass(v.cls, ListModelMixin) and hasattr(v.cls, 'get_embedded_batch'):
+                    if (v.cls, field_name, 'batch', (type(item), item.id)) not in cache:
+                        by_view[v.cls].append((item, v, view_args, view_kwargs))
+
+            for view_cls, resolved in by_view.items():
+                view = self._get_embedded_view(*resolved[0][1:])
+                parents = [entry[0] for entry in resolved]
+                types = {item.id: type(item) for item in parents}
+                for item_id, results in view.get_embedded_batch(parents).items():
+                    cache[(view_cls, field_name, 'batch', (types[item_id], item_id))] = results
+
         def partial(item):
             # resolve must be implemented on the field
             v, view_args, view_kwargs = field.resolve(item, field_name, self.request)
             if not v:
                 return None
 
-            if isinstance(self.request, EmbeddedRequest):
-                request = EmbeddedRequest(self.request._request)
-            else:
-                request = EmbeddedRequest(self.request)
-
-            if not hasattr(request._request._request, '_embed_cache'):
-                request._request._request._embed_cache = {}
-            cache = request._request._request._embed_cache
-
+            view = self._get_embedded_view(v, view_args, view_kwargs)
+            request = view.request
             request.parents.setdefault(type(item), {})[item._id] = item
 
-            view_kwargs.update({
-                'request': request,
-                'is_embedded': True,
-            })
-
-            # Setup a view ourselves to avoid all the junk DRF throws in
-            # v is a function that hides everything v.cls is the actual view class
-            view = v.cls()
-            view.args = view_args
-            view.kwargs = view_kwargs
-            view.request = request
-            view.request.parser_context['kwargs'] = view_kwargs
-            view.format_kwarg = view.get_format_suffix(**view_kwargs)
-
             if not isinstance(view, ListModelMixin):
                 try:
                     item = view.get_object()
@@ -110,7 +146,10 @@ class JSONAPIBaseView(generics.GenericAPIView):
                 if not isinstance(view, ListModelMixin):
                     ret = ser.to_representation(item)
                 else:
-                    queryset = view.filter_queryset(view.get_queryset())
+                    # Results loaded by prefetch are already permission checked and ordered
+                    queryset = cache.pop((v.cls, field_name, 'batch', (type(item), item.id)), None)
+                    if queryset is None:
+                        queryset = view.filter_queryset(view.get_queryset())
                     page = view.paginate_queryset(getattr(queryset, '_results_cache', None) or queryset)
 
                     ret = ser.to_representation(page or queryset)
@@ -132,6 +171,7 @@ class JSONAPIBaseView(generics.GenericAPIView):
 
             return ret
 
+        partial.prefetch = prefetch
         return partial
 
     def get_serializer_context(self):
@@ -146,9 +186,9 @@ class JSONAPIBaseView(generics.GenericAPIView):
             embeds = self.request.query_params.getlist('embed') or self.request.query_params.getlist('embed[]')
 
         fields_check = self.get_serializer_class()._declared_fields.copy()
-        if 'fields[{}]'.format(self.serializer_class.Meta.type_) in self.request.query_params:
+        sparse_fields = utils.get_sparse_fieldset(self.request, self.serializer_class.Meta.type_)
+        if sparse_fields is not None:
             # Check only requested and mandatory fields
-            sparse_fields = self.request.query_params['fields[{}]'.format(self.serializer_class.Meta.type_)]
             for field in fields_check.copy().keys():
                 if field not in ('type', 'id', 'links') and field not in sparse_fields:
                     fields_check.pop(field)
@@ -177,6 +217,30 @@ class JSONAPIBaseView(generics.GenericAPIView):
         })
         return context
 
+    def get_sparse_queryset(self, queryset, select_related=(), include=(), **include_kwargs):
+        """Load only what the requested sparse fieldset needs from ``queryset``.
+
+        Rows are restricted with ``only`` when the serializer knows the columns of every
+        requested field. ``select_related`` and ``include`` are the relations the view
+        fetches for a full representation; those the serializer ties to fields are left
+        out when none of the requested fields reads them.
+        """
+        columns, relations = self.get_serializer_class().get_sparse_plan(
+            utils.get_sparse_fieldset(self.request, self.get_serializer_class().Meta.type_)
+        )
+        if relations is not None:
+            known = set(itertools.chain.from_iterable(self.get_serializer_class().sparse_field_relations.values()))
+            select_related = [path for path in select_related if path not in known or path in relations]
+            include = [path for path in include if path not in known or path in relations]
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if include:
+            queryset = queryset.include(*include, **include_kwargs)
+        if columns is not None:
+            # Related rows are only selected through foreign keys that are loaded
+            queryset = queryset.only(*columns.union(path.split('__')[0] for path in select_related))
+        return queryset
+
 
 class LinkedNodesRelationship(JSONAPIBaseView, generics.RetrieveUpdateDestroyAPIView, generics.CreateAPIView):
     """ Relationship Endpoint for Linked Node relationships
@@ -879,6 +943,13 @@ class BaseLinkedList(JSONAPIBaseView, generics.ListAPIView):
         return self.get_node().linked_nodes.filter(is_deleted=False).exclude(type='osf.collection').can_view(user=auth.user, private_link=auth.private_link).order_by('-modified')
 
 
+# Recent provider folder listings by (node, provider, path, node's last log date). Every
+# file action through WaterButler is logged on the node, so listings are not reused once
+# files of the node change. Only used if the cache has a timeout
+# (settings.WATERBUTLER_LISTING_CACHE_TIMEOUT).
+_listing_cache = LRUCache(website_settings.WATERBUTLER_LISTING_CACHE_SIZE, website_settings.WATERBUTLER_LISTING_CACHE_TIMEOUT)
+
+
 class WaterButlerMixin(object):
 
     path_lookup_url_kwarg = 'path'
@@ -886,15 +957,14 @@ class WaterButlerMixin(object):
 
     def bulk_get_file_nodes_from_wb_resp(self, files_list):
         """Takes a list of file data from wb response, touches/updates metadata for each, and returns list of file objects.
-        This function mirrors all the actions of get_file_node_from_wb_resp except the create and updates are done in bulk.
-        The bulk_update and bulk_create do not call the base class update and create so the actions of those functions are
-        done here where needed
+        This function mirrors all the actions of get_file_node_from_wb_resp except the lookups, creates and updates are
+        done in bulk. The bulk_update and bulk_create do not call the base class update and create so the actions of those
+        functions are done here where needed. Existing file nodes whose metadata did not change only have their
+        last_touched bumped.
         """
         node = self.get_node(check_object_permissions=False)
 
-        objs_to_create = defaultdict(lambda: [])
-        file_objs = []
-
+        entries = []
         for item in files_list:
             attrs = item['attributes']
             base_class = BaseFileNode.resolve_class(
@@ -902,27 +972,52 @@ class WaterButlerMixin(object):
                 BaseFileNode.FOLDER if attrs['kind'] == 'folder'
                 else BaseFileNode.FILE
             )
+            entries.append((base_class, '/' + attrs['path'].lstrip('/'), attrs))
 
-            # mirrors BaseFileNode get_or_create
-            try:
-                file_obj = base_class.objects.get(node=node, _path='/' + attrs['path'].lstrip('/'))
-            except base_class.DoesNotExist:
+        # mirrors BaseFileNode get_or_create, for every entry at once
+        existing = {}
+        for file_obj in BaseFileNode.objects.filter(
+            node=node,
+            type__in=set(base_class._typedmodels_type for base_class, _, _ in entries),
+            _path__in=set(path for _, path, _ in entries),
+        ):
+            existing[(file_obj.type, file_obj._path)] = file_obj
+
+        objs_to_create = defaultdict(lambda: [])
+        changed, unchanged = [], []
+        file_objs = []
+        for base_class, path, attrs in entries:
+            file_obj = existing.get((base_class._typedmodels_type, path))
+            if file_obj is None:
                 # create method on BaseFileNode appends provider, bulk_create bypasses this step so it is added here
-                file_obj = base_class(node=node, _path='/' + attrs['path'].lstrip('/'), provider=base_class._provider)
+                file_obj = base_class(node=node, _path=path, provider=base_class._provider)
                 objs_to_create[base_class].append(file_obj)
+                file_obj.update(None, attrs, user=self.request.user, save=False)
             else:
-                file_objs.append(file_obj)
-
-            file_obj.update(None, attrs, user=self.request.user, save=False)
+                before = self._file_node_state(file_obj)
+                file_obj.update(None, attrs, user=self.request.user, save=False)
+                (changed if self._file_node_state(file_obj) != before else unchanged).append(file_obj)
+            file_objs.append(file_obj)
 
-        bulk_update(file_objs)
+        if changed:
+            bulk_update(changed)
+        if unchanged:
+            BaseFileNode.objects.filter(id__in=[obj.id for obj in unchanged]).update(last_touched=timezone.now())
 
         for base_class in objs_to_create:
             base_class.objects.bulk_create(objs_to_create[base_class])
-            file_objs += objs_to_create[base_class]
 
         return file_objs
 
+    def _file_node_state(self, file_obj):
+        """Values of the fields of ``file_obj`` that WaterButler metadata can change"""
+        state = []
+        for field in file_obj._meta.concrete_fields:
+            if field.name != 'last_touched':
+                value = getattr(file_obj, field.attname)
+                state.append(list(value) if isinstance(value, list) else value)
+        return state
+
     def get_file_node_from_wb_resp(self, item):
         """Takes file data from wb response, touches/updates metadata for it, and returns file object"""
         attrs = item['attributes']
@@ -939,7 +1034,17 @@ class WaterButlerMixin(object):
         node = self.get_node(check_object_permissions=False)
         path = self.kwargs[self.path_lookup_url_kwarg]
         provider = self.kwargs[self.provider_lookup_url_kwarg]
-        return self.get_file_object(node, path, provider)
+        if provider == 'osfstorage' or not path.endswith('/') or not _listing_cache.timeout:
+            return self.get_file_object(node, path, provider)
+
+        # Callers modify the metadata they are given, so hand out copies of cached listings
+        key = (node._id, provider, path, node.last_logged)
+        files_list = _listing_cache.get(key)
+        if files_list is None:
+            files_list = self.get_file_object(node, path, provider)
+            _listing_cache.set(key, copy.deepcopy(files_list))
+            return files_list
+        return copy.deepcopy(files_list)
 
     def get_file_object(self, node, path, provider, check_object_permissions=True):
         obj = get_file_object(node=node, path=path, provider=provider, request=self.request)
@@ -1,10 +1,12 @@
-from api.caching.tasks import ban_url
-from framework.postcommit_tasks.handlers import enqueue_postcommit_task
+from django.dispatch import receiver
+from django.db.models.signals import post_save
 
-# unused for now
-# from django.dispatch import receiver
-# from django.db.models.signals import post_save
-# @receiver(post_save)
+from api.caching.tasks import enqueue_ban
+from website import settings
+
+
+@receiver(post_save)
 def ban_object_from_cache(sender, instance, **kwargs):
-    if hasattr(instance, 'absolute_api_v2_url'):
-        enqueue_postcommit_task(ban_url, (instance, ), {}, celery=False, once_per_request=True)
+    # Check the class so a missing URL doesn't cost a query per save
+    if settings.ENABLE_VARNISH and hasattr(sender, 'absolute_api_v2_url'):
+        enqueue_ban(instance)
@@ -1,85 +1,162 @@
+import functools
 import urlparse
 
 import requests
 import logging
+from django.db import transaction
+from gevent.pool import Pool
 
 from website import settings
 
 logger = logging.getLogger(__name__)
 
+BAN_TIMEOUT = 0.3  # 300ms timeout for bans
+
+# One keep-alive session per varnish server, shared by every ban from this process
+_sessions = {}
+
 
 def get_varnish_servers():
     #  TODO: this should get the varnish servers from HAProxy or a setting
     return settings.VARNISH_SERVERS
 
 
-def get_bannable_urls(instance):
+def get_session(host):
+    session = _sessions.get(host)
+    if session is None:
+        session = requests.Session()
+        session.mount(host, requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=10, max_retries=0))
+        _sessions[host] = session
+    return session
+
+
+def get_bannable_paths(instance):
+    """Return the API paths that must be banned when `instance` changes, and the
+    hostname they are served from.
+    """
     from osf.models import Comment
-    bannable_urls = []
-    parsed_absolute_url = {}
 
     if not hasattr(instance, 'absolute_api_v2_url'):
         logger.warning('Tried to ban {}:{} but it didn\'t have a absolute_api_v2_url method'.format(instance.__class__, instance))
         return [], ''
 
+    parsed_absolute_url = urlparse.urlparse(instance.absolute_api_v2_url)
+    paths = [parsed_absolute_url.path]
+    if isinstance(instance, Comment):
+        try:
+            paths.append(urlparse.urlparse(instance.target.referent.absolute_api_v2_url).path)
+        except AttributeError:
+            # some referents don't have an absolute_api_v2_url
+            # I'm looking at you NodeWikiPage
+            pass
+
+        try:
+            paths.append(urlparse.urlparse(instance.root_target.referent.absolute_api_v2_url).path)
+        except AttributeError:
+            # some root_targets don't have an absolute_api_v2_url
+            pass
+
+    return paths, parsed_absolute_url.hostname
+
+
+def get_bannable_urls(instance):
+    bannable_urls = []
+    paths, hostname = get_bannable_paths(instance)
     for host in get_varnish_servers():
-        # add instance url
         varnish_parsed_url = urlparse.urlparse(host)
-        parsed_absolute_url = urlparse.urlparse(instance.absolute_api_v2_url)
-        url_string = '{scheme}://{netloc}{path}.*'.format(scheme=varnish_parsed_url.scheme,
-                                                          netloc=varnish_parsed_url.netloc,
-                                                          path=parsed_absolute_url.path)
-        bannable_urls.append(url_string)
-        if isinstance(instance, Comment):
-            try:
-                parsed_target_url = urlparse.urlparse(instance.target.referent.absolute_api_v2_url)
-            except AttributeError:
-                # some referents don't have an absolute_api_v2_url
-                # I'm looking at you NodeWikiPage
-                pass
-            else:
-                url_string = '{scheme}://{netloc}{path}.*'.format(scheme=varnish_parsed_url.scheme,
-                                                                  netloc=varnish_parsed_url.netloc,
-                                                                  path=parsed_target_url.path)
-                bannable_urls.append(url_string)
-
-            try:
-                parsed_root_target_url = urlparse.urlparse(instance.root_target.referent.absolute_api_v2_url)
-            except AttributeError:
-                # some root_targets don't have an absolute_api_v2_url
-                pass
-            else:
-                url_string = '{scheme}://{netloc}{path}.*'.format(scheme=varnish_parsed_url.scheme,
-                                                              netloc=varnish_parsed_url.netloc,
-                                                              path=parsed_root_target_url.path)
-                bannable_urls.append(url_string)
-
-    return bannable_urls, parsed_absolute_url.hostname
+        for path in paths:
+            bannable_urls.append('{scheme}://{netloc}{path}.*'.format(scheme=varnish_parsed_url.scheme,
+                                                                      netloc=varnish_parsed_url.netloc,
+                                                                      path=path))
+    return bannable_urls, hostname
+
+
+def build_ban_regex(paths):
+    """Merge `paths` into a single regex matching everything below any of them,
+    e.g. ``/(v2/nodes/abc12/|v2/comments/def34/).*``
+
+    The regex is used as the request target of the BAN, so it must start with a
+    slash and must not contain '?', which varnish would treat as a query string.
+    """
+    paths = sorted(set(path.lstrip('/').replace('.', r'\.') for path in paths))
+    if len(paths) == 1:
+        return '/{}.*'.format(paths[0])
+    return '/({}).*'.format('|'.join(paths))
+
+
+def send_ban(host, ban_regex, hostname):
+    session = get_session(host)
+    varnish_parsed_url = urlparse.urlparse(host)
+    url_to_ban = '{scheme}://{netloc}{path}'.format(scheme=varnish_parsed_url.scheme,
+                                                    netloc=varnish_parsed_url.netloc,
+                                                    path=ban_regex)
+    request = session.prepare_request(requests.Request('BAN', url_to_ban, headers=dict(Host=hostname)))
+    # requests would otherwise percent-encode the regex's '|'
+    request.url = url_to_ban
+    try:
+        response = session.send(request, timeout=BAN_TIMEOUT)
+    except Exception as ex:
+        logger.error('Banning {} failed: {}'.format(
+            url_to_ban,
+            ex.message
+        ))
+    else:
+        if not response.ok:
+            logger.error('Banning {} failed: {}'.format(
+                url_to_ban,
+                response.text
+            ))
+        else:
+            logger.info('Banning {} succeeded'.format(
+                url_to_ban
+            ))
+
+
+def ban_paths(paths, hostname):
+    """Send one BAN covering all of `paths` to every varnish server concurrently."""
+    hosts = get_varnish_servers()
+    if not paths or not hosts:
+        return
+    ban_regex = build_ban_regex(paths)
+    pool = Pool(len(hosts))
+    for host in hosts:
+        pool.spawn(send_ban, host, ban_regex, hostname)
+    pool.join(timeout=BAN_TIMEOUT * 2)
+
+
+def ban_instances(instances):
+    """Ban every instance in `instances` with a single BAN per varnish server."""
+    if not settings.ENABLE_VARNISH:
+        return
+    paths_by_hostname = {}
+    for instance in instances:
+        paths, hostname = get_bannable_paths(instance)
+        paths_by_hostname.setdefault(hostname, set()).update(paths)
+    for hostname, paths in paths_by_hostname.items():
+        ban_paths(paths, hostname)
 
 
 def ban_url(instance):
-    # TODO: Refactor; Pull url generation into postcommit_task handling so we only ban urls once per request
-    timeout = 0.3  # 300ms timeout for bans
-    if settings.ENABLE_VARNISH:
-        bannable_urls, hostname = get_bannable_urls(instance)
-
-        for url_to_ban in set(bannable_urls):
-            try:
-                response = requests.request('BAN', url_to_ban, timeout=timeout, headers=dict(
-                    Host=hostname
-                ))
-            except Exception as ex:
-                logger.error('Banning {} failed: {}'.format(
-                    url_to_ban,
-                    ex.message
-                ))
-            else:
-                if not response.ok:
-                    logger.error('Banning {} failed: {}'.format(
-                        url_to_ban,
-                        response.text
-                    ))
-                else:
-                    logger.info('Banning {} succeeded'.format(
-                        url_to_ban
-                    ))
+    ban_instances([instance])
+
+
+def enqueue_ban(instance):
+    """Ban `instance` from the cache after the current request is committed.
+
+    Bans enqueued during one request are merged, so a request that touches many
+    objects still sends a single BAN to each varnish server. Outside of requests,
+    `instance` is banned once the current transaction is committed.
+    """
+    from framework.postcommit_tasks.handlers import enqueue_postcommit_task, in_postcommit_request, postcommit_queue
+
+    if not in_postcommit_request():
+        transaction.on_commit(functools.partial(ban_instances, [instance]))
+        return
+
+    for task in postcommit_queue().values():
+        if getattr(task, 'func', None) is ban_instances:
+            pending = task.args[0]
+            if instance not in pending:
+                pending.append(instance)
+            return
+    enqueue_postcommit_task(ban_instances, ([instance], ), {}, celery=False, once_per_request=True)
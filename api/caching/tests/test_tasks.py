@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+import mock
+import pytest
+
+from api.caching import tasks
+from framework.postcommit_tasks.handlers import postcommit_after_request, postcommit_before_request, postcommit_queue
+from osf_tests.factories import CommentFactory, ProjectFactory
+from website import settings
+
+pytestmark = pytest.mark.django_db
+
+VARNISH_SERVERS = ['http://varnish1:8080', 'http://varnish2:8080']
+
+
+@pytest.fixture()
+def varnish():
+    with mock.patch.object(settings, 'ENABLE_VARNISH', True), \
+            mock.patch.object(settings, 'VARNISH_SERVERS', VARNISH_SERVERS):
+        yield
+
+
+@pytest.fixture()
+def postcommit_request():
+    postcommit_before_request()
+    yield
+    # An error response discards anything still queued and ends the request
+    postcommit_after_request(mock.Mock(status_code=500))
+
+
+class TestBuildBanRegex:
+
+    def test_single_path(self):
+        assert tasks.build_ban_regex(['/v2/nodes/abc12/']) == '/v2/nodes/abc12/.*'
+
+    def test_paths_are_merged(self):
+        regex = tasks.build_ban_regex(['/v2/nodes/abc12/', '/v2/comments/def34/', '/v2/nodes/abc12/'])
+        assert regex == '/(v2/comments/def34/|v2/nodes/abc12/).*'
+        assert '?' not in regex
+
+
+class TestBanInstances:
+
+    @mock.patch.object(tasks, 'send_ban')
+    def test_one_ban_per_server(self, mock_send_ban, varnish):
+        node = ProjectFactory()
+        comment = CommentFactory(node=node)
+
+        tasks.ban_instances([node, comment])
+
+        assert mock_send_ban.call_count == len(VARNISH_SERVERS)
+        hosts = {call[0][0] for call in mock_send_ban.call_args_list}
+        assert hosts == set(VARNISH_SERVERS)
+        ban_regex = mock_send_ban.call_args[0][1]
+        assert node._id in ban_regex
+        assert comment._id in ban_regex
+
+    @mock.patch.object(tasks, 'send_ban')
+    def test_disabled(self, mock_send_ban):
+        tasks.ban_instances([ProjectFactory()])
+        assert not mock_send_ban.called
+
+    def test_sessions_are_reused(self):
+        assert tasks.get_session(VARNISH_SERVERS[0]) is tasks.get_session(VARNISH_SERVERS[0])
+        assert tasks.get_session(VARNISH_SERVERS[0]) is not tasks.get_session(VARNISH_SERVERS[1])
+
+    @mock.patch.object(tasks, 'get_session')
+    def test_send_ban_does_not_quote_regex(self, mock_get_session):
+        session = mock_get_session.return_value
+        session.prepare_request.return_value = mock.Mock()
+        tasks.send_ban(VARNISH_SERVERS[0], '/(v2/nodes/abc12/|v2/nodes/def34/).*', 'api.osf.io')
+
+        sent = session.send.call_args[0][0]
+        assert sent.url == 'http://varnish1:8080/(v2/nodes/abc12/|v2/nodes/def34/).*'
+
+
+class TestEnqueueBan:
+
+    def test_bans_in_a_request_are_merged(self, postcommit_request):
+        node = ProjectFactory()
+        other = ProjectFactory()
+
+        tasks.enqueue_ban(node)
+        tasks.enqueue_ban(other)
+        tasks.enqueue_ban(node)
+
+        ban_tasks = [task for task in postcommit_queue().values() if task.func is tasks.ban_instances]
+        assert len(ban_tasks) == 1
+        assert ban_tasks[0].args[0] == [node, other]
+
+    def test_post_save_enqueues_ban(self, varnish, postcommit_request):
+        node = ProjectFactory()
+        node.title = 'Changed'
+        node.save()
+
+        ban_tasks = [task for task in postcommit_queue().values() if task.func is tasks.ban_instances]
+        assert len(ban_tasks) == 1
+        assert node in ban_tasks[0].args[0]
+
+    @mock.patch.object(tasks, 'ban_instances')
+    def test_bans_outside_a_request_are_not_queued(self, mock_ban_instances, varnish):
+        postcommit_before_request()
+        postcommit_after_request(mock.Mock(status_code=200))
+        node = ProjectFactory()
+        mock_ban_instances.reset_mock()
+
+        with mock.patch('django.db.transaction.on_commit', side_effect=lambda func: func()):
+            node.title = 'Changed'
+            node.save()
+
+        assert not [task for task in postcommit_queue().values() if task.func is tasks.ban_instances]
+        assert mock.call([node]) in mock_ban_instances.call_args_list
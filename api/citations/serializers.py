@@ -1,6 +1,9 @@
 from rest_framework import serializers as ser
 
 from api.base.serializers import JSONAPISerializer, DateByVersion
+from api.base.utils import absolute_reverse
+from api.citations.utils import get_citation
+from osf.models import PreprintService
 
 
 class CitationSerializer(JSONAPISerializer):
@@ -22,3 +25,26 @@ class CitationSerializer(JSONAPISerializer):
 
     class Meta:
         type_ = 'citation-styles'
+
+
+class RenderedCitationSerializer(JSONAPISerializer):
+    id = ser.CharField(read_only=True)
+    target = ser.CharField(source='target._id', read_only=True, help_text='Id of the node or preprint cited')
+    style = ser.CharField(read_only=True)
+    citation = ser.SerializerMethodField()
+
+    def get_citation(self, obj):
+        return get_citation(obj['target'], obj['style'])
+
+    def get_absolute_url(self, obj):
+        version = self.context['request'].parser_context['kwargs']['version']
+        if isinstance(obj['target'], PreprintService):
+            return absolute_reverse('preprints:preprint-citation', kwargs={
+                'preprint_id': obj['target']._id, 'style_id': obj['style'], 'version': version,
+            })
+        return absolute_reverse('nodes:node-citation', kwargs={
+            'node_id': obj['target']._id, 'style_id': obj['style'], 'version': version,
+        })
+
+    class Meta:
+        type_ = 'styled-citations'
@@ -7,4 +7,5 @@ app_name = 'osf'
 urlpatterns = [
     url(r'^styles/$', views.CitationStyleList.as_view(), name=views.CitationStyleList.view_name),
     url(r'^styles/(?P<citation_id>\w+)/$', views.CitationStyleDetail.as_view(), name=views.CitationStyleDetail.view_name),
+    url(r'^rendered/$', views.RenderedCitationList.as_view(), name=views.RenderedCitationList.view_name),
 ]
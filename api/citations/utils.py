@@ -1,15 +1,24 @@
+import hashlib
 import os
 import re
+import threading
 
 from citeproc import CitationStylesStyle, CitationStylesBibliography
 from citeproc import Citation, CitationItem
 from citeproc import formatter
 from citeproc.source.json import CiteProcJSON
 
+from framework.sessions.store import LRUCache
 from osf.models import PreprintService
+from website import settings
 from website.citations.utils import datetime_to_csl
 from website.settings import CITATION_STYLES_PATH, BASE_PATH, CUSTOM_CITATIONS
 
+# Parsed styles by path, each with a lock as citeproc keeps rendering state on the style
+_styles = LRUCache(settings.CITATION_STYLE_CACHE_SIZE, settings.CITATION_STYLE_CACHE_TIMEOUT)
+# Rendered citations by citation_key
+_citations = LRUCache(settings.CITATION_CACHE_SIZE, settings.CITATION_CACHE_TIMEOUT)
+
 
 def clean_up_common_errors(cit):
     cit = re.sub(r"\.+", '.', cit)
@@ -42,6 +51,25 @@ def preprint_csl(preprint, node):
     return csl
 
 
+# Style ids are file names in CITATION_STYLES_PATH, as matched by the citation detail routes
+STYLE_ID = re.compile(r'^[-\w]+$')
+
+
+def get_style(style):
+    """The parsed CSL ``style`` and the lock to hold while rendering with it. Raises
+    ValueError if there is no such style.
+    """
+    if not STYLE_ID.match(style):
+        raise ValueError('{}.csl is not a valid style id'.format(style))
+    custom = CUSTOM_CITATIONS.get(style, False)
+    path = os.path.join(BASE_PATH, 'static', custom) if custom else os.path.join(CITATION_STYLES_PATH, style)
+    cached = _styles.get(path)
+    if cached is None:
+        cached = (CitationStylesStyle(path, validate=False), threading.Lock())
+        _styles.set(path, cached)
+    return cached
+
+
 def render_citation(node, style='apa'):
     """Given a node, return a citation"""
     csl = None
@@ -53,17 +81,15 @@ def render_citation(node, style='apa'):
 
     bib_source = CiteProcJSON(data)
 
-    custom = CUSTOM_CITATIONS.get(style, False)
-    path = os.path.join(BASE_PATH, 'static', custom) if custom else os.path.join(CITATION_STYLES_PATH, style)
-    bib_style = CitationStylesStyle(path, validate=False)
-
-    bibliography = CitationStylesBibliography(bib_style, bib_source, formatter.plain)
+    bib_style, lock = get_style(style)
+    with lock:
+        bibliography = CitationStylesBibliography(bib_style, bib_source, formatter.plain)
 
-    citation = Citation([CitationItem(node._id)])
+        citation = Citation([CitationItem(node._id)])
 
-    bibliography.register(citation)
+        bibliography.register(citation)
 
-    bib = bibliography.bibliography()
+        bib = bibliography.bibliography()
     cit = unicode(bib[0] if len(bib) else '')
 
     title = csl['title'] if csl else node.csl['title']
@@ -76,3 +102,27 @@ def render_citation(node, style='apa'):
         cit = clean_up_common_errors(cit)
 
     return cit
+
+
+def citation_key(node):
+    """Everything the citations of ``node`` (a node or a preprint) are made of that can
+    change: its modification and latest log dates, its DOI and its visible contributors
+    in order, with the dates their names last changed. For preprints, also the name of
+    their provider.
+    """
+    if isinstance(node, PreprintService):
+        return ('preprint', node.id, node.modified, node.provider_id, node.provider.name) + citation_key(node.node)[1:]
+    contributors = hashlib.sha1(repr(list(
+        node.contributor_set.filter(visible=True).order_by('_order').values_list('user_id', 'user__modified')
+    ))).hexdigest()
+    return ('node', node.id, node.modified, node.last_logged, node.get_identifier_value('doi'), contributors)
+
+
+def get_citation(node, style='apa'):
+    """Like render_citation, reusing the citation when nothing it is made of changed"""
+    key = citation_key(node) + (style, )
+    citation = _citations.get(key)
+    if citation is None:
+        citation = render_citation(node, style)
+        _citations.set(key, citation)
+    return citation
@@ -1,13 +1,22 @@
+
 from api.base import permissions as base_permissions
+from api.base.exceptions import InvalidQueryStringError
 from api.base.filters import ListFilterMixin
 from api.base.pagination import NoMaxPageSizePagination
-from api.base.utils import get_object_or_error
+from api.base.utils import get_object_or_error, get_user_auth
 from api.base.views import JSONAPIBaseView
-from api.citations.serializers import CitationSerializer
+from api.citations.serializers import CitationSerializer, RenderedCitationSerializer
+from api.citations.utils import get_style
+from api.nodes.permissions import ContributorOrPublic
+from api.preprints.permissions import PreprintPublishedOrAdmin
 from framework.auth.oauth_scopes import CoreScopes
 from rest_framework import permissions as drf_permissions
 from rest_framework import generics
+from rest_framework.exceptions import NotAuthenticated, NotFound, PermissionDenied
+from osf.models import AbstractNode, PreprintService
 from osf.models.citation import CitationStyle
+from osf.models.permissions import get_permission_resolver
+from website import settings
 
 
 class CitationStyleList(JSONAPIBaseView, generics.ListAPIView, ListFilterMixin):
@@ -80,3 +89,105 @@ class CitationStyleDetail(JSONAPIBaseView, generics.RetrieveAPIView):
         cit = get_object_or_error(CitationStyle, self.kwargs['citation_id'], self.request)
         self.check_object_permissions(self.request, cit)
         return cit
+
+
+class RenderedCitationList(JSONAPIBaseView, generics.ListAPIView):
+    '''Citations of nodes or preprints in given citation styles. *Read-only*
+
+    Renders either one node or preprint in several styles, or several nodes or preprints in one style.
+
+    ##Note
+    **This API endpoint is under active development, and is subject to change in the future**
+
+    ##Rendered Citation Attributes
+
+        name           type               description
+    =========================================================================
+    target         string             id of the node or preprint cited
+    style          string             id of the citation style
+    citation       string             complete citation in the style
+
+    ##Query Params
+
+    + `node=<Str>` -- comma-separated ids of the nodes (or registrations) to cite
+
+    + `preprint=<Str>` -- comma-separated ids of the preprints to cite, instead of nodes
+
+    + `style=<Str>` -- comma-separated ids of the citation styles to render
+
+    At most 100 citations are rendered per request.
+    '''
+    permission_classes = (
+        drf_permissions.IsAuthenticatedOrReadOnly,
+        base_permissions.TokenHasScope
+    )
+
+    required_read_scopes = [CoreScopes.NODE_CITATIONS_READ]
+    required_write_scopes = [CoreScopes.NULL]
+    serializer_class = RenderedCitationSerializer
+    pagination_class = NoMaxPageSizePagination
+    view_category = 'citations'
+    view_name = 'rendered-citation-list'
+
+    def get_param_ids(self, param):
+        ids = []
+        for id_ in self.request.query_params.get(param, '').split(','):
+            if id_ and id_ not in ids:
+                ids.append(id_)
+        return ids
+
+    def get_styles(self):
+        styles = self.get_param_ids('style')
+        if not styles:
+            raise InvalidQueryStringError(detail='At least one style is required.', parameter='style')
+        for style in styles:
+            try:
+                get_style(style)
+            except ValueError:  # style requested could not be found
+                raise NotFound('{}.csl is not a known style.'.format(style))
+        return styles
+
+    def get_targets(self):
+        """Requested nodes or preprints, in the order they were asked for"""
+        node_ids, preprint_ids = self.get_param_ids('node'), self.get_param_ids('preprint')
+        if bool(node_ids) == bool(preprint_ids):
+            raise InvalidQueryStringError(detail='Either node or preprint is required.', parameter='node')
+        auth = get_user_auth(self.request)
+
+        if node_ids:
+            ids = node_ids
+            targets = AbstractNode.objects.filter(
+                guids___id__in=node_ids, type__in=['osf.node', 'osf.registration'], is_deleted=False,
+            )
+            nodes = targets
+        else:
+            ids = preprint_ids
+            targets = PreprintService.objects.filter(
+                guids___id__in=preprint_ids, node__is_deleted=False,
+            ).select_related('node', 'provider')
+            nodes = [preprint.node for preprint in targets]
+        get_permission_resolver(auth.user).prefetch(nodes)
+
+        targets = {target._id: target for target in targets}
+        for id_ in ids:
+            if id_ not in targets:
+                raise NotFound('{} could not be found.'.format(id_))
+            # Same checks as the node and preprint citation detail views
+            permission = PreprintPublishedOrAdmin() if preprint_ids else ContributorOrPublic()
+            if not permission.has_object_permission(self.request, self, targets[id_]):
+                raise PermissionDenied if auth.user else NotAuthenticated
+        return [targets[id_] for id_ in ids]
+
+    # overrides ListAPIView
+    def get_queryset(self):
+        styles = self.get_styles()
+        targets = self.get_targets()
+        if len(styles) > 1 and len(targets) > 1:
+            raise InvalidQueryStringError(detail='Cite either one node or preprint in several styles, or several in one style.', parameter='style')
+        if len(styles) * len(targets) > settings.CITATION_BULK_MAX:
+            raise InvalidQueryStringError(detail='At most {} citations can be rendered at once.'.format(settings.CITATION_BULK_MAX))
+        return [
+            {'id': '{}:{}'.format(target._id, style), 'target': target, 'style': style}
+            for target in targets
+            for style in styles
+        ]
@@ -1,12 +1,14 @@
 from datetime import datetime
-from collections import OrderedDict
+from collections import OrderedDict, defaultdict
 
+from django.contrib.contenttypes.models import ContentType
 from django.core.urlresolvers import resolve, reverse
+from django.db.models import OuterRef, Subquery
 import furl
 import pytz
 
 from framework.auth.core import Auth
-from osf.models import BaseFileNode, OSFUser, Comment
+from osf.models import BaseFileNode, OSFUser, Comment, FileVersion, Guid
 from rest_framework import serializers as ser
 from website import settings
 from website.util import api_v2_url
@@ -26,6 +28,7 @@ from api.base.serializers import (
     DateByVersion,
 )
 from api.base.exceptions import Conflict
+from api.base.filters import register_filter_annotation
 from api.base.utils import absolute_reverse
 from api.base.utils import get_user_auth
 
@@ -256,6 +259,27 @@ class BaseFileSerializer(JSONAPISerializer):
             return 0
         return Comment.find_n_unread(user=user, node=obj.node, page='files', root_id=obj.get_guid()._id)
 
+    def get_unread_comments_count_many(self, objs):
+        user = self.context['request'].user
+        counts = dict.fromkeys([obj.pk for obj in objs], 0)
+        if user.is_anonymous:
+            return counts
+        # The first guid of each file, like get_guid. Files without one have no comments
+        guids = {}
+        for object_id, guid in Guid.objects.filter(
+            content_type=ContentType.objects.get_for_model(BaseFileNode), object_id__in=counts,
+        ).order_by('-id').values_list('object_id', '_id'):
+            guids[object_id] = guid
+        by_node = defaultdict(list)
+        for obj in objs:
+            if obj.pk in guids:
+                by_node[obj.node].append(obj)
+        for node, files in by_node.items():
+            unread = Comment.find_n_unread_many(user, node, [guids[obj.pk] for obj in files])
+            for obj in files:
+                counts[obj.pk] = unread[guids[obj.pk]]
+        return counts
+
     def user_id(self, obj):
         # NOTE: obj is the user here, the meta field for
         # Hyperlinks is weird
@@ -302,6 +326,12 @@ class BaseFileSerializer(JSONAPISerializer):
         return api_v2_url('files/{}/'.format(obj._id))
 
 
+@register_filter_annotation(BaseFileSerializer, 'size')
+def file_size_annotation(view):
+    """Size of the latest version, as returned by BaseFileSerializer.get_size"""
+    return Subquery(FileVersion.objects.filter(basefilenode=OuterRef('pk')).order_by('-created').values('size')[:1])
+
+
 class FileSerializer(BaseFileSerializer):
     node = RelationshipField(related_view='nodes:node-detail',
                              related_view_kwargs={'node_id': '<node._id>'},
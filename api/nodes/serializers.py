@@ -1,4 +1,5 @@
 from django.db import connection
+from django.db.models import Count, F
 
 from api.base.exceptions import (Conflict, EndpointNotImplementedError,
                                  InvalidModelValueError,
@@ -23,10 +24,12 @@ from rest_framework import serializers as ser
 from rest_framework import exceptions
 from addons.base.exceptions import InvalidAuthError, InvalidFolderError
 from website.exceptions import NodeStateError
-from osf.models import (Comment, DraftRegistration, Institution,
-                        MetaSchema, AbstractNode, PrivateLink)
+from osf.models import (Comment, Contributor, DraftRegistration, Institution,
+                        MetaSchema, AbstractNode, NodeLog, NodeRelation, PrivateLink,
+                        UnreadCommentCount)
 from osf.models.external import ExternalAccount
 from osf.models.licenses import NodeLicense
+from osf.models.permissions import get_permission_resolver
 from osf.models.preprint_service import PreprintService
 from website.project import new_private_link
 from website.project.metadata.schemas import LATEST_SCHEMA_VERSION
@@ -151,6 +154,51 @@ class NodeSerializer(JSONAPISerializer):
         'wikis'
     ]
 
+    sparse_base_columns = ('id', 'type')
+    sparse_field_columns = {
+        'title': ('title', ),
+        'description': ('description', ),
+        'category': ('category', ),
+        'date_created': ('created', ),
+        'date_modified': ('last_logged', ),
+        'registration': (),
+        'preprint': ('is_public', 'preprint_file'),
+        'fork': ('is_fork', ),
+        'collection': (),
+        'tags': (),
+        'node_license': ('node_license', ),
+        'public': ('is_public', ),
+        'license': ('node_license', ),
+        'children': (),
+        'comments': (),
+        'contributors': (),
+        'files': (),
+        'wikis': (),
+        'forked_from': ('forked_from', ),
+        'template_node': ('template_node', ),
+        'forks': (),
+        'node_links': (),
+        'parent': (),
+        'identifiers': (),
+        'draft_registrations': (),
+        'registrations': (),
+        'affiliated_institutions': (),
+        'root': ('root', ),
+        'logs': (),
+        'linked_nodes': (),
+        'linked_registrations': (),
+        'view_only_links': (),
+        'citation': (),
+        'preprints': (),
+    }
+    sparse_field_relations = {
+        'current_user_can_comment': ('contributor__user__guids', ),
+        'current_user_permissions': ('contributor__user__guids', ),
+        'node_license': ('node_license', ),
+        'license': ('node_license', ),
+        'root': ('root__guids', ),
+    }
+
     id = IDField(source='_id', read_only=True)
     type = TypeField()
 
@@ -346,51 +394,67 @@ class NodeSerializer(JSONAPISerializer):
     def get_logs_count(self, obj):
         return obj.logs.count()
 
+    def get_logs_count_many(self, objs):
+        return self._count_by(NodeLog.objects.filter(node__in=objs), 'node_id', objs)
+
     def get_node_count(self, obj):
+        return self.get_node_count_many([obj])[obj.pk]
+
+    def get_node_count_many(self, objs):
         auth = get_user_auth(self.context['request'])
         user_id = getattr(auth.user, 'id', None)
+        counts = dict.fromkeys([obj.pk for obj in objs], 0)
         with connection.cursor() as cursor:
             cursor.execute('''
-                WITH RECURSIVE parents AS (
-                  SELECT parent_id, child_id
-                  FROM osf_noderelation
-                  WHERE child_id = %s AND is_node_link IS FALSE
-                UNION ALL
-                  SELECT osf_noderelation.parent_id, parents.parent_id AS child_id
-                  FROM parents JOIN osf_noderelation ON parents.PARENT_ID = osf_noderelation.child_id
-                  WHERE osf_noderelation.is_node_link IS FALSE
-                ), has_admin AS (SELECT * FROM osf_contributor WHERE (node_id IN (SELECT parent_id FROM parents) OR node_id = %s) AND user_id = %s AND admin IS TRUE LIMIT 1)
-                SELECT DISTINCT
-                  COUNT(child_id)
+                SELECT
+                  osf_noderelation.parent_id,
+                  COUNT(DISTINCT child_id)
                 FROM
                   osf_noderelation
                 JOIN osf_abstractnode ON osf_noderelation.child_id = osf_abstractnode.id
                 JOIN osf_contributor ON osf_abstractnode.id = osf_contributor.node_id
                 LEFT JOIN osf_privatelink_nodes ON osf_abstractnode.id = osf_privatelink_nodes.abstractnode_id
                 LEFT JOIN osf_privatelink ON osf_privatelink_nodes.privatelink_id = osf_privatelink.id
-                WHERE parent_id = %s AND is_node_link IS FALSE
+                WHERE osf_noderelation.parent_id IN %s AND is_node_link IS FALSE
                 AND osf_abstractnode.is_deleted IS FALSE
                 AND (
                   osf_abstractnode.is_public
-                  OR (TRUE IN (SELECT TRUE FROM has_admin))
+                  OR EXISTS (
+                    SELECT 1 FROM osf_contributor AS has_admin
+                    WHERE (
+                      has_admin.node_id IN (SELECT ancestor_id FROM osf_nodeclosure WHERE descendant_id = osf_noderelation.parent_id)
+                      OR has_admin.node_id = osf_noderelation.parent_id
+                    ) AND has_admin.user_id = %s AND has_admin.admin IS TRUE
+                  )
                   OR (osf_contributor.user_id = %s AND osf_contributor.read IS TRUE)
                   OR (osf_privatelink.key = %s AND osf_privatelink.is_deleted = FALSE)
-                );
-            ''', [obj.id, obj.id, user_id, obj.id, user_id, auth.private_key])
-
-            return int(cursor.fetchone()[0])
+                )
+                GROUP BY osf_noderelation.parent_id;
+            ''', [tuple(counts), user_id, user_id, auth.private_key])
+            counts.update(cursor.fetchall())
+        return counts
 
     def get_contrib_count(self, obj):
         return len(obj.contributors)
 
+    def get_contrib_count_many(self, objs):
+        return self._count_by(Contributor.objects.filter(node__in=objs), 'node_id', objs)
+
     def get_registration_count(self, obj):
         auth = get_user_auth(self.context['request'])
         registrations = [node for node in obj.registrations_all if node.can_view(auth)]
         return len(registrations)
 
+    def get_registration_count_many(self, objs):
+        Registration = apps.get_model('osf.Registration')
+        return self._count_viewable(Registration.objects.filter(registered_from__in=objs), 'registered_from_id', objs)
+
     def get_pointers_count(self, obj):
         return obj.linked_nodes.count()
 
+    def get_pointers_count_many(self, objs):
+        return self._count_by(NodeRelation.objects.filter(parent__in=objs, is_node_link=True), 'parent_id', objs)
+
     def get_node_links_count(self, obj):
         count = 0
         auth = get_user_auth(self.context['request'])
@@ -399,6 +463,9 @@ class NodeSerializer(JSONAPISerializer):
                 count += 1
         return count
 
+    def get_node_links_count_many(self, objs):
+        return self._count_viewable(self._linked_nodes(objs).exclude(type='osf.registration'), 'linked_from_pk', objs)
+
     def get_registration_links_count(self, obj):
         count = 0
         auth = get_user_auth(self.context['request'])
@@ -407,6 +474,9 @@ class NodeSerializer(JSONAPISerializer):
                 count += 1
         return count
 
+    def get_registration_links_count_many(self, objs):
+        return self._count_viewable(self._linked_nodes(objs).filter(type='osf.registration'), 'linked_from_pk', objs)
+
     def get_unread_comments_count(self, obj):
         user = get_user_auth(self.context['request']).user
         node_comments = Comment.find_n_unread(user=user, node=obj, page='node')
@@ -415,6 +485,45 @@ class NodeSerializer(JSONAPISerializer):
             'node': node_comments
         }
 
+    def get_unread_comments_count_many(self, objs):
+        user = get_user_auth(self.context['request']).user
+        counts = {obj.pk: {'node': 0} for obj in objs}
+        if not user:
+            return counts
+        contributed = set(Contributor.objects.filter(user=user, node__in=objs).values_list('node_id', flat=True))
+        root_targets = {obj.guids.all()[0]: obj.pk for obj in objs if obj.pk in contributed}
+        unread = UnreadCommentCount.get_many(user, None, list(root_targets))
+        for root_target, pk in root_targets.items():
+            counts[pk] = {'node': unread[root_target.id]}
+        return counts
+
+    def _count_by(self, queryset, key, objs):
+        """Rows of ``queryset`` for each of ``objs``, grouped on ``key`` in a single query"""
+        counts = dict.fromkeys([obj.pk for obj in objs], 0)
+        counts.update(queryset.order_by().values_list(key).annotate(count=Count('pk')))
+        return counts
+
+    def _count_viewable(self, nodes, key, objs):
+        """Nodes of ``nodes`` the requesting user can see for each of ``objs``, with
+        ``key`` annotated on every node to tell which of ``objs`` it belongs to
+        """
+        auth = get_user_auth(self.context['request'])
+        nodes = list(nodes)
+        get_permission_resolver(auth.user).prefetch(nodes)
+        counts = dict.fromkeys([obj.pk for obj in objs], 0)
+        for node in nodes:
+            if node.can_view(auth):
+                counts[getattr(node, key)] += 1
+        return counts
+
+    def _linked_nodes(self, objs):
+        """Non-deleted nodes linked from ``objs``, each carrying the pk it is linked from
+        as ``linked_from_pk``. A node linked from several of them appears once for each.
+        """
+        return AbstractNode.objects.filter(
+            _parents__parent__in=objs, _parents__is_node_link=True, is_deleted=False,
+        ).exclude(type='osf.collection').annotate(linked_from_pk=F('_parents__parent_id'))
+
     def create(self, validated_data):
         request = self.context['request']
         user = request.user
@@ -4,7 +4,7 @@ from django.apps import apps
 from django.db.models import Q, OuterRef, Exists
 from django.utils import timezone
 from rest_framework import generics, permissions as drf_permissions
-from rest_framework.exceptions import PermissionDenied, ValidationError, NotFound, MethodNotAllowed, NotAuthenticated
+from rest_framework.exceptions import APIException, PermissionDenied, ValidationError, NotFound, MethodNotAllowed, NotAuthenticated
 from rest_framework.response import Response
 from rest_framework.status import HTTP_204_NO_CONTENT
 
@@ -49,8 +49,8 @@ from api.base.views import (
     LinkedRegistrationsRelationship,
     WaterButlerMixin
 )
-from api.caching.tasks import ban_url
-from api.citations.utils import render_citation
+from api.caching.tasks import enqueue_ban
+from api.citations.utils import get_citation
 from api.comments.permissions import CanCommentOrPublic
 from api.comments.serializers import (CommentCreateSerializer,
                                       NodeCommentSerializer)
@@ -97,9 +97,8 @@ from api.registrations.serializers import RegistrationSerializer
 from api.users.views import UserMixin
 from api.wikis.serializers import NodeWikiSerializer
 from framework.auth.oauth_scopes import CoreScopes
-from framework.postcommit_tasks.handlers import enqueue_postcommit_task
 from osf.models import AbstractNode
-from osf.models import (Node, PrivateLink, Institution, Comment, DraftRegistration,)
+from osf.models import (Contributor, Node, PrivateLink, Institution, Comment, DraftRegistration,)
 from osf.models import OSFUser
 from osf.models import NodeRelation, Guid
 from osf.models import BaseFileNode
@@ -299,7 +298,12 @@ class NodeList(JSONAPIBaseView, bulk_views.BulkUpdateJSONAPIView, bulk_views.Bul
                     raise PermissionDenied
             return nodes
         else:
-            return self.get_queryset_from_request()
+            return self.get_sparse_queryset(
+                self.get_queryset_from_request(),
+                select_related=('node_license', ),
+                include=('contributor__user__guids', 'root__guids'),
+                limit_includes=10
+            )
 
     # overrides ListBulkCreateJSONAPIView, BulkUpdateJSONAPIView, BulkDestroyJSONAPIView
     def get_serializer_class(self):
@@ -681,6 +685,32 @@ class NodeContributorsList(BaseContributorList, bulk_views.BulkUpdateJSONAPIView
             queryset = queryset.filter(user__guids___id__in=contrib_ids)
         return queryset
 
+    # used by JSONAPIBaseView when contributors are embedded on a page of nodes
+    def get_embedded_batch(self, nodes):
+        """Load the contributors of every node in `nodes` with a single query.
+
+        Nodes that get_node would reject, e.g. ones the user may not view, are left
+        out, so their embeds fall back to get_queryset and return the usual error.
+
+        :return dict: Node id -> list of contributors, ordered as in get_queryset
+        """
+        visible = {}
+        for node in nodes:
+            if not isinstance(node, Node) or node.is_deleted or node.is_collection or node.is_registration:
+                continue
+            try:
+                self.check_object_permissions(self.request, node)
+            except APIException:
+                continue
+            visible[node.id] = node
+
+        contributors = {node_id: [] for node_id in visible}
+        queryset = Contributor.objects.filter(node_id__in=visible.keys()).include('user__guids').order_by('node_id', '_order')
+        for contributor in queryset:
+            contributor.node = visible[contributor.node_id]
+            contributors[contributor.node_id].append(contributor)
+        return contributors
+
     # Overrides BulkDestroyJSONAPIView
     def perform_destroy(self, instance):
         auth = get_user_auth(self.request)
@@ -1331,7 +1361,7 @@ class NodeCitationStyleDetail(JSONAPIBaseView, generics.RetrieveAPIView, NodeMix
 
         style = self.kwargs.get('style_id')
         try:
-            citation = render_citation(node=node, style=style)
+            citation = get_citation(node=node, style=style)
         except ValueError as err:  # style requested could not be found
             csl_name = re.findall('[a-zA-Z]+\.csl', err.message)[0]
             raise NotFound('{} is not a known style.'.format(csl_name))
@@ -3331,7 +3361,7 @@ class NodeViewOnlyLinkDetail(JSONAPIBaseView, generics.RetrieveUpdateDestroyAPIV
         assert isinstance(link, PrivateLink), 'link must be a PrivateLink'
         link.is_deleted = True
         link.save()
-        enqueue_postcommit_task(ban_url, (self.get_node(),), {}, celery=True, once_per_request=True)
+        enqueue_ban(self.get_node())
 
 
 class NodeIdentifierList(NodeMixin, IdentifierList):
@@ -24,6 +24,9 @@ from osf.exceptions import ValidationValueError
 
 class BaseRegistrationSerializer(NodeSerializer):
 
+    # Withdrawn registrations hide fields based on the whole row
+    sparse_field_columns = {}
+
     title = ser.CharField(read_only=True)
     description = ser.CharField(read_only=True)
     category_choices = NodeSerializer.category_choices
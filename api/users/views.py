@@ -540,11 +540,12 @@ class UserNodes(JSONAPIBaseView, generics.ListAPIView, UserMixin, NodesFilterMix
 
     # overrides ListAPIView
     def get_queryset(self):
-        return (
+        return self.get_sparse_queryset(
             AbstractNode.objects.filter(id__in=set(self.get_queryset_from_request().values_list('id', flat=True)))
-            .select_related('node_license')
-            .order_by('-modified', )
-            .include('contributor__user__guids', 'root__guids', limit_includes=10)
+            .order_by('-modified', ),
+            select_related=('node_license', ),
+            include=('contributor__user__guids', 'root__guids'),
+            limit_includes=10
         )
 
 
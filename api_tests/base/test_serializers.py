@@ -191,6 +191,25 @@ class TestApiBaseSerializers(ApiTestCase):
                 link = relation['links'].values()[0]
                 assert_in('count', link['meta'], field)
 
+    def test_related_counts_in_list_match_detail(self):
+        registration = factories.RegistrationFactory(project=self.node, is_public=True)
+        self.node.add_pointer(registration, auth=self.auth)
+        factories.NodeFactory(parent=self.node)  # private, and not counted
+
+        detail = self.app.get(self.url, params={'related_counts': True}, auth=self.user.auth)
+        res = self.app.get(
+            '/{}nodes/'.format(API_BASE),
+            params={'related_counts': True, 'filter[id]': self.node._id},
+            auth=self.user.auth
+        )
+        assert_equal(len(res.json['data']), 1)
+        listed = res.json['data'][0]['relationships']
+        for key, relation in detail.json['data']['relationships'].iteritems():
+            assert_equal(relation, listed[key], key)
+        assert_equal(listed['children']['links']['related']['meta']['count'], 5)
+        assert_equal(listed['linked_nodes']['links']['related']['meta']['count'], 1)
+        assert_equal(listed['linked_registrations']['links']['related']['meta']['count'], 1)
+
     def test_related_counts_excluded_query_param_false(self):
 
         res = self.app.get(self.url, params={'related_counts': False})
@@ -85,3 +85,38 @@ class TestFlaskDjangoIntegration:
         except:
             assert_true(False, 'Unexpected Exception from push_status_message when called '
                                'from the v2 API with type "error"')
+
+
+class TestLinkTemplates:
+
+    def _reverse(self, view_name, kwargs, query_kwargs=None):
+        relative_url = api_utils.reverse(view_name, kwargs=kwargs)
+        return api_utils.website_util.api_v2_url(relative_url, params=query_kwargs, base_prefix='')
+
+    def test_absolute_reverse_matches_reverse(self):
+        cases = [
+            ('nodes:node-detail', {'node_id': 'abc12', 'version': 'v2'}, None),
+            ('nodes:node-children', {'node_id': 'abc12', 'version': 'v2'}, {'version': '2.3'}),
+            ('nodes:node-contributor-detail', {'node_id': 'abc12', 'user_id': 'def34', 'version': 'v2'}, None),
+            ('users:user-detail', {'user_id': 'me', 'version': 'v2'}, None),
+        ]
+        for view_name, kwargs, query_kwargs in cases:
+            url = api_utils.absolute_reverse(view_name, kwargs=dict(kwargs), query_kwargs=query_kwargs)
+            assert_equal(url, self._reverse(view_name, dict(kwargs), query_kwargs))
+            assert_is_not_none(api_utils.link_template(view_name, kwargs))
+
+    def test_unsafe_values_are_reversed(self):
+        kwargs = {'node_id': 'abc-12', 'version': 'v2'}
+        assert_is_none(api_utils.link_template('nodes:node-detail', kwargs))
+        assert_equal(
+            api_utils.absolute_reverse('nodes:node-detail', kwargs=dict(kwargs)),
+            self._reverse('nodes:node-detail', dict(kwargs))
+        )
+
+    def test_template_resolves_once(self):
+        kwargs = {'node_id': 'abc12', 'version': 'v2'}
+        template = api_utils.link_template('nodes:node-detail', kwargs)
+        match = template.resolve()
+        assert_equal(match.namespace, 'nodes')
+        assert_equal(template.fill(match.kwargs['node_id'], kwargs), 'abc12')
+        assert_is(template.resolve(), match)
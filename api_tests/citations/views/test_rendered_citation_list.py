@@ -0,0 +1,161 @@
+import pytest
+
+from api.base.settings.defaults import API_BASE
+from api.citations import utils as citation_utils
+from framework.auth.core import Auth
+from osf_tests.factories import (
+    AuthUserFactory,
+    PreprintFactory,
+    ProjectFactory,
+)
+
+
+@pytest.fixture()
+def user():
+    return AuthUserFactory()
+
+@pytest.fixture()
+def public_project(user):
+    return ProjectFactory(creator=user, is_public=True, title='A Public Project')
+
+@pytest.fixture()
+def other_public_project(user):
+    return ProjectFactory(creator=user, is_public=True, title='Another Public Project')
+
+@pytest.fixture()
+def private_project(user):
+    return ProjectFactory(creator=user, is_public=False)
+
+@pytest.fixture()
+def url():
+    return '/{}citations/rendered/'.format(API_BASE)
+
+
+@pytest.mark.django_db
+class TestRenderedCitationList:
+
+    def test_one_node_in_several_styles(self, app, public_project, url):
+        res = app.get(url, {'node': public_project._id, 'style': 'apa,chicago-author-date'})
+        assert res.status_code == 200
+        data = res.json['data']
+        assert [each['attributes']['style'] for each in data] == ['apa', 'chicago-author-date']
+        for each in data:
+            assert each['attributes']['target'] == public_project._id
+            assert each['attributes']['citation'] == citation_utils.render_citation(public_project, each['attributes']['style'])
+            assert each['links']['self'].endswith('/nodes/{}/citation/{}/'.format(public_project._id, each['attributes']['style']))
+
+    def test_several_nodes_in_one_style(self, app, public_project, other_public_project, url):
+        res = app.get(url, {'node': ','.join([other_public_project._id, public_project._id]), 'style': 'apa'})
+        assert res.status_code == 200
+        data = res.json['data']
+        assert [each['attributes']['target'] for each in data] == [other_public_project._id, public_project._id]
+        assert 'Another Public Project' in data[0]['attributes']['citation']
+
+    def test_preprints(self, app, user, url):
+        preprint = PreprintFactory(creator=user)
+        res = app.get(url, {'preprint': preprint._id, 'style': 'apa'})
+        assert res.status_code == 200
+        assert res.json['data'][0]['attributes']['citation'] == citation_utils.render_citation(preprint, 'apa')
+
+    def test_preprint_on_private_node(self, app, user, url):
+        preprint = PreprintFactory(creator=user)
+        preprint.node.is_public = False
+        preprint.node.save()
+        res = app.get(url, {'preprint': preprint._id, 'style': 'apa'}, expect_errors=True)
+        assert res.status_code == 401
+
+        res = app.get(url, {'preprint': preprint._id, 'style': 'apa'}, auth=AuthUserFactory().auth, expect_errors=True)
+        assert res.status_code == 403
+
+        res = app.get(url, {'preprint': preprint._id, 'style': 'apa'}, auth=user.auth)
+        assert res.status_code == 200
+
+    def test_pending_preprint(self, app, user, url):
+        preprint = PreprintFactory(creator=user, is_published=False)
+        preprint.node.is_public = True
+        preprint.node.save()
+        res = app.get(url, {'preprint': preprint._id, 'style': 'apa'}, expect_errors=True)
+        assert res.status_code == 401
+
+        res = app.get(url, {'preprint': preprint._id, 'style': 'apa'}, auth=AuthUserFactory().auth, expect_errors=True)
+        assert res.status_code == 403
+
+        res = app.get(url, {'preprint': preprint._id, 'style': 'apa'}, auth=user.auth)
+        assert res.status_code == 200
+
+    def test_preprint_on_deleted_node(self, app, user, url):
+        preprint = PreprintFactory(creator=user)
+        preprint.node.is_deleted = True
+        preprint.node.save()
+        res = app.get(url, {'preprint': preprint._id, 'style': 'apa'}, auth=user.auth, expect_errors=True)
+        assert res.status_code == 404
+
+    def test_errors(self, app, user, public_project, other_public_project, private_project, url):
+        #   test_several_nodes_in_several_styles
+        res = app.get(url, {'node': ','.join([public_project._id, other_public_project._id]), 'style': 'apa,chicago-author-date'}, expect_errors=True)
+        assert res.status_code == 400
+
+        #   test_style_required
+        res = app.get(url, {'node': public_project._id}, expect_errors=True)
+        assert res.status_code == 400
+
+        #   test_unknown_style
+        res = app.get(url, {'node': public_project._id, 'style': 'fakestyle'}, expect_errors=True)
+        assert res.status_code == 404
+
+        #   test_style_path_traversal
+        for style in ['/etc/passwd', '../../../../etc/passwd', 'apa/../apa']:
+            res = app.get(url, {'node': public_project._id, 'style': style}, expect_errors=True)
+            assert res.status_code == 404
+
+        #   test_numeric_style
+        res = app.get(url, {'node': public_project._id, 'style': '123'}, expect_errors=True)
+        assert res.status_code == 404
+        assert res.json['errors'][0]['detail'] == '123.csl is not a known style.'
+
+        #   test_unknown_node
+        res = app.get(url, {'node': 'abcde', 'style': 'apa'}, expect_errors=True)
+        assert res.status_code == 404
+
+        #   test_private_node
+        res = app.get(url, {'node': private_project._id, 'style': 'apa'}, expect_errors=True)
+        assert res.status_code == 401
+        res = app.get(url, {'node': private_project._id, 'style': 'apa'}, auth=AuthUserFactory().auth, expect_errors=True)
+        assert res.status_code == 403
+        res = app.get(url, {'node': private_project._id, 'style': 'apa'}, auth=user.auth)
+        assert res.status_code == 200
+
+
+@pytest.mark.django_db
+class TestCitationCache:
+
+    def test_citation_changes_with_node(self, user, public_project):
+        citation = citation_utils.get_citation(public_project, 'apa')
+        assert citation_utils.get_citation(public_project, 'apa') == citation
+        assert 'A Public Project' in citation
+
+        public_project.set_title('A Renamed Project', auth=Auth(user), save=True)
+        assert 'A Renamed Project' in citation_utils.get_citation(public_project, 'apa')
+
+    def test_citation_changes_with_contributor_names(self, user, public_project):
+        assert 'Rutherford' not in citation_utils.get_citation(public_project, 'apa')
+
+        user.fullname = 'Ernest Rutherford'
+        user.given_name = 'Ernest'
+        user.family_name = 'Rutherford'
+        user.save()
+        assert 'Rutherford' in citation_utils.get_citation(public_project, 'apa')
+
+    def test_preprint_citation_changes_with_provider_name(self, user):
+        preprint = PreprintFactory(creator=user)
+        key = citation_utils.citation_key(preprint)
+        citation_utils.get_citation(preprint, 'apa')
+
+        preprint.provider.name = 'Renamed Provider'
+        preprint.provider.save()
+        assert citation_utils.citation_key(preprint) != key
+        assert citation_utils.get_citation(preprint, 'apa') == citation_utils.render_citation(preprint, 'apa')
+
+    def test_styles_are_parsed_once(self):
+        style, lock = citation_utils.get_style('apa')
+        assert citation_utils.get_style('apa') == (style, lock)
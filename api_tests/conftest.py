@@ -1,6 +1,8 @@
 import logging
 import pytest
 
+from framework.auth import cas
+from framework.sessions.store import store as session_store
 from website.app import init_app
 from tests.json_api_test_app import JSONAPITestApp
 
@@ -32,3 +34,9 @@ def app():
 @pytest.fixture(autouse=True, scope='session')
 def app_init():
     init_app(routes=False, set_backends=False)
+
+@pytest.fixture(autouse=True)
+def clear_auth_caches():
+    """Cached sessions, users and tokens don't survive the previous test"""
+    session_store.clear()
+    cas.token_cache.clear()
@@ -1,7 +1,9 @@
 import functools
+import mock
 import pytest
 
 from api.base.settings.defaults import API_BASE
+from api.nodes.views import NodeContributorsList
 from framework.auth.core import Auth
 from osf_tests.factories import (
     ProjectFactory,
@@ -128,3 +130,21 @@ class TestNodeEmbeds:
         res = app.get(url, auth=write_contrib_one.auth)
         assert res.status_code == 200
         assert res.json['data']['embeds']['contributors']['meta']['total_bibliographic'] == 3
+
+    def test_embed_contributors_on_node_list_is_batched(self, app, user, write_contrib_one, root_node, child_one, child_two):
+        url = '/{}users/{}/nodes/?embed=contributors'.format(API_BASE, write_contrib_one._id)
+
+        with mock.patch.object(NodeContributorsList, 'get_queryset') as mock_get_queryset:
+            res = app.get(url, auth=user.auth)
+        assert res.status_code == 200
+        # contributors for the whole page come from get_embedded_batch
+        assert not mock_get_queryset.called
+
+        embeds = {node['id']: node['embeds']['contributors'] for node in res.json['data']}
+        assert set(embeds.keys()) == {root_node._id, child_one._id}
+        for node in (root_node, child_one):
+            expected = ['{}-{}'.format(node._id, contrib._id) for contrib in node.contributors]
+            assert [contrib['id'] for contrib in embeds[node._id]['data']] == expected
+            assert embeds[node._id]['links']['meta']['total_bibliographic'] == 3
+            assert embeds[node._id]['data'][0]['embeds']['users']['data']['id'] == user._id
+
@@ -2,6 +2,7 @@ import datetime
 import json
 
 import httpretty
+import mock
 import pytest
 from django.utils import timezone
 from nose.tools import *  # flake8: noqa
@@ -11,9 +12,11 @@ from framework.auth.core import Auth
 from addons.github.tests.factories import GitHubAccountFactory
 from website.util import waterbutler_api_url_for
 from api.base.settings.defaults import API_BASE
+from api.base.views import _listing_cache
 from api_tests import utils as api_utils
 from tests.base import ApiTestCase
 from osf_tests.factories import (
+    CommentFactory,
     ProjectFactory,
     AuthUserFactory,
     PrivateLinkFactory
@@ -153,6 +156,21 @@ class TestNodeFilesList(ApiTestCase):
         assert_equal(res.json['data']['attributes']['kind'], 'file')
         assert_equal(res.json['data']['attributes']['name'], 'NewFile')
 
+    def test_list_unread_comment_counts(self):
+        contributor = AuthUserFactory()
+        self.project.add_contributor(contributor, save=True)
+        commented = api_utils.create_test_file(self.project, self.user, filename='commented')
+        api_utils.create_test_file(self.project, self.user, filename='uncommented')
+        CommentFactory(node=self.project, user=self.user, target=commented.get_guid(), page='files')
+        CommentFactory(node=self.project, user=self.user, target=commented.get_guid(), page='files')
+
+        res = self.app.get('{}osfstorage/'.format(self.private_url), {'related_counts': True}, auth=contributor.auth)
+        unread = {
+            each['attributes']['name']: each['relationships']['comments']['links']['related']['meta']['unread']
+            for each in res.json['data']
+        }
+        assert_equal(unread, {'commented': 2, 'uncommented': 0})
+
     def test_returns_osfstorage_folder_version_two(self):
         fobj = self.project.get_addon('osfstorage').get_root().append_folder('NewFolder')
         fobj.save()
@@ -260,6 +278,56 @@ class TestNodeFilesList(ApiTestCase):
         assert_equal(res.json['data'][0]['attributes']['name'], 'NewFile')
         assert_equal(res.json['data'][0]['attributes']['provider'], 'github')
 
+    def test_node_files_list_updates_changed_entries(self):
+        self._prepare_mock_wb_response(provider='github', files=[{'name': 'NewFile'}, {'name': 'Other', 'path': '/Other'}])
+        self.add_github()
+        url = '/{}nodes/{}/files/github/'.format(API_BASE, self.project._id)
+        res = self.app.get(url, auth=self.user.auth)
+        ids = sorted(each['id'] for each in res.json['data'])
+
+        self._prepare_mock_wb_response(provider='github', files=[{'name': 'Renamed'}, {'name': 'Other', 'path': '/Other'}])
+        res = self.app.get(url, auth=self.user.auth)
+        assert_equal(sorted(each['id'] for each in res.json['data']), ids)
+        assert_equal(
+            sorted(each['attributes']['name'] for each in res.json['data']),
+            ['Other', 'Renamed']
+        )
+
+    @mock.patch.object(_listing_cache, 'timeout', 60)
+    def test_node_files_list_reuses_cached_listing(self):
+        _listing_cache.clear()
+        self._prepare_mock_wb_response(provider='github', files=[{'name': 'NewFile'}])
+        self.add_github()
+        url = '/{}nodes/{}/files/github/'.format(API_BASE, self.project._id)
+        res = self.app.get(url, auth=self.user.auth)
+        assert_equal(res.json['data'][0]['attributes']['name'], 'NewFile')
+
+        self._prepare_mock_wb_response(provider='github', files=[{'name': 'Renamed'}])
+        res = self.app.get(url, auth=self.user.auth)
+        assert_equal(res.json['data'][0]['attributes']['name'], 'NewFile')
+
+        _listing_cache.clear()
+        res = self.app.get(url, auth=self.user.auth)
+        assert_equal(res.json['data'][0]['attributes']['name'], 'Renamed')
+
+    def test_node_files_list_cached_listing_invalidated_by_file_action(self):
+        _listing_cache.clear()
+        self._prepare_mock_wb_response(provider='github', files=[{'name': 'NewFile'}])
+        self.add_github()
+        url = '/{}nodes/{}/files/github/'.format(API_BASE, self.project._id)
+        res = self.app.get(url, auth=self.user.auth)
+        assert_equal(res.json['data'][0]['attributes']['name'], 'NewFile')
+
+        # WaterButler logs every file action on the node
+        self.project.add_log(
+            'github_file_renamed',
+            auth=Auth(self.user),
+            params={'node': self.project._id, 'project': self.project.parent_id},
+        )
+        self._prepare_mock_wb_response(provider='github', files=[{'name': 'Renamed'}])
+        res = self.app.get(url, auth=self.user.auth)
+        assert_equal(res.json['data'][0]['attributes']['name'], 'Renamed')
+
     def test_returns_node_file(self):
         self._prepare_mock_wb_response(provider='github', files=[{'name': 'NewFile'}], folder=False, path='/file')
         self.add_github()
@@ -498,6 +566,20 @@ class TestNodeFilesListFiltering(ApiTestCase):
         assert_equal(res.status_code, 400)
         assert_equal(len(res.json['errors']), 1)
 
+    def test_node_files_osfstorage_are_filterable_by_size(self):
+        api_utils.create_test_file(self.project, self.user, filename='sized')
+        api_utils.create_test_file(self.project, self.user, filename='unversioned').versions.clear()
+
+        url = '/{}nodes/{}/files/osfstorage/?filter[size]=1337'.format(API_BASE, self.project._id)
+        res = self.app.get(url, auth=self.user.auth)
+        assert_equal(res.status_code, 200)
+        assert_equal([each['attributes']['name'] for each in res.json['data']], ['sized'])
+
+        url = '/{}nodes/{}/files/osfstorage/?filter[size]=null'.format(API_BASE, self.project._id)
+        res = self.app.get(url, auth=self.user.auth)
+        assert_equal(res.status_code, 200)
+        assert_equal([each['attributes']['name'] for each in res.json['data']], ['unversioned'])
+
 
 class TestNodeFilesListPagination(ApiTestCase):
     def setUp(self):
@@ -1,6 +1,11 @@
 import pytest
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
 
 from api.base.settings.defaults import API_BASE
+from api.nodes.serializers import NodeSerializer
+from api.nodes.views import NodeList
+from osf.models import Node
 from osf_tests.factories import (
     ProjectFactory,
     AuthUserFactory,
@@ -100,6 +105,37 @@ class TestNodeSparseFieldsList:
         assert set(res.json['data'].keys()) == set(['links', 'type', 'id', 'attributes'])
         assert res.json['data']['attributes'] == {}
 
+    def test_sparse_fields_plan(self):
+        assert NodeSerializer.get_sparse_plan(None) == (None, None)
+
+        columns, relations = NodeSerializer.get_sparse_plan(frozenset(['title', 'root', 'not_a_field']))
+        assert columns == {'id', 'type', 'title', 'root'}
+        assert relations == {'root__guids'}
+
+        # Permissions are computed from the whole row
+        columns, relations = NodeSerializer.get_sparse_plan(frozenset(['title', 'current_user_permissions']))
+        assert columns is None
+        assert relations == {'contributor__user__guids'}
+
+    def test_sparse_fields_queryset_loads_requested_columns(self, user, public_project):
+        request = Request(APIRequestFactory().get('/{}nodes/'.format(API_BASE), {'fields[nodes]': 'title'}))
+        view = NodeList()
+        view.request = request
+        view.kwargs = {}
+
+        queryset = view.get_sparse_queryset(
+            Node.objects.filter(id=public_project.id),
+            select_related=('node_license', ),
+            include=('root__guids', ),
+        )
+        assert not queryset.query.select_related
+        node = queryset.get()
+        assert node.title == public_project.title
+        assert {'description', 'category', 'node_license_id', 'root_id'} <= node.get_deferred_fields()
+
+        # The fieldset is parsed once per request
+        assert request._sparse_fieldsets == {'nodes': frozenset(['title'])}
+
 @pytest.mark.django_db
 class TestNodeSparseFieldsDetail:
 
@@ -8,6 +8,7 @@ from flask import request
 
 from framework.celery_tasks import app
 from framework.postcommit_tasks.handlers import run_postcommit
+from website import settings
 
 logger = logging.getLogger(__name__)
 
@@ -50,6 +51,24 @@ def build_page(rex, kwargs):
     except KeyError:
         return None
 
+def record_hit(page, date, total, unique, date_total, date_unique):
+    """Record increments to the counters of ``page`` as a PageCounterEvent, to be rolled
+    up by rollup_page_counters. Inserting an event never waits on the lock of a popular
+    page's counter row.
+    """
+    from osf.models import PageCounterEvent
+    PageCounterEvent.objects.create(
+        page=page, date=date, total=total, unique=unique, date_total=date_total, date_unique=date_unique
+    )
+
+
+@app.task(ignore_results=True)
+def rollup_page_counters():
+    """Add recorded hits to PageCounter and DailyPageCounter."""
+    from osf.models import PageCounterEvent
+    return PageCounterEvent.objects.rollup()
+
+
 def update_counter(page, node_info=None):
     """Update counters for page.
 
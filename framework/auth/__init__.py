@@ -7,6 +7,7 @@ from framework.auth.core import Auth
 from framework.auth.core import get_user, generate_verification_key
 from framework.auth.exceptions import DuplicateEmailError
 from framework.sessions import session, create_session
+from framework.sessions.store import store
 from framework.sessions.utils import remove_session
 
 
@@ -74,6 +75,8 @@ def external_first_login_authenticate(user, response):
 def logout():
     """Clear users' session(s) and log them out of OSF."""
 
+    if session.data.get('auth_user_id'):
+        store.invalidate_user(session.data['auth_user_id'])
     for key in ['auth_user_username', 'auth_user_id', 'auth_user_fullname', 'auth_user_access_token']:
         try:
             del session.data[key]
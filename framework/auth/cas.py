@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 
+import copy
 import furl
+import hashlib
 import httplib as http
 import json
 import urllib
@@ -12,8 +14,14 @@ from framework.auth import authenticate, external_first_login_authenticate
 from framework.auth.core import get_user, generate_verification_key
 from framework.flask import redirect
 from framework.exceptions import HTTPError
+from framework.sessions.store import LRUCache
 from website import settings
 
+# Keep-alive connections to CAS, shared by every request from this process
+_session = requests.Session()
+_session.mount('http://', requests.adapters.HTTPAdapter(pool_maxsize=settings.CAS_POOL_SIZE))
+_session.mount('https://', requests.adapters.HTTPAdapter(pool_maxsize=settings.CAS_POOL_SIZE))
+
 
 class CasError(HTTPError):
     """General CAS-related error."""
@@ -114,7 +122,7 @@ class CasClient(object):
         url.args['ticket'] = ticket
         url.args['service'] = service_url
 
-        resp = requests.get(url.url)
+        resp = _session.get(url.url)
         if resp.status_code == 200:
             return self._parse_service_validation(resp.content)
         else:
@@ -133,7 +141,7 @@ class CasClient(object):
         headers = {
             'Authorization': 'Bearer {}'.format(access_token),
         }
-        resp = requests.get(url, headers=headers)
+        resp = _session.get(url, headers=headers)
         if resp.status_code == 200:
             return self._parse_profile(resp.content, access_token)
         else:
@@ -182,13 +190,74 @@ class CasClient(object):
         """Revoke a tokens based on payload"""
         url = self.get_auth_token_revocation_url()
 
-        resp = requests.post(url, data=payload)
+        if 'token' in payload:
+            token_cache.invalidate(payload['token'])
+        else:
+            # Which cached tokens belong to the application isn't known here
+            token_cache.clear()
+
+        resp = _session.post(url, data=payload)
         if resp.status_code == 204:
             return True
         else:
             self._handle_error(resp)
 
 
+class TokenCache(object):
+    """Bounded in-process cache of the CAS profiles of OAuth2 access tokens.
+
+    Valid tokens are cached for CAS_TOKEN_CACHE_TIMEOUT seconds. Tokens CAS rejects or
+    fails to authenticate are cached for CAS_TOKEN_NEGATIVE_CACHE_TIMEOUT seconds, so
+    clients retrying with a bad token don't reach CAS either. Server errors from CAS are never cached. Revoking
+    tokens through ``CasClient.revoke_tokens`` purges them, but only in this process;
+    other processes may accept a revoked token until its entry expires.
+    """
+
+    def __init__(self):
+        self.valid = LRUCache(settings.CAS_TOKEN_CACHE_SIZE, settings.CAS_TOKEN_CACHE_TIMEOUT)
+        self.invalid = LRUCache(settings.CAS_TOKEN_CACHE_SIZE, settings.CAS_TOKEN_NEGATIVE_CACHE_TIMEOUT)
+
+    def _key(self, access_token):
+        # Don't keep raw tokens around as keys
+        if isinstance(access_token, unicode):
+            access_token = access_token.encode('utf-8')
+        return hashlib.sha256(access_token).hexdigest()
+
+    def profile(self, client, access_token):
+        """Same as ``client.profile(access_token)``, through the cache.
+
+        :rtype: CasResponse
+        :raises: CasHTTPError, re-raised from cache for rejected tokens
+        """
+        key = self._key(access_token)
+        cached = self.valid.get(key) or self.invalid.get(key)
+        if isinstance(cached, CasHTTPError):
+            raise cached
+        if cached is not None:
+            return copy.deepcopy(cached)
+
+        try:
+            resp = client.profile(access_token)
+        except CasHTTPError as e:
+            if 400 <= e.code < 500:
+                self.invalid.set(key, e)
+            raise
+        (self.valid if resp.authenticated else self.invalid).set(key, copy.deepcopy(resp))
+        return resp
+
+    def invalidate(self, access_token):
+        key = self._key(access_token)
+        self.valid.delete(key)
+        self.invalid.delete(key)
+
+    def clear(self):
+        self.valid.clear()
+        self.invalid.clear()
+
+
+token_cache = TokenCache()
+
+
 def parse_auth_header(header):
     """
     Given an Authorization header string, e.g. 'Bearer abc123xyz',
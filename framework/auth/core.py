@@ -9,7 +9,9 @@ from django.db.models import Q
 from django.db.models import Subquery
 from django.core.validators import URLValidator
 from flask import request
+from rest_framework.permissions import SAFE_METHODS
 from framework.sessions import session
+from framework.sessions.store import store
 
 from osf.exceptions import ValidationValueError, ValidationError
 from osf.utils.requests import check_select_for_update
@@ -81,6 +83,8 @@ def _get_current_user():
     from osf.models import OSFUser
     current_user_id = get_current_user_id()
     if current_user_id:
+        if request.method in SAFE_METHODS:
+            return store.get_user(current_user_id)
         return OSFUser.load(current_user_id, select_for_update=check_select_for_update(request))
     else:
         return None
@@ -1,17 +1,18 @@
 # -*- coding: utf-8 -*-
 import functools
-import hashlib
+import itertools
 import logging
 import threading
+import time
 
-import binascii
 from collections import OrderedDict
-import os
 
 from celery import chain
 from celery.canvas import Signature
+from django.db.models import Model
 from framework.celery_tasks import app
 from celery.local import PromiseProxy
+import gevent
 from gevent.pool import Pool
 
 from website import settings
@@ -19,6 +20,109 @@ from website import settings
 _local = threading.local()
 logger = logging.getLogger(__name__)
 
+# Shared by all requests in this process, so the number of greenlets (and db
+# connections) used by postcommit tasks is bounded no matter how many requests
+# are in flight. Created lazily so it is bound to the running gevent hub.
+_pool = None
+
+# Per task name: number of runs, failures, overflows of the pool, and total and max runtime in seconds
+_stats = {}
+_stats_lock = threading.Lock()
+_stats_logged_at = time.time()
+
+# Distinguishes tasks enqueued with once_per_request=False
+_counter = itertools.count()
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        _pool = Pool(settings.POSTCOMMIT_POOL_SIZE)
+    return _pool
+
+def get_postcommit_stats():
+    """Timing and failure counts of postcommit tasks run by this process, keyed by task name."""
+    with _stats_lock:
+        return {name: dict(stats) for name, stats in _stats.items()}
+
+def reset_postcommit_stats():
+    with _stats_lock:
+        _stats.clear()
+
+def log_postcommit_stats():
+    """Log one line per postcommit task run by this process since the stats were last reset."""
+    for name, stats in sorted(get_postcommit_stats().items()):
+        logger.info('Postcommit task {}: {} runs, {} failures, {} overflows, {:.2f}s mean, {:.2f}s max'.format(
+            name, stats['runs'], stats['failures'], stats['overflows'],
+            stats['total_time'] / stats['runs'] if stats['runs'] else 0.0, stats['max_time']))
+
+def _log_stats_periodically():
+    global _stats_logged_at
+    now = time.time()
+    if now - _stats_logged_at < settings.POSTCOMMIT_STATS_LOG_INTERVAL:
+        return
+    _stats_logged_at = now
+    log_postcommit_stats()
+    reset_postcommit_stats()
+
+def _record(name, **increments):
+    with _stats_lock:
+        stats = _stats.setdefault(name, {'runs': 0, 'failures': 0, 'overflows': 0, 'total_time': 0.0, 'max_time': 0.0})
+        for key, value in increments.items():
+            if key == 'max_time':
+                stats[key] = max(stats[key], value)
+            else:
+                stats[key] += value
+
+def _task_name(fn):
+    return '{}.{}'.format(fn.__module__, fn.__name__)
+
+class PostcommitTask(object):
+    """A function queued to run after the request is committed, along with the
+    celery signature to fall back to if the shared pool is full.
+    """
+
+    def __init__(self, fn, args, kwargs, signature=None):
+        # Same attributes as functools.partial, so queued tasks can be inspected
+        self.func = fn
+        self.args = args
+        self.keywords = kwargs
+        self.name = _task_name(fn)
+        self.signature = signature
+
+    def __call__(self):
+        start = time.time()
+        try:
+            return self.func(*self.args, **self.keywords)
+        except Exception:
+            from framework.sentry import log_exception
+            _record(self.name, failures=1)
+            logger.exception('Postcommit task {} failed'.format(self.name))
+            log_exception()
+        finally:
+            elapsed = time.time() - start
+            _record(self.name, runs=1, total_time=elapsed, max_time=elapsed)
+            if elapsed > settings.POSTCOMMIT_SLOW_TASK_THRESHOLD:
+                logger.warning('Postcommit task {} took {:.2f}s'.format(self.name, elapsed))
+
+def _arg_key(arg):
+    """A cheap, stable stand-in for `arg` in dedup keys. Model instances are keyed by
+    their type and primary key rather than their repr.
+    """
+    if isinstance(arg, Model):
+        return (arg._meta.label, arg.pk)
+    if isinstance(arg, (list, tuple)):
+        return tuple(_arg_key(each) for each in arg)
+    if isinstance(arg, dict):
+        return tuple(sorted((key, _arg_key(value)) for key, value in arg.items()))
+    try:
+        hash(arg)
+    except TypeError:
+        return repr(arg)
+    return arg
+
+def get_task_key(fn, args, kwargs):
+    return repr((_task_name(fn), _arg_key(args), _arg_key(kwargs)))
+
 def postcommit_queue():
     if not hasattr(_local, 'postcommit_queue'):
         _local.postcommit_queue = OrderedDict()
@@ -32,6 +136,13 @@ def postcommit_celery_queue():
 def postcommit_before_request():
     _local.postcommit_queue = OrderedDict()
     _local.postcommit_celery_queue = OrderedDict()
+    _local.in_request = True
+
+def in_postcommit_request():
+    """Whether the postcommit queues are run at the end of a request in this thread.
+    Outside of requests (celery workers, scripts, management commands) nothing drains them.
+    """
+    return getattr(_local, 'in_request', False)
 
 @app.task(max_retries=5, default_retry_delay=60)
 def postcommit_celery_task_wrapper(queue):
@@ -42,17 +153,35 @@ def postcommit_celery_task_wrapper(queue):
     chain([Signature.from_dict(task_dict) for task_dict in queue.values()]).apply()
 
 def postcommit_after_request(response, base_status_error_code=500):
+    _local.in_request = False
     if response.status_code >= base_status_error_code:
         _local.postcommit_queue = OrderedDict()
         _local.postcommit_celery_queue = OrderedDict()
         return response
     try:
         if postcommit_queue():
-            number_of_threads = 30  # one db connection per greenlet, let's share
-            pool = Pool(number_of_threads)
-            for func in postcommit_queue().values():
-                pool.spawn(func)
-            pool.join(timeout=5.0, raise_error=True)  # 5 second timeout and reraise exceptions
+            pool = get_pool()
+            greenlets = []
+            for task in postcommit_queue().values():
+                if not pool.full():
+                    greenlets.append(pool.spawn(task))
+                    continue
+                # Don't make the request wait for a free greenlet
+                _record(task.name, overflows=1)
+                if task.signature is not None:
+                    postcommit_celery_queue()['overflow:{}'.format(next(_counter))] = task.signature
+                elif pool.wait_available(timeout=settings.POSTCOMMIT_OVERFLOW_WAIT):
+                    greenlets.append(pool.spawn(task))
+                else:
+                    # Not a celery task, and the pool is still full: run it in the request's
+                    # own greenlet rather than add one outside of the pool
+                    task()
+            # Failures are recorded by PostcommitTask rather than raised into the response.
+            # Tasks that are still running after the timeout carry on in the background.
+            done = gevent.joinall(greenlets, timeout=settings.POSTCOMMIT_JOIN_TIMEOUT)
+            if len(done) < len(greenlets):
+                logger.warning('{} postcommit tasks still running after {}s'.format(
+                    len(greenlets) - len(done), settings.POSTCOMMIT_JOIN_TIMEOUT))
 
         if postcommit_celery_queue():
             if settings.USE_CELERY:
@@ -65,23 +194,21 @@ def postcommit_after_request(response, base_status_error_code=500):
     except AttributeError as ex:
         if not settings.DEBUG_MODE:
             logger.error('Post commit task queue not initialized: {}'.format(ex))
+    _log_stats_periodically()
     return response
 
 def enqueue_postcommit_task(fn, args, kwargs, celery=False, once_per_request=True):
-    # make a hash of the pertinent data
-    raw = [fn.__name__, fn.__module__, args, kwargs]
-    m = hashlib.md5()
-    m.update('-'.join([x.__repr__() for x in raw]))
-    key = m.hexdigest()
+    key = get_task_key(fn, args, kwargs)
 
     if not once_per_request:
-        # we want to run it once for every occurrence, add a random string
-        key = '{}:{}'.format(key, binascii.hexlify(os.urandom(8)))
+        # we want to run it once for every occurrence, make the key unique
+        key = '{}:{}'.format(key, next(_counter))
 
     if celery and isinstance(fn, PromiseProxy):
         postcommit_celery_queue().update({key: fn.si(*args, **kwargs)})
     else:
-        postcommit_queue().update({key: functools.partial(fn, *args, **kwargs)})
+        signature = fn.si(*args, **kwargs) if isinstance(fn, PromiseProxy) else None
+        postcommit_queue().update({key: PostcommitTask(fn, args, kwargs, signature=signature)})
 
 handlers = {
     'before_request': postcommit_before_request,
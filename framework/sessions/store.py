@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""Cached lookups of sessions, and of the users they belong to.
+
+Lookups check an in-process LRU first, then the django cache named by
+``settings.SESSION_CACHE_ALIAS`` if one is configured (a cache shared by every
+process, e.g. memcached), and only then the database. Values are cached pickled, so
+every lookup returns a fresh instance that callers are free to modify.
+
+Entries are invalidated when their session or user is saved or deleted (see the
+signal listeners in osf.models.session and osf.models.user), on logout and when an
+account is disabled. The in-process entries of *other* processes are not reachable,
+so they are kept for at most ``settings.SESSION_LOCAL_CACHE_TIMEOUT`` seconds.
+"""
+import collections
+import cPickle as pickle
+import datetime as dt
+import threading
+import time
+
+from django.apps import apps
+from django.core.cache import caches
+from django.db.models import Q
+from django.utils import timezone
+
+from website import settings
+
+
+class LRUCache(object):
+    """Bounded in-process mapping whose entries expire ``timeout`` seconds after being set."""
+
+    def __init__(self, max_size, timeout):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        with self._lock:
+            try:
+                expires, value = self._data.pop(key)
+            except KeyError:
+                return None
+            if expires < time.time():
+                return None
+            # Re-insert to mark as most recently used
+            self._data[key] = (expires, value)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (time.time() + self.timeout, value)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class SessionStore(object):
+
+    def __init__(self, local):
+        self.local = local
+
+    @property
+    def shared(self):
+        if not settings.SESSION_CACHE_ALIAS:
+            return None
+        return caches[settings.SESSION_CACHE_ALIAS]
+
+    def _get(self, key):
+        value = self.local.get(key)
+        if value is None and self.shared is not None:
+            value = self.shared.get(key)
+            if value is not None:
+                self.local.set(key, value)
+        return pickle.loads(value) if value is not None else None
+
+    def _set(self, key, obj):
+        value = pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+        self.local.set(key, value)
+        if self.shared is not None:
+            self.shared.set(key, value, settings.SESSION_CACHE_TIMEOUT)
+
+    def _delete(self, key):
+        self.local.delete(key)
+        if self.shared is not None:
+            self.shared.delete(key)
+
+    def _load(self, key, model, _id):
+        if not settings.SESSION_CACHE_ENABLED:
+            return apps.get_model(model).load(_id)
+        obj = self._get(key)
+        if obj is None:
+            obj = apps.get_model(model).load(_id)
+            if obj is not None:
+                self._set(key, obj)
+        else:
+            # Lets models tell cached copies apart when they are saved
+            obj._from_session_cache = True
+        return obj
+
+    def get_session(self, session_id):
+        """Return the ``Session`` with _id ``session_id``, or None"""
+        return self._load('session:{}'.format(session_id), 'osf.Session', session_id)
+
+    def get_user(self, user_id):
+        """Return the ``OSFUser`` with guid ``user_id``, or None.
+
+        Cached users may lag behind writes made by other processes by up to
+        SESSION_LOCAL_CACHE_TIMEOUT seconds. OSFUser.save reloads the fields of a cached
+        user that were not changed before writing it, but requests that modify the user
+        should load it from the database, with select_for_update where appropriate.
+        """
+        return self._load('user:{}'.format(user_id), 'osf.OSFUser', user_id)
+
+    def invalidate_session(self, session_id):
+        self._delete('session:{}'.format(session_id))
+
+    def invalidate_user(self, user_id):
+        self._delete('user:{}'.format(user_id))
+
+    def clear(self):
+        """Clear this process' cache. Entries in the shared cache are left to expire."""
+        self.local.clear()
+
+
+store = SessionStore(LRUCache(settings.SESSION_LOCAL_CACHE_SIZE, settings.SESSION_LOCAL_CACHE_TIMEOUT))
+
+
+# Users whose date_last_login was updated recently enough that it needn't be updated again
+_recent_logins = LRUCache(settings.SESSION_LOCAL_CACHE_SIZE, settings.DATE_LAST_LOGIN_THROTTLE)
+
+
+def record_last_login(user_id):
+    """Update the date_last_login of user ``user_id`` after the current request.
+
+    Updates are throttled per user by DATE_LAST_LOGIN_THROTTLE. A user only counts as
+    updated once the update has been made, so updates dropped with a failed request are
+    made by the user's next request.
+    """
+    from framework.postcommit_tasks.handlers import enqueue_postcommit_task
+
+    if _recent_logins.get(user_id) is None:
+        enqueue_postcommit_task(update_last_logins, ([user_id], ), {}, celery=False, once_per_request=True)
+
+
+def update_last_logins(user_ids):
+    """Set date_last_login to now for every user in ``user_ids`` that was not updated
+    within the last DATE_LAST_LOGIN_THROTTLE seconds.
+    """
+    OSFUser = apps.get_model('osf.OSFUser')
+    now = timezone.now()
+    (
+        OSFUser.objects
+        .filter(guids___id__isnull=False, guids___id__in=user_ids)
+        .filter(Q(date_last_login__isnull=True) | Q(date_last_login__lt=now - dt.timedelta(seconds=settings.DATE_LAST_LOGIN_THROTTLE)))
+    ).update(date_last_login=now)
+    for user_id in user_ids:
+        _recent_logins.set(user_id, True)
@@ -0,0 +1,81 @@
+"""Prewarm or invalidate the cache of rendered wiki pages.
+
+    # Render the current version of every wiki page that has no cached rendering
+    python manage.py wiki_render_cache
+    # Delete the renderings of older RENDERER_VERSIONs, after bumping it
+    python manage.py wiki_render_cache --invalidate --stale
+"""
+import logging
+
+from django.core.management.base import BaseCommand
+
+from addons.wiki.models import NodeWikiPage, RenderedWikiContent
+from osf.models import AbstractNode
+
+logger = logging.getLogger(__name__)
+
+
+def prewarm(nodes, batch_size=100):
+    rendered = 0
+    nodes = nodes.exclude(wiki_pages_current={}).order_by('id')
+    for start in range(0, nodes.count(), batch_size):
+        batch = nodes[start:start + batch_size]
+        wiki_guids = {
+            guid: node for node in batch
+            for guid in node.wiki_pages_current.values()
+        }
+        wikis = [
+            (wiki, wiki_guids[wiki._id])
+            for wiki in NodeWikiPage.objects.filter(guids___id__in=wiki_guids.keys())
+        ]
+        RenderedWikiContent.prefetch(wikis)
+        for wiki, node in wikis:
+            if node.id not in wiki._rendered:
+                wiki.rendered(node)
+                rendered += 1
+    return rendered
+
+
+def invalidate(nodes=None, stale=False):
+    renderings = RenderedWikiContent.objects.all()
+    if nodes is not None:
+        renderings = renderings.filter(node__in=nodes)
+    if stale:
+        renderings = renderings.exclude(renderer_version=RenderedWikiContent.RENDERER_VERSION)
+    deleted, _ = renderings.delete()
+    return deleted
+
+
+class Command(BaseCommand):
+    """Render the current versions of wiki pages ahead of their first view, or delete renderings"""
+    def add_arguments(self, parser):
+        super(Command, self).add_arguments(parser)
+        parser.add_argument(
+            '--node',
+            type=str,
+            nargs='+',
+            dest='nodes',
+            help='Only the wikis of these node guids',
+        )
+        parser.add_argument(
+            '--invalidate',
+            action='store_true',
+            dest='invalidate',
+            help='Delete cached renderings instead of creating them',
+        )
+        parser.add_argument(
+            '--stale',
+            action='store_true',
+            dest='stale',
+            help='With --invalidate, only delete renderings of older renderer versions',
+        )
+
+    def handle(self, *args, **options):
+        guids = options.get('nodes')
+        nodes = AbstractNode.objects.filter(guids___id__in=guids) if guids else None
+        if options.get('invalidate'):
+            logger.info('Deleted {} rendered wiki pages'.format(invalidate(nodes, stale=options.get('stale'))))
+        else:
+            if nodes is None:
+                nodes = AbstractNode.objects.filter(is_deleted=False)
+            logger.info('Rendered {} wiki pages'.format(prewarm(nodes)))
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.7 on 2017-12-13 15:02
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import osf.utils.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('osf', '0077_nodeclosure'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueuedSearchUpdate',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('doc_type', models.CharField(choices=[('node', 'node'), ('user', 'user')], max_length=10)),
+                ('object_id', models.PositiveIntegerField()),
+                ('first_queued', osf.utils.fields.NonNaiveDateTimeField(db_index=True)),
+                ('last_queued', osf.utils.fields.NonNaiveDateTimeField(db_index=True)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='queuedsearchupdate',
+            unique_together=set([('doc_type', 'object_id')]),
+        ),
+    ]
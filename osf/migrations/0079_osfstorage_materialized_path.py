@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('osf', '0078_queuedsearchupdate'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            [
+                """
+                WITH RECURSIVE materialized_paths (id, path) AS (
+                    SELECT id, name || CASE WHEN type = 'osf.osfstoragefile' THEN '' ELSE '/' END
+                    FROM osf_basefilenode
+                    WHERE parent_id IS NULL
+                    AND type IN ('osf.osfstoragefilenode', 'osf.osfstoragefile', 'osf.osfstoragefolder')
+                UNION ALL
+                    SELECT F.id, P.path || F.name || CASE WHEN F.type = 'osf.osfstoragefile' THEN '' ELSE '/' END
+                    FROM materialized_paths AS P
+                        JOIN osf_basefilenode AS F ON F.parent_id = P.id
+                    WHERE F.type IN ('osf.osfstoragefilenode', 'osf.osfstoragefile', 'osf.osfstoragefolder')
+                )
+                UPDATE osf_basefilenode
+                SET _materialized_path = materialized_paths.path
+                FROM materialized_paths
+                WHERE osf_basefilenode.id = materialized_paths.id;
+                """,
+                """
+                CREATE INDEX osfstorage_materialized_path_index
+                ON public.osf_basefilenode (node_id, _materialized_path text_pattern_ops)
+                WHERE type IN ('osf.osfstoragefilenode', 'osf.osfstoragefile', 'osf.osfstoragefolder');
+                """
+            ], [
+                """
+                DROP INDEX IF EXISTS osfstorage_materialized_path_index RESTRICT;
+                """,
+                """
+                UPDATE osf_basefilenode SET _materialized_path = ''
+                WHERE type IN ('osf.osfstoragefilenode', 'osf.osfstoragefile', 'osf.osfstoragefolder');
+                """
+            ]
+        ),
+    ]
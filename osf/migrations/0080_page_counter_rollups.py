@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('osf', '0079_osfstorage_materialized_path'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyPageCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('page', models.CharField(max_length=300)),
+                ('date', models.DateField()),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('unique', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='dailypagecounter',
+            unique_together=set([('page', 'date')]),
+        ),
+        migrations.CreateModel(
+            name='PageCounterEvent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('page', models.CharField(db_index=True, max_length=300)),
+                ('date', models.DateField()),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('unique', models.PositiveIntegerField(default=0)),
+                ('date_total', models.PositiveIntegerField(default=0)),
+                ('date_unique', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import osf.utils.datetime_aware_jsonfield
+import osf.utils.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('osf', '0080_page_counter_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SummaryCheckpoint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('summary', models.CharField(max_length=50, unique=True)),
+                ('watermark', osf.utils.fields.NonNaiveDateTimeField()),
+                ('buckets', osf.utils.datetime_aware_jsonfield.DateTimeAwareJSONField(default=dict)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SummaryRow',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('summary', models.CharField(max_length=50)),
+                ('object_id', models.PositiveIntegerField()),
+                ('flags', models.PositiveIntegerField()),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='summaryrow',
+            unique_together=set([('summary', 'object_id')]),
+        ),
+        # Incremental summaries look for nodes modified since their last run
+        migrations.RunSQL(
+            [
+                """
+                CREATE INDEX abstractnode_modified_index
+                ON public.osf_abstractnode (modified);
+                """
+            ], [
+                """
+                DROP INDEX IF EXISTS abstractnode_modified_index RESTRICT;
+                """
+            ]
+        ),
+    ]
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import osf.utils.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('osf', '0081_summary_checkpoints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnreadCommentCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('viewed', osf.utils.fields.NonNaiveDateTimeField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('root_target', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='osf.Guid')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='unreadcommentcount',
+            unique_together=set([('user', 'root_target')]),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('osf', '0082_unreadcommentcount'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='queuedsearchupdate',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='queuedsearchupdate',
+            name='doc_type',
+            field=models.CharField(choices=[('node', 'node'), ('contrib', 'contrib'), ('user', 'user')], max_length=10),
+        ),
+    ]
@@ -9,7 +9,7 @@ from osf.models.sanctions import Sanction, Embargo, Retraction, RegistrationAppr
 from osf.models.registrations import Registration, DraftRegistrationLog, DraftRegistration  # noqa
 from osf.models.nodelog import NodeLog  # noqa
 from osf.models.tag import Tag  # noqa
-from osf.models.comment import Comment  # noqa
+from osf.models.comment import Comment, UnreadCommentCount  # noqa
 from osf.models.conference import Conference, MailRecord  # noqa
 from osf.models.citation import CitationStyle  # noqa
 from osf.models.archive import ArchiveJob, ArchiveTarget  # noqa
@@ -29,10 +29,11 @@ from osf.models.files import (  # noqa
     File, Folder,  # noqa
     FileVersion, TrashedFile, TrashedFileNode, TrashedFolder,  # noqa
 )  # noqa
-from osf.models.node_relation import NodeRelation  # noqa
-from osf.models.analytics import UserActivityCounter, PageCounter  # noqa
+from osf.models.node_relation import NodeRelation, NodeClosure  # noqa
+from osf.models.analytics import UserActivityCounter, PageCounter, DailyPageCounter, PageCounterEvent, SummaryCheckpoint, SummaryRow  # noqa
 from osf.models.admin_profile import AdminProfile  # noqa
 from osf.models.admin_log_entry import AdminLogEntry  # noqa
 from osf.models.maintenance_state import MaintenanceState  # noqa
 from osf.models.quickfiles import QuickFilesNode  # noqa
 from osf.models.action import ReviewAction  # noqa
+from osf.models.queued_search_update import QueuedSearchUpdate  # noqa
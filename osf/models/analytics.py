@@ -1,12 +1,17 @@
+import itertools
 import logging
 
 from dateutil import parser
-from django.db import models, transaction
+from django.db import connection, models, transaction
+from django.db.models import Sum
 from django.utils import timezone
 
+from framework.analytics import record_hit
 from framework.sessions import session
 from osf.models.base import BaseModel
 from osf.utils.datetime_aware_jsonfield import DateTimeAwareJSONField
+from osf.utils.fields import NonNaiveDateTimeField
+from website import settings
 
 logger = logging.getLogger(__name__)
 
@@ -73,72 +78,174 @@ class PageCounter(BaseModel):
 
     @classmethod
     def update_counter(cls, page, node_info):
+        """Record a hit on ``page`` by the current session.
+
+        Hits are written to PageCounterEvent and rolled up into PageCounter and
+        DailyPageCounter by the rollup_page_counters task, so a popular page never
+        serializes requests on a row lock.
+        """
         cleaned_page = cls.clean_page(page)
-        date = timezone.now()
+        date = timezone.now().date()
         date_string = date.strftime('%Y/%m/%d')
         visited_by_date = session.data.get('visited_by_date', {'date': date_string, 'pages': []})
 
-        with transaction.atomic():
-            model_instance, created = cls.objects.select_for_update().get_or_create(_id=cleaned_page)
-
-            # if they visited something today
-            if date_string == visited_by_date['date']:
-                # if they haven't visited this page today
-                if cleaned_page not in visited_by_date['pages']:
-                    # if the model_instance has today in it
-                    if date_string in model_instance.date.keys():
-                        # increment the number of unique visitors for today
-                        model_instance.date[date_string]['unique'] += 1
-                    else:
-                        # set the number of unique visitors for today to 1
-                        model_instance.date[date_string] = dict(unique=1)
-            # if they haven't visited something today
-            else:
-                # set their visited by date to blank
-                visited_by_date['date'] = date_string
-                visited_by_date['pages'] = []
-                # if the model_instance has today in it
-                if date_string in model_instance.date.keys():
-                    # increment the number of unique visitors for today
-                    model_instance.date[date_string]['unique'] += 1
-                else:
-                    # set the number of unique visitors to 1
-                    model_instance.date[date_string] = dict(unique=1)
+        # if they haven't visited something today, set their visited by date to blank
+        if date_string != visited_by_date['date']:
+            visited_by_date['date'] = date_string
+            visited_by_date['pages'] = []
+        # count a unique visitor for today if they haven't visited this page today
+        date_unique = int(cleaned_page not in visited_by_date['pages'])
+
+        # update their sessions
+        visited_by_date['pages'].append(cleaned_page)
+        session.data['visited_by_date'] = visited_by_date
+
+        # if a download counter is being updated, only count towards the totals
+        # if the user who is downloading isn't a contributor to the project
+        page_type = cleaned_page.split(':')[0]
+        if page_type == 'download' and node_info:
+            if node_info['contributors'].filter(guids___id__isnull=False, guids___id=session.data.get('auth_user_id')).exists():
+                record_hit(cleaned_page, date, total=0, unique=0, date_total=1, date_unique=date_unique)
+                return
+
+        visited = session.data.get('visited', [])
+        unique = int(page not in visited)
+        if unique:
+            visited.append(page)
+            session.data['visited'] = visited
+
+        session.save()
+        record_hit(cleaned_page, date, total=1, unique=unique, date_total=1, date_unique=date_unique)
 
-            # update their sessions
-            visited_by_date['pages'].append(cleaned_page)
-            session.data['visited_by_date'] = visited_by_date
+    @classmethod
+    def get_basic_counters(cls, page):
+        """Return the (unique, total) hits on ``page``, including hits that haven't
+        been rolled up yet, or (None, None) if it has never been visited.
+        """
+        cleaned_page = cls.clean_page(page)
+        counts = [
+            cls.objects.filter(_id=cleaned_page).values_list('unique', 'total').first(),
+            PageCounterEvent.objects.filter(page=cleaned_page).aggregate(unique=Sum('unique'), total=Sum('total')),
+        ]
+        counts[1] = (counts[1]['unique'], counts[1]['total']) if counts[1]['total'] is not None else None
+        counts = [count for count in counts if count is not None]
+        if not counts:
+            return (None, None)
+        return (sum(unique for unique, _ in counts), sum(total for _, total in counts))
 
-            if date_string in model_instance.date.keys():
-                if 'total' not in model_instance.date[date_string].keys():
-                    model_instance.date[date_string].update(total=0)
-                model_instance.date[date_string]['total'] += 1
-            else:
-                model_instance.date[date_string] = dict(total=1)
+    @classmethod
+    def get_basic_counters_by_prefix(cls, prefix):
+        """Like get_basic_counters, for every page starting with ``prefix`` at once, as a
+        dict of (unique, total) keyed by page. Pages never visited are left out.
+        """
+        cleaned_prefix = cls.clean_page(prefix)
+        # Don't worry. The only % at the end of the LIKE clause, the index is still used
+        counts = [
+            cls.objects.filter(_id__startswith=cleaned_prefix).values_list('_id', 'unique', 'total'),
+            PageCounterEvent.objects.filter(page__startswith=cleaned_prefix).values('page').annotate(
+                page_unique=Sum('unique'), page_total=Sum('total'),
+            ).values_list('page', 'page_unique', 'page_total'),
+        ]
+        hits = {}
+        for page, unique, total in itertools.chain(*counts):
+            page_unique, page_total = hits.get(page, (0, 0))
+            hits[page] = (page_unique + unique, page_total + total)
+        return hits
+
+
+class DailyPageCounter(models.Model):
+    """Hits on a page on one day. ``unique`` counts sessions that visited the page that day."""
+    page = models.CharField(max_length=300)
+    date = models.DateField()
+    total = models.PositiveIntegerField(default=0)
+    unique = models.PositiveIntegerField(default=0)
 
-            # if a download counter is being updated, only perform the update
-            # if the user who is downloading isn't a contributor to the project
-            page_type = cleaned_page.split(':')[0]
-            if page_type == 'download' and node_info:
-                if node_info['contributors'].filter(guids___id__isnull=False, guids___id=session.data.get('auth_user_id')).exists():
-                    model_instance.save()
-                    return
+    class Meta:
+        unique_together = ('page', 'date')
+
+
+class PageCounterEventQuerySet(models.QuerySet):
+
+    def rollup(self, batch_size=None):
+        """Add events to their PageCounter and DailyPageCounter rows, one batch at a time,
+        and delete them. Events locked by a concurrent rollup are skipped.
+
+        :return int: Number of events processed
+        """
+        batch_size = batch_size or settings.PAGE_COUNTER_ROLLUP_BATCH_SIZE
+        sql = """
+            WITH batch AS (
+                DELETE FROM {events}
+                WHERE id IN (
+                    SELECT id FROM {events}
+                    ORDER BY id
+                    LIMIT %(batch_size)s
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING page, date, total, "unique", date_total, date_unique
+            ), lifetime AS (
+                INSERT INTO {counters} (_id, total, "unique", date, created, modified)
+                SELECT page, SUM(total), SUM("unique"), '{{}}', now(), now()
+                FROM batch
+                GROUP BY page
+                ON CONFLICT (_id) DO UPDATE SET
+                    total = {counters}.total + EXCLUDED.total,
+                    "unique" = {counters}."unique" + EXCLUDED."unique",
+                    modified = EXCLUDED.modified
+            ), daily AS (
+                INSERT INTO {daily} (page, date, total, "unique")
+                SELECT page, date, SUM(date_total), SUM(date_unique)
+                FROM batch
+                GROUP BY page, date
+                ON CONFLICT (page, date) DO UPDATE SET
+                    total = {daily}.total + EXCLUDED.total,
+                    "unique" = {daily}."unique" + EXCLUDED."unique"
+            )
+            SELECT COUNT(*) FROM batch;
+        """.format(
+            events=self.model._meta.db_table,
+            counters=PageCounter._meta.db_table,
+            daily=DailyPageCounter._meta.db_table,
+        )
+        processed = 0
+        while True:
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute(sql, {'batch_size': batch_size})
+                    count = cursor.fetchone()[0]
+            if not count:
+                return processed
+            processed += count
+
+
+class PageCounterEvent(models.Model):
+    """Hits on a page recorded by one request, waiting to be rolled up. ``total`` and ``unique`` are added to the page's PageCounter, and
+    ``date_total`` and ``date_unique`` to its DailyPageCounter for ``date``.
+    """
+    page = models.CharField(max_length=300, db_index=True)
+    date = models.DateField()
+    total = models.PositiveIntegerField(default=0)
+    unique = models.PositiveIntegerField(default=0)
+    date_total = models.PositiveIntegerField(default=0)
+    date_unique = models.PositiveIntegerField(default=0)
 
-            visited = session.data.get('visited', [])
-            if page not in visited:
-                model_instance.unique += 1
-                visited.append(page)
-                session.data['visited'] = visited
+    objects = PageCounterEventQuerySet.as_manager()
 
-            session.save()
-            model_instance.total += 1
 
-            model_instance.save()
+class SummaryCheckpoint(models.Model):
+    """Where an incremental analytics summary (see scripts/analytics) left off."""
+    summary = models.CharField(max_length=50, unique=True)
+    # Rows modified since have not been counted yet
+    watermark = NonNaiveDateTimeField()
+    # Flags -> number of rows counted with them, as stored in SummaryRow
+    buckets = DateTimeAwareJSONField(default=dict)
 
-    @classmethod
-    def get_basic_counters(cls, page):
-        try:
-            counter = cls.objects.get(_id=cls.clean_page(page))
-            return (counter.unique, counter.total)
-        except cls.DoesNotExist:
-            return (None, None)
+
+class SummaryRow(models.Model):
+    """The flags an incremental analytics summary last counted a row with."""
+    summary = models.CharField(max_length=50)
+    object_id = models.PositiveIntegerField()
+    flags = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('summary', 'object_id')
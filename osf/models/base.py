@@ -39,6 +39,17 @@ def generate_guid(length=5):
                 return guid_id
 
 
+def generate_guids(count, length=5):
+    """Like generate_guid, for ``count`` guids at once"""
+    guids = set()
+    while len(guids) < count:
+        candidates = set(''.join(random.sample(ALPHABET, length)) for _ in range(count - len(guids))) - guids
+        candidates -= set(BlackListGuid.objects.filter(guid__in=candidates).values_list('guid', flat=True))
+        candidates -= set(Guid.objects.filter(_id__in=candidates).values_list('_id', flat=True))
+        guids |= candidates
+    return list(guids)
+
+
 def generate_object_id():
     return str(bson.ObjectId())
 
@@ -1,7 +1,9 @@
 
 import pytz
-from django.db import models
+from django.db import connection, models
 from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils import timezone
 from osf.models import Node
 from osf.models import NodeLog
@@ -9,6 +11,7 @@ from osf.models.base import GuidMixin, Guid, BaseModel
 from osf.models.mixins import CommentableMixin
 from osf.models.spam import SpamMixin
 from osf.models import validators
+from osf.utils.fields import NonNaiveDateTimeField
 
 from framework.exceptions import PermissionsError
 from website import settings
@@ -109,26 +112,28 @@ class Comment(GuidMixin, SpamMixin, CommentableMixin, BaseModel):
 
     @classmethod
     def find_n_unread(cls, user, node, page, root_id=None):
-        if node.is_contributor(user):
-            if page == Comment.OVERVIEW:
-                view_timestamp = user.get_node_comment_timestamps(target_id=node._id)
-                root_target = Guid.load(node._id)
-            elif page == Comment.FILES or page == Comment.WIKI:
-                view_timestamp = user.get_node_comment_timestamps(target_id=root_id)
-                root_target = Guid.load(root_id)
-            else:
-                raise ValueError('Invalid page')
-
-            if not view_timestamp.tzinfo:
-                view_timestamp = view_timestamp.replace(tzinfo=pytz.utc)
-
-            return cls.objects.filter(
-                Q(node=node) & ~Q(user=user) & Q(is_deleted=False) &
-                (Q(created__gt=view_timestamp) | Q(modified__gt=view_timestamp)) &
-                Q(root_target=root_target)
-            ).count()
-
-        return 0
+        if page == Comment.OVERVIEW:
+            root_id = node._id
+        elif page != Comment.FILES and page != Comment.WIKI:
+            raise ValueError('Invalid page')
+        return cls.find_n_unread_many(user, node, [root_id])[root_id]
+
+    @classmethod
+    def find_n_unread_many(cls, user, node, root_ids):
+        """Number of unread comments on each of the ``root_ids`` of ``node`` (the node
+        itself, its files or wiki pages), as a dict keyed by root id. Root ids without a
+        Guid have none.
+        """
+        unread = dict.fromkeys(root_ids, 0)
+        if not node.is_contributor(user):
+            return unread
+        root_targets = list(Guid.objects.filter(_id__in=root_ids))
+        counts = UnreadCommentCount.get_many(user, node, root_targets)
+        unread.update({
+            root_target._id: counts[root_target.id]
+            for root_target in root_targets
+        })
+        return unread
 
     @classmethod
     def create(cls, auth, **kwargs):
@@ -153,18 +158,17 @@ class Comment(GuidMixin, SpamMixin, CommentableMixin, BaseModel):
 
         log_dict.update(comment.root_target.referent.get_extra_log_params(comment))
 
+        # Saved once, before mentions are recorded: it must have an id to access M2M,
+        # and saving it again would invalidate the unread counts it just incremented
+        comment.save()
+
         new_mentions = []
         if comment.content:
-            if not comment.id:
-                # must have id before accessing M2M
-                comment.save()
             new_mentions = get_valid_mentioned_users_guids(comment, comment.node.contributors)
             if new_mentions:
                 project_signals.mention_added.send(comment, new_mentions=new_mentions, auth=auth)
                 comment.ever_mentioned.add(*comment.node.contributors.filter(guids___id__in=new_mentions))
 
-        comment.save()
-
         comment.node.add_log(
             NodeLog.COMMENT_ADDED,
             log_dict,
@@ -248,3 +252,121 @@ class Comment(GuidMixin, SpamMixin, CommentableMixin, BaseModel):
                 save=False,
             )
             self.node.save()
+
+
+class UnreadCommentCount(models.Model):
+    """Number of comments on a root target (a node, file or wiki page) that a user has
+    not seen, relative to their comments-viewed timestamp for it.
+
+    Counts are computed on first read, incremented as comments are added, and reset
+    when the user views the comments. Any other change to the comments of a root
+    target drops its counts, to be recomputed on the next read.
+    """
+    user = models.ForeignKey('OSFUser', on_delete=models.CASCADE)
+    root_target = models.ForeignKey(Guid, on_delete=models.CASCADE)
+    # The comments-viewed timestamp `count` is relative to. Counts are recomputed
+    # when it no longer matches the user's.
+    viewed = NonNaiveDateTimeField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'root_target')
+
+    @classmethod
+    def get_many(cls, user, node, root_targets):
+        """Unread counts of ``user`` on ``root_targets``, keyed by Guid id. Missing or
+        stale counts are recomputed with grouped queries. ``node`` may be None
+        when the root targets belong to several nodes.
+        """
+        viewed = {}
+        for root_target in root_targets:
+            timestamp = user.get_node_comment_timestamps(target_id=root_target._id)
+            if not timestamp.tzinfo:
+                timestamp = timestamp.replace(tzinfo=pytz.utc)
+            viewed[root_target.id] = timestamp
+
+        counts = {}
+        for root_target_id, timestamp, count in cls.objects.filter(user=user, root_target_id__in=viewed).values_list('root_target_id', 'viewed', 'count'):
+            if timestamp == viewed[root_target_id]:
+                counts[root_target_id] = count
+        stale = [root_target_id for root_target_id in viewed if root_target_id not in counts]
+        if not stale:
+            return counts
+
+        # The latest comment on each root target before counting. Counts are only stored
+        # if it is still the latest when they are written, so that comments added or
+        # changed in between (whose increments or invalidations found nothing to update)
+        # aren't missed.
+        latest = {
+            root_target_id: (max_id, max_modified)
+            for root_target_id, max_id, max_modified in
+            Comment.objects.filter(root_target_id__in=stale).values_list('root_target_id')
+            .annotate(max_id=models.Max('id'), max_modified=models.Max('modified')).order_by()
+            .values_list('root_target_id', 'max_id', 'max_modified')
+        }
+        unread = Q()
+        for root_target_id in stale:
+            unread |= Q(root_target_id=root_target_id) & (Q(created__gt=viewed[root_target_id]) | Q(modified__gt=viewed[root_target_id]))
+        comments = Comment.objects.filter(unread, is_deleted=False).exclude(user=user)
+        if node is not None:
+            comments = comments.filter(node=node)
+        computed = dict(
+            comments.values_list('root_target_id').annotate(count=models.Count('id')).order_by()
+        )
+        for root_target_id in stale:
+            counts[root_target_id] = computed.get(root_target_id, 0)
+
+        sql = """
+            INSERT INTO {table} (user_id, root_target_id, viewed, "count")
+            SELECT %s, counted.root_target_id, counted.viewed, counted.count
+            FROM unnest(%s::integer[], %s::timestamptz[], %s::integer[], %s::integer[], %s::timestamptz[])
+                AS counted (root_target_id, viewed, count, max_id, max_modified)
+            WHERE (
+                SELECT MAX(id) FROM {comments} WHERE root_target_id = counted.root_target_id
+            ) IS NOT DISTINCT FROM counted.max_id AND (
+                SELECT MAX(modified) FROM {comments} WHERE root_target_id = counted.root_target_id
+            ) IS NOT DISTINCT FROM counted.max_modified
+            ON CONFLICT (user_id, root_target_id) DO UPDATE SET
+                viewed = EXCLUDED.viewed,
+                "count" = EXCLUDED.count;
+        """.format(table=cls._meta.db_table, comments=Comment._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [
+                user.id,
+                stale,
+                [viewed[root_target_id] for root_target_id in stale],
+                [counts[root_target_id] for root_target_id in stale],
+                [latest.get(root_target_id, (None, None))[0] for root_target_id in stale],
+                [latest.get(root_target_id, (None, None))[1] for root_target_id in stale],
+            ])
+        return counts
+
+    @classmethod
+    def increment(cls, comment):
+        cls.objects.filter(root_target_id=comment.root_target_id).exclude(user_id=comment.user_id).update(count=models.F('count') + 1)
+
+    @classmethod
+    def reset(cls, user, root_id, viewed):
+        """Everything on ``root_id`` is read as of ``viewed``"""
+        cls.objects.filter(user=user, root_target___id=root_id).update(count=0, viewed=viewed)
+
+    @classmethod
+    def invalidate(cls, root_target_id):
+        cls.objects.filter(root_target_id=root_target_id).delete()
+
+
+##### Signal listeners #####
+@receiver(post_save, sender=Comment)
+def update_unread_counts_on_save(sender, instance, created, **kwargs):
+    if not instance.root_target_id:
+        return
+    if created and not instance.is_deleted:
+        UnreadCommentCount.increment(instance)
+    else:
+        UnreadCommentCount.invalidate(instance.root_target_id)
+
+
+@receiver(post_delete, sender=Comment)
+def update_unread_counts_on_delete(sender, instance, **kwargs):
+    if instance.root_target_id:
+        UnreadCommentCount.invalidate(instance.root_target_id)
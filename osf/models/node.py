@@ -1,16 +1,13 @@
-import functools
 import itertools
 import logging
 import re
 import urlparse
 import warnings
 
-import bson
 from django.db.models import Q
 from dirtyfields import DirtyFieldsMixin
 from django.apps import apps
 from django.contrib.contenttypes.fields import GenericRelation
-from django.core.paginator import Paginator
 from django.core.exceptions import ValidationError
 from django.core.urlresolvers import reverse
 from django.db import models, transaction, connection
@@ -19,7 +16,6 @@ from django.dispatch import receiver
 from django.utils import timezone
 from django.utils.functional import cached_property
 from keen import scoped_keys
-from psycopg2._psycopg import AsIs
 from typedmodels.models import TypedModel, TypedModelManager
 from include import IncludeManager
 
@@ -35,7 +31,9 @@ from osf.models.identifiers import Identifier, IdentifierMixin
 from osf.models.licenses import NodeLicenseRecord
 from osf.models.mixins import (AddonModelMixin, CommentableMixin, Loggable,
                                NodeLinkMixin, Taggable)
-from osf.models.node_relation import NodeRelation
+from osf.models.node_copy import SubtreeCopy
+from osf.models.node_relation import NodeClosure, NodeRelation
+from osf.models.permissions import get_permission_resolver
 from osf.models.nodelog import NodeLog
 from osf.models.sanctions import RegistrationApproval
 from osf.models.private_link import PrivateLink
@@ -78,51 +76,28 @@ class AbstractNodeQuerySet(GuidMixinQuerySet):
 
     def get_children(self, root, active=False):
         # If `root` is a root node, we can use the 'descendants' related name
-        # rather than doing a recursive query
+        # rather than joining on the closure table
         if root.id == root.root_id:
             query = root.descendants.exclude(id=root.id)
             if active:
                 query = query.filter(is_deleted=False)
             return query
-        else:
-            sql = """
-                WITH RECURSIVE descendants AS (
-                SELECT
-                    parent_id,
-                    child_id,
-                    1 AS LEVEL,
-                    ARRAY[parent_id] as pids
-                FROM %s
-                %s
-                WHERE is_node_link IS FALSE AND parent_id = %s %s
-                UNION ALL
-                SELECT
-                    d.parent_id,
-                    s.child_id,
-                    d.level + 1,
-                    d.pids || s.parent_id
-                FROM descendants AS d
-                    JOIN %s AS s
-                    ON d.child_id = s.parent_id
-                WHERE s.is_node_link IS FALSE AND %s = ANY(pids)
-                ) SELECT array_agg(DISTINCT child_id)
-                FROM descendants
-                WHERE parent_id = %s;
-            """
-            with connection.cursor() as cursor:
-                node_relation_table = AsIs(NodeRelation._meta.db_table)
-                cursor.execute(sql, [
-                    node_relation_table,
-                    AsIs('LEFT JOIN osf_abstractnode ON {}.child_id = osf_abstractnode.id'.format(node_relation_table) if active else ''),
-                    root.pk,
-                    AsIs('AND osf_abstractnode.is_deleted IS FALSE' if active else ''),
-                    node_relation_table,
-                    root.pk,
-                    root.pk])
-                row = cursor.fetchone()[0]
-                if not row:
-                    return AbstractNode.objects.none()
-                return AbstractNode.objects.filter(id__in=row)
+        return AbstractNode.objects.get_descendants(root, active=active)
+
+    def get_descendants(self, node, active=False):
+        """All nodes below `node` in the component tree, excluding node links."""
+        query = self.filter(_closure_ancestors__ancestor=node)
+        if active:
+            query = query.filter(is_deleted=False)
+        return query
+
+    def get_ancestors(self, node):
+        """All nodes above `node` in the component tree, nearest first."""
+        return self.filter(_closure_descendants__descendant=node).order_by('_closure_descendants__depth')
+
+    def is_descendant(self, node, ancestor):
+        """Whether `node` is somewhere below `ancestor` in the component tree."""
+        return NodeClosure.objects.filter(ancestor=ancestor, descendant=node).exists()
 
     def can_view(self, user=None, private_link=None):
         qs = self.filter(is_public=True)
@@ -143,21 +118,11 @@ class AbstractNodeQuerySet(GuidMixinQuerySet):
 
             sqs = Contributor.objects.filter(node=models.OuterRef('pk'), user__id=user, read=True)
             qs |= self.annotate(can_view=models.Exists(sqs)).filter(can_view=True)
-            qs |= self.extra(where=['''
-                "osf_abstractnode".id in (
-                    WITH RECURSIVE implicit_read AS (
-                        SELECT "osf_contributor"."node_id"
-                        FROM "osf_contributor"
-                        WHERE "osf_contributor"."user_id" = %s
-                        AND "osf_contributor"."admin" is TRUE
-                    UNION ALL
-                        SELECT "osf_noderelation"."child_id"
-                        FROM "implicit_read"
-                        LEFT JOIN "osf_noderelation" ON "osf_noderelation"."parent_id" = "implicit_read"."node_id"
-                        WHERE "osf_noderelation"."is_node_link" IS FALSE
-                    ) SELECT * FROM implicit_read
-                )
-            '''], params=(user, ))
+            admin_node_ids = Contributor.objects.filter(user__id=user, admin=True).values('node_id')
+            qs |= self.filter(
+                models.Q(id__in=admin_node_ids) |
+                models.Q(id__in=NodeClosure.objects.filter(ancestor_id__in=admin_node_ids).values('descendant_id'))
+            )
 
         return qs
 
@@ -176,6 +141,15 @@ class AbstractNodeManager(TypedModelManager, IncludeManager):
     def get_children(self, root, active=False):
         return self.get_queryset().get_children(root, active=active)
 
+    def get_descendants(self, node, active=False):
+        return self.get_queryset().get_descendants(node, active=active)
+
+    def get_ancestors(self, node):
+        return self.get_queryset().get_ancestors(node)
+
+    def is_descendant(self, node, ancestor):
+        return self.get_queryset().is_descendant(node, ancestor)
+
     def can_view(self, user=None, private_link=None):
         return self.get_queryset().can_view(user=user, private_link=private_link)
 
@@ -685,8 +659,7 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
     def bulk_update_search(cls, nodes, index=None):
         from website import search
         try:
-            serialize = functools.partial(search.search.update_node, index=index, bulk=True, async=False)
-            search.search.bulk_update_nodes(serialize, nodes, index=index)
+            search.search.bulk_index_nodes(nodes, index=index)
         except search.exceptions.SearchUnavailableError as e:
             logger.exception(e)
             log_exception()
@@ -765,16 +738,20 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
         return False
 
     def can_view(self, auth):
-        if auth and getattr(auth.private_link, 'anonymous', False):
-            return auth.private_link.nodes.filter(pk=self.pk).exists()
-
-        if not auth and not self.is_public:
-            return False
+        if not auth:
+            return self.is_public
+
+        resolver = get_permission_resolver(auth.user)
+        if auth.private_key:
+            anonymous, link_node_ids = resolver.private_link(auth.private_key)
+            if anonymous:
+                return self.id in link_node_ids
+        else:
+            link_node_ids = ()
 
         return (self.is_public or
-                (auth.user and self.has_permission(auth.user, 'read')) or
-                auth.private_key in self.private_link_keys_active or
-                self.is_admin_parent(auth.user))
+                self.id in link_node_ids or
+                (auth.user is not None and resolver.has_permission(self, 'read')))
 
     def can_edit(self, auth=None, user=None):
         """Return if a user is authorized to edit this node.
@@ -818,11 +795,7 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
             for contrib in self.contributor_set.all():
                 if contrib.user_id == user.id:
                     return get_contributor_permissions(contrib)
-        try:
-            contrib = user.contributor_set.get(node=self)
-        except Contributor.DoesNotExist:
-            return []
-        return get_contributor_permissions(contrib)
+        return get_permission_resolver(user).get(self).as_list()
 
     def get_visible(self, user):
         try:
@@ -840,11 +813,7 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
         """
         if not user:
             return False
-        query = {'node': self, permission: True}
-        has_permission = user.contributor_set.filter(**query).exists()
-        if not has_permission and permission == 'read' and check_parent:
-            return self.is_admin_parent(user)
-        return has_permission
+        return get_permission_resolver(user).has_permission(self, permission, check_parent=check_parent)
 
     def has_permission_on_children(self, user, permission):
         """Checks if the given user has a given permission on any child nodes
@@ -858,12 +827,9 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
         return False
 
     def is_admin_parent(self, user):
-        if self.has_permission(user, 'admin', check_parent=False):
-            return True
-        parent = self.parent_node
-        if parent:
-            return parent.is_admin_parent(user)
-        return False
+        if not user:
+            return False
+        return get_permission_resolver(user).is_admin_parent(self)
 
     def find_readable_descendants(self, auth):
         """ Returns a generator of first descendant node(s) readable by <user>
@@ -882,25 +848,19 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
 
     @property
     def parents(self):
-        if self.parent_node:
-            return [self.parent_node] + self.parent_node.parents
-        return []
+        return list(AbstractNode.objects.get_ancestors(self))
 
     @property
     def admin_contributor_ids(self):
-        def get_admin_contributor_ids(node):
-            return Contributor.objects.select_related('user').filter(
-                node=node,
-                user__is_active=True,
-                admin=True
-            ).values_list('user__guids___id', flat=True)
-
-        contributor_ids = set(self.contributors.values_list('guids___id', flat=True))
-        admin_ids = set(get_admin_contributor_ids(self))
-        for parent in self.parents:
-            admins = get_admin_contributor_ids(parent)
-            admin_ids.update(set(admins).difference(contributor_ids))
-        return admin_ids
+        """Guids of the active admins of this node, and of those admins of its ancestors
+        that are not contributors to it
+        """
+        return set(Contributor.objects.filter(
+            Q(node=self) |
+            Q(node___closure_descendants__descendant=self) & ~Q(user_id__in=self.contributor_set.values('user_id')),
+            user__is_active=True,
+            admin=True,
+        ).values_list('user__guids___id', flat=True))
 
     @property
     def admin_contributors(self):
@@ -1576,39 +1536,7 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
         return self.private_links.filter(is_deleted=True).values_list('key', flat=True)
 
     def get_root(self):
-        sql = """
-            WITH RECURSIVE ascendants AS (
-              SELECT
-                parent_id,
-                child_id,
-                1 AS LEVEL,
-                ARRAY[child_id] as cids
-              FROM %s
-              WHERE is_node_link IS FALSE and child_id = %s
-              UNION ALL
-              SELECT
-                S.parent_id,
-                D.child_id,
-                D.level + 1,
-                D.cids || S.child_id
-              FROM ascendants AS D
-                JOIN %s AS S
-                  ON D.parent_id = S.child_id
-              WHERE S.is_node_link IS FALSE
-                AND %s = ANY(cids)
-            ) SELECT parent_id
-              FROM ascendants
-              WHERE child_id = %s
-              ORDER BY level DESC
-              LIMIT 1;
-        """
-        with connection.cursor() as cursor:
-            node_relation_table = AsIs(NodeRelation._meta.db_table)
-            cursor.execute(sql, [node_relation_table, self.pk, node_relation_table, self.pk, self.pk])
-            res = cursor.fetchone()
-            if res:
-                return AbstractNode.objects.get(pk=res[0])
-            return self
+        return AbstractNode.objects.get_ancestors(self).last() or self
 
     def find_readable_antecedent(self, auth):
         """ Returns first antecendant node readable by <user>.
@@ -1646,76 +1574,67 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
             raise NodeStateError('Folders may not be registered')
         original = self
 
-        # Note: Cloning a node will clone each node wiki page version and add it to
-        # `registered.wiki_pages_current` and `registered.wiki_pages_versions`.
         if original.is_deleted:
             raise NodeStateError('Cannot register deleted node.')
 
-        registered = original.clone()
-        registered.recast('osf.registration')
-
-        registered.registered_date = timezone.now()
-        registered.registered_user = auth.user
-        registered.registered_from = original
-        if not registered.registered_meta:
-            registered.registered_meta = {}
-        registered.registered_meta[schema._id] = data
-
-        registered.forked_from = self.forked_from
-        registered.creator = self.creator
-        registered.node_license = original.license.copy() if original.license else None
-        registered.wiki_private_uuids = {}
-
-        # Need to save here in order to set many-to-many fields
-        registered.save()
-
-        registered.registered_schema.add(schema)
-        registered.copy_contributors_from(self)
-        registered.tags.add(*self.all_tags.values_list('pk', flat=True))
-        registered.affiliated_institutions.add(*self.affiliated_institutions.values_list('pk', flat=True))
-
-        # Clone each log from the original node for this registration.
-        self.clone_logs(registered)
+        when = timezone.now()
 
-        registered.is_public = False
-        # Copy unclaimed records to unregistered users for parent
-        registered.copy_unclaimed_records()
+        def prepare(original, registered):
+            registered.recast('osf.registration')
+
+            registered.registered_date = when
+            registered.registered_user = auth.user
+            registered.registered_from = original
+            if not registered.registered_meta:
+                registered.registered_meta = {}
+            registered.registered_meta[schema._id] = data
+
+            registered.forked_from_id = original.forked_from_id
+            registered.creator_id = original.creator_id
+            registered.node_license = original.license.copy() if original.license else None
+            registered.wiki_private_uuids = {}
+            registered.is_public = False
+
+        # Register the whole component tree at once. Wiki page versions are cloned by
+        # the wiki add-on's after_register hook.
+        tree = SubtreeCopy(original)
+        get_permission_resolver(auth.user).prefetch(tree.originals)
+        for component in tree.originals[1:]:
+            if not component.can_edit(auth=auth) and not component.is_admin_parent(user=auth.user):
+                raise PermissionsError(
+                    'User {} does not have permission '
+                    'to register this node'.format(auth.user._id)
+                )
+        tree.copy_nodes(prepare, parent=parent)
+        registered = tree.copies[original.id]
 
         if parent:
             node_relation = NodeRelation.objects.get(parent=parent.registered_from, child=original)
             NodeRelation.objects.get_or_create(_order=node_relation._order, parent=parent, child=registered)
 
+        Registration = apps.get_model('osf.Registration')
+        Registration.registered_schema.through.objects.bulk_create([
+            Registration.registered_schema.through(registration_id=copy.id, metaschema_id=schema.id)
+            for copy in tree.copies.values()
+        ])
+        tree.copy_contributors()
+        tree.copy_tags()
+        tree.copy_institutions()
+        # Clone each log from the original nodes for their registrations.
+        tree.copy_logs()
+        # Copy unclaimed records to unregistered users for parent
+        tree.copy_unclaimed_records()
+
         # After register callback
-        for addon in original.get_addons():
-            _, message = addon.after_register(original, registered, auth.user)
+        for _, message in tree.run_addon_hooks('after_register', auth.user):
             if message:
                 status.push_status_message(message, kind='info', trust=False)
 
-        for node_relation in original.node_relations.filter(child__is_deleted=False):
-            node_contained = node_relation.child
-            # Register child nodes
-            if not node_relation.is_node_link:
-                registered_child = node_contained.register_node(  # noqa
-                    schema=schema,
-                    auth=auth,
-                    data=data,
-                    parent=registered,
-                )
-            else:
-                # Copy linked nodes
-                NodeRelation.objects.get_or_create(
-                    is_node_link=True,
-                    parent=registered,
-                    child=node_contained
-                )
-
-        registered.root = None  # Recompute root on save
-
-        registered.save()
-
         if settings.ENABLE_ARCHIVER:
-            registered.refresh_from_db()
-            project_signals.after_create_registration.send(self, dst=registered, user=auth.user)
+            # Components first, as archiving starts once the top-level registration is announced
+            for original, copy in reversed(tree.pairs):
+                copy.refresh_from_db()
+                project_signals.after_create_registration.send(original, dst=copy, user=auth.user)
 
         return registered
 
@@ -1782,19 +1701,26 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
     def get_primary(self, node):
         return NodeRelation.objects.filter(parent=self, child=node, is_node_link=False).exists()
 
-    # TODO optimize me
     def get_descendants_recursive(self, primary_only=False):
-        query = self.nodes_primary if primary_only else self._nodes
-        for node in query.all():
-            yield node
-            if not primary_only:
-                primary = self.get_primary(node)
-                if primary:
-                    for descendant in node.get_descendants_recursive(primary_only=primary_only):
+        """Depth-first walk of the component tree below this node. Unless `primary_only`
+        is set, node links are yielded as well but are not descended into.
+        """
+        parent_ids = [self.id] + list(AbstractNode.objects.get_descendants(self).values_list('id', flat=True))
+        relations = NodeRelation.objects.filter(parent_id__in=parent_ids).select_related('child').order_by('parent_id', '_order')
+        if primary_only:
+            relations = relations.filter(is_node_link=False)
+        children = {}
+        for relation in relations:
+            children.setdefault(relation.parent_id, []).append(relation)
+
+        def walk(parent_id):
+            for relation in children.get(parent_id, []):
+                yield relation.child
+                if not relation.is_node_link:
+                    for descendant in walk(relation.child_id):
                         yield descendant
-            else:
-                for descendant in node.get_descendants_recursive(primary_only=primary_only):
-                    yield descendant
+
+        return walk(self.id)
 
     @property
     def nodes_primary(self):
@@ -1817,13 +1743,13 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
                 return True
         return False
 
-    # TODO: Optimize me (e.g. use bulk create)
     def fork_node(self, auth, title=None, parent=None):
-        """Recursively fork a node.
+        """Fork a node and the components of it the user can read.
 
         :param Auth auth: Consolidated authorization
         :param str title: Optional text to prepend to forked title
-        :param Node parent: Sets parent, should only be non-null when recursing
+        :param Node parent: Sets parent, should only be non-null when forking a component
+            on its own into an existing fork
         :return: Forked node
         """
         Registration = apps.get_model('osf.Registration')
@@ -1841,126 +1767,71 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
         if original.is_deleted:
             raise NodeStateError('Cannot fork deleted node.')
 
-        # Note: Cloning a node will clone each node wiki page version and add it to
-        # `registered.wiki_pages_current` and `registered.wiki_pages_versions`.
-        forked = original.clone()
-        if isinstance(forked, Registration):
-            forked.recast('osf.node')
+        # Components the user cannot read are left out of the fork, with everything below them
+        get_permission_resolver(user).prefetch(AbstractNode.objects.get_descendants(original, active=True))
 
-        forked.is_fork = True
-        forked.forked_date = when
-        forked.forked_from = original
-        forked.creator = user
-        forked.node_license = original.license.copy() if original.license else None
-        forked.wiki_private_uuids = {}
+        def prepare(original, forked):
+            if isinstance(forked, Registration):
+                forked.recast('osf.node')
 
-        # Forks default to private status
-        forked.is_public = False
+            forked.is_fork = True
+            forked.forked_date = when
+            forked.forked_from = original
+            # Made an admin contributor by the post_save listener
+            forked.creator = user
+            forked.node_license = original.license.copy() if original.license else None
+            forked.wiki_private_uuids = {}
 
-        # Need to save here in order to access m2m fields
-        forked.save()
+            # Forks default to private status
+            forked.is_public = False
 
-        if parent:
-            node_relation = NodeRelation.objects.get(parent=parent.forked_from, child=original)
-            NodeRelation.objects.get_or_create(_order=node_relation._order, parent=parent, child=forked)
-
-        forked.tags.add(*self.all_tags.values_list('pk', flat=True))
-        for node_relation in original.node_relations.filter(child__is_deleted=False):
-            node_contained = node_relation.child
-            # Fork child nodes
-            if not node_relation.is_node_link:
-                try:  # Catch the potential PermissionsError above
-                    forked_node = node_contained.fork_node(auth=auth, title='', parent=forked)
-                except PermissionsError:
-                    pass  # If this exception is thrown omit the node from the result set
-                    forked_node = None
-                if forked_node is not None:
-                    NodeRelation.objects.get_or_create(
-                        is_node_link=False,
-                        parent=forked,
-                        child=forked_node
-                    )
-                    forked_node.root = None
-                    forked_node.save()  # Recompute root on save()
+            if original is not self or title == '':
+                forked.title = original.title
+            elif title is None:
+                forked.title = PREFIX + original.title
             else:
-                # Copy linked nodes
-                NodeRelation.objects.get_or_create(
-                    is_node_link=True,
-                    parent=forked,
-                    child=node_contained
-                )
-
-        if title is None:
-            forked.title = PREFIX + original.title
-        elif title == '':
-            forked.title = original.title
-        else:
-            forked.title = title
+                forked.title = title
+            if len(forked.title) > 200:
+                forked.title = forked.title[:200]
 
-        if len(forked.title) > 200:
-            forked.title = forked.title[:200]
+        # Fork the whole component tree at once. Wiki page versions are cloned by the
+        # wiki add-on's after_fork hook.
+        tree = SubtreeCopy(original, can_copy=lambda node: node.is_public or node.has_permission(user, 'read'))
+        tree.copy_nodes(prepare, parent=parent)
+        forked = tree.copies[original.id]
 
-        forked.add_contributor(
-            contributor=user,
-            permissions=CREATOR_PERMISSIONS,
-            log=False,
-            save=False
-        )
-
-        forked.root = None  # Recompute root on save
-
-        forked.save()
+        if parent:
+            node_relation = NodeRelation.objects.get(parent=parent.forked_from, child=original)
+            NodeRelation.objects.get_or_create(_order=node_relation._order, parent=parent, child=forked)
 
-        # Need to call this after save for the notifications to be created with the _primary_key
-        project_signals.contributor_added.send(forked, contributor=user, auth=auth, email_template='false')
+        tree.copy_tags()
+        for original_node, forked_node in tree.pairs:
+            # Need to call this after save for the notifications to be created with the _primary_key
+            project_signals.contributor_added.send(forked_node, contributor=user, auth=auth, email_template='false')
 
-        forked.add_log(
-            action=NodeLog.NODE_FORKED,
-            params={
-                'parent_node': original.parent_id,
-                'node': original._primary_key,
-                'registration': forked._primary_key,  # TODO: Remove this in favor of 'fork'
-                'fork': forked._primary_key,
-            },
-            auth=auth,
-            log_date=when,
-            save=False,
-        )
+            forked_node.add_log(
+                action=NodeLog.NODE_FORKED,
+                params={
+                    'parent_node': original_node.parent_id,
+                    'node': original_node._primary_key,
+                    'registration': forked_node._primary_key,  # TODO: Remove this in favor of 'fork'
+                    'fork': forked_node._primary_key,
+                },
+                auth=auth,
+                log_date=when,
+                save=False,
+            )
 
-        # Clone each log from the original node for this fork.
-        self.clone_logs(forked)
-        forked.refresh_from_db()
+        # Clone each log from the original nodes for their forks.
+        tree.copy_logs()
+        for forked_node in tree.copies.values():
+            forked_node.refresh_from_db()
 
         # After fork callback
-        for addon in original.get_addons():
-            addon.after_fork(original, forked, user)
+        tree.run_addon_hooks('after_fork', user)
 
         return forked
 
-    def clone_logs(self, node, page_size=100):
-        paginator = Paginator(self.logs.order_by('pk').all(), page_size)
-        for page_num in paginator.page_range:
-            page = paginator.page(page_num)
-            # Instantiate NodeLogs "manually"
-            # because BaseModel#clone() is too slow for large projects
-            logs_to_create = [
-                NodeLog(
-                    _id=bson.ObjectId(),
-                    action=log.action,
-                    date=log.date,
-                    params=log.params,
-                    should_hide=log.should_hide,
-                    foreign_user=log.foreign_user,
-                    # Set foreign keys, not their objects
-                    # to speed things up
-                    node_id=node.pk,
-                    user_id=log.user_id,
-                    original_node_id=log.original_node_id
-                )
-                for log in page
-            ]
-            NodeLog.objects.bulk_create(logs_to_create)
-
     def use_as_template(self, auth, changes=None, top_level=True, parent=None):
         """Create a new project, using an existing project as a template.
 
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""Copies of a whole component tree, for forks and registrations.
+
+Each node is still saved on its own so that its guid, root and post_save listeners
+are set up as usual. Everything hanging off the nodes (component relations, the
+closure, contributors, tags, institutions and logs) is copied for the whole tree
+with a handful of set-based statements, and add-on hooks run once per add-on for
+every node of the tree (see ``BaseNodeSettings.after_fork_many``).
+"""
+from collections import defaultdict
+
+from django.apps import apps
+from django.db import connection
+
+from osf.models.contributor import Contributor
+from osf.models.node_relation import NodeClosure, NodeRelation
+from osf.models.nodelog import NodeLog
+
+
+class SubtreeCopy(object):
+    """Copies of ``root`` and of its non-deleted components.
+
+    :param AbstractNode root: Top of the tree to copy
+    :param can_copy: Optional predicate on components; a component it rejects is left
+        out of the copy together with everything below it
+    """
+
+    def __init__(self, root, can_copy=None):
+        self.root = root
+        # Originals, parents before their children
+        self.originals = [root]
+        # Component relations between originals, and node links out of them
+        self.components = []
+        self.links = []
+        # Original id -> copy
+        self.copies = {}
+        self._plan(can_copy)
+
+    def _plan(self, can_copy):
+        AbstractNode = apps.get_model('osf.AbstractNode')
+        parent_ids = [self.root.id] + list(AbstractNode.objects.get_descendants(self.root, active=True).values_list('id', flat=True))
+        relations = NodeRelation.objects.filter(
+            parent_id__in=parent_ids, child__is_deleted=False,
+        ).select_related('child').prefetch_related('child__guids').order_by('parent_id', '_order')
+        children = defaultdict(list)
+        for relation in relations:
+            children[relation.parent_id].append(relation)
+
+        pending = [self.root.id]
+        while pending:
+            parent_id = pending.pop(0)
+            for relation in children[parent_id]:
+                if relation.is_node_link:
+                    self.links.append(relation)
+                elif can_copy is None or can_copy(relation.child):
+                    self.originals.append(relation.child)
+                    self.components.append(relation)
+                    pending.append(relation.child_id)
+
+    @property
+    def pairs(self):
+        """(original, copy) of every copied node, parents first"""
+        return [(original, self.copies[original.id]) for original in self.originals]
+
+    def copy_nodes(self, prepare, parent=None):
+        """Save a copy of every original, and connect the copies the way the originals are.
+
+        :param prepare: Called with each original and its unsaved clone to set the fields
+            particular to forks or registrations
+        :param AbstractNode parent: Copy that the copy of the root will be a component
+            of. The caller relates the two.
+        """
+        for original in self.originals:
+            copy = original.clone()
+            prepare(original, copy)
+            if original is not self.root:
+                copy.root = self.copies[self.root.id].root
+            elif parent is not None:
+                copy.root = parent.root
+            copy.save()
+            self.copies[original.id] = copy
+
+        NodeRelation.objects.bulk_create([
+            NodeRelation(
+                parent=self.copies[relation.parent_id],
+                child=self.copies[relation.child_id],
+                _order=relation._order,
+            )
+            for relation in self.components
+        ] + [
+            NodeRelation(
+                parent=self.copies[relation.parent_id],
+                child_id=relation.child_id,
+                is_node_link=True,
+                _order=relation._order,
+            )
+            for relation in self.links
+        ])
+        # bulk_create skips the NodeRelation listeners that maintain the closure. The
+        # copied tree has the same shape as the original one, so mirror its rows.
+        if len(self.originals) > 1:
+            mapping, params = self._mapping()
+            with connection.cursor() as cursor:
+                cursor.execute("""
+                    INSERT INTO {table} (ancestor_id, descendant_id, depth)
+                    SELECT A.copy_id, D.copy_id, C.depth
+                    FROM {table} AS C
+                    JOIN (VALUES {mapping}) AS A (original_id, copy_id) ON C.ancestor_id = A.original_id
+                    JOIN (VALUES {mapping}) AS D (original_id, copy_id) ON C.descendant_id = D.original_id;
+                """.format(table=NodeClosure._meta.db_table, mapping=mapping), params + params)
+
+    def _mapping(self):
+        return (
+            ', '.join(['(%s, %s)'] * len(self.copies)),
+            [node_id for original_id, copy in self.copies.items() for node_id in (original_id, copy.id)],
+        )
+
+    def _insert_select(self, model, node_field, values=None):
+        """Copy the ``model`` rows pointing at the originals through ``node_field`` to rows
+        pointing at their copies, in one INSERT ... SELECT. ``values`` maps columns to
+        the SQL expressions to insert instead of the copied value.
+        """
+        values = dict({'created': 'now()', 'modified': 'now()'}, **(values or {}))
+        node_column = model._meta.get_field(node_field).column
+        columns, selected = [], []
+        for field in model._meta.concrete_fields:
+            if field.primary_key:
+                continue
+            columns.append(connection.ops.quote_name(field.column))
+            if field.column == node_column:
+                selected.append('M.copy_id')
+            else:
+                selected.append(values.get(field.column, 'R.{}'.format(connection.ops.quote_name(field.column))))
+        mapping, params = self._mapping()
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO {table} ({columns})
+                SELECT {selected}
+                FROM {table} AS R
+                JOIN (VALUES {mapping}) AS M (original_id, copy_id) ON R.{node_column} = M.original_id
+                ORDER BY R.{pk};
+            """.format(
+                table=model._meta.db_table,
+                columns=', '.join(columns),
+                selected=', '.join(selected),
+                mapping=mapping,
+                node_column=node_column,
+                pk=model._meta.pk.column,
+            ), params)
+
+    def copy_contributors(self):
+        self._insert_select(Contributor, 'node')
+
+    def copy_tags(self):
+        """Copy all tags, including system tags"""
+        self._insert_select(self.root.tags.through, 'abstractnode')
+
+    def copy_institutions(self):
+        self._insert_select(self.root.affiliated_institutions.through, 'abstractnode')
+
+    def copy_logs(self):
+        self._insert_select(NodeLog, 'node', values={
+            # A fresh ObjectId: the current timestamp followed by 8 random bytes
+            '_id': "lpad(to_hex(extract(epoch from now())::integer), 8, '0') || substr(md5(random()::text || R.id::text), 1, 16)",
+        })
+
+    def copy_unclaimed_records(self):
+        """Give unregistered contributors of the copies the unclaimed records they have
+        on the originals, saving each user once.
+        """
+        OSFUser = apps.get_model('osf.OSFUser')
+        originals = {copy.id: original for original, copy in self.pairs}
+        copies = {copy.id: copy for copy in self.copies.values()}
+        node_ids = defaultdict(list)
+        for user_id, node_id in Contributor.objects.filter(node_id__in=copies, user__is_registered=False).values_list('user_id', 'node_id'):
+            node_ids[user_id].append(node_id)
+        for user in OSFUser.objects.filter(id__in=node_ids):
+            changed = False
+            for node_id in node_ids[user.id]:
+                record = user.unclaimed_records.get(originals[node_id]._id)
+                if record:
+                    user.unclaimed_records[copies[node_id]._id] = record
+                    changed = True
+            if changed:
+                user.save()
+
+    def addon_settings(self):
+        """(settings model, node settings) of the add-ons enabled on the originals, in
+        ``ADDONS_AVAILABLE`` order, with one query per add-on
+        """
+        originals = {original.id: original for original in self.originals}
+        for config in self.root.ADDONS_AVAILABLE:
+            model = self.root._settings_model(config.short_name, config=config)
+            if not model:
+                continue
+            addons = list(model.objects.filter(owner_id__in=originals, deleted=False))
+            for addon in addons:
+                addon.owner = originals[addon.owner_id]
+            if addons:
+                yield model, addons
+
+    def run_addon_hooks(self, hook, user):
+        """Call ``<hook>_many`` (``after_fork_many`` or ``after_register_many``) of each
+        add-on with all of its settings on the originals, and return the results.
+        """
+        results = []
+        for model, addons in self.addon_settings():
+            results.extend(getattr(model, '{}_many'.format(hook))([
+                (addon, addon.owner, self.copies[addon.owner_id]) for addon in addons
+            ], user))
+        return results
@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import connection, models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
 from .base import BaseModel, ObjectIDMixin
 
@@ -25,3 +27,82 @@ class NodeRelation(ObjectIDMixin, BaseModel):
         index_together = (
             ('is_node_link', 'child', 'parent'),
         )
+
+
+class NodeClosureQuerySet(models.QuerySet):
+
+    def link(self, parent_id, child_id):
+        """Connect every ancestor of ``parent_id`` (and the parent itself) to every
+        descendant of ``child_id`` (and the child itself) in a single statement.
+        """
+        sql = """
+            INSERT INTO {table} (ancestor_id, descendant_id, depth)
+            SELECT A.ancestor_id, D.descendant_id, A.depth + D.depth + 1
+            FROM (
+                SELECT ancestor_id, depth FROM {table} WHERE descendant_id = %(parent)s
+                UNION ALL SELECT %(parent)s, 0
+            ) AS A CROSS JOIN (
+                SELECT descendant_id, depth FROM {table} WHERE ancestor_id = %(child)s
+                UNION ALL SELECT %(child)s, 0
+            ) AS D
+            ON CONFLICT (ancestor_id, descendant_id) DO NOTHING;
+        """.format(table=self.model._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, {'parent': parent_id, 'child': child_id})
+
+    def unlink(self, parent_id, child_id):
+        """Remove every path that went through the ``parent_id`` -> ``child_id`` edge."""
+        sql = """
+            DELETE FROM {table}
+            WHERE ancestor_id IN (
+                SELECT ancestor_id FROM {table} WHERE descendant_id = %(parent)s
+                UNION SELECT %(parent)s
+            ) AND descendant_id IN (
+                SELECT descendant_id FROM {table} WHERE ancestor_id = %(child)s
+                UNION SELECT %(child)s
+            );
+        """.format(table=self.model._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, {'parent': parent_id, 'child': child_id})
+
+
+class NodeClosure(models.Model):
+    """Materialized transitive closure of the component (non node link) tree.
+
+    One row per (ancestor, descendant) pair, where ``depth`` is the number of
+    edges between them. Nodes are not linked to themselves. Rows are maintained
+    by the ``NodeRelation`` signal handlers below.
+    """
+    ancestor = models.ForeignKey('AbstractNode', related_name='_closure_descendants', on_delete=models.CASCADE)
+    descendant = models.ForeignKey('AbstractNode', related_name='_closure_ancestors', on_delete=models.CASCADE)
+    depth = models.PositiveIntegerField()
+
+    objects = NodeClosureQuerySet.as_manager()
+
+    def __unicode__(self):
+        return 'ancestor={}, descendant={}, depth={}'.format(self.ancestor_id, self.descendant_id, self.depth)
+
+    class Meta:
+        unique_together = ('ancestor', 'descendant')
+        index_together = (
+            ('descendant', 'depth'),
+        )
+
+
+##### Signal listeners #####
+# NOTE: QuerySet.update and bulk_create bypass these. Callers that write
+# NodeRelations in bulk are responsible for calling NodeClosure.objects.link
+@receiver(post_save, sender=NodeRelation)
+def update_closure_on_save(sender, instance, created, **kwargs):
+    if instance.is_node_link:
+        if not created:
+            # A component may have been converted to a node link
+            NodeClosure.objects.unlink(instance.parent_id, instance.child_id)
+    else:
+        NodeClosure.objects.link(instance.parent_id, instance.child_id)
+
+
+@receiver(post_delete, sender=NodeRelation)
+def update_closure_on_delete(sender, instance, **kwargs):
+    if not instance.is_node_link:
+        NodeClosure.objects.unlink(instance.parent_id, instance.child_id)
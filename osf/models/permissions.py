@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""Effective permissions of a user on nodes, resolved for many nodes at once and
+memoized for the rest of the current request.
+
+Permissions are inherited from admin contributorships on ancestors (see
+``AbstractNode.is_admin_parent``) and granted by private links. Memoized results are
+dropped whenever a contributor, node, component relation or private link is saved
+during the request (see the signal listeners below).
+"""
+from django.apps import apps
+from django.db import models
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from osf.models.contributor import Contributor
+from osf.models.node_relation import NodeRelation
+from osf.models.private_link import PrivateLink
+from osf.utils.requests import DummyRequest, get_current_request
+from website.util.permissions import ADMIN, READ, WRITE
+
+
+class NodePermissions(object):
+
+    __slots__ = ('read', 'write', 'admin', 'admin_parent')
+
+    def __init__(self, read=False, write=False, admin=False, admin_parent=False):
+        self.read = read
+        self.write = write
+        self.admin = admin
+        # Admin on the node or on any of its ancestors
+        self.admin_parent = admin_parent
+
+    def as_list(self):
+        return [perm for perm in (READ, WRITE, ADMIN) if getattr(self, perm)]
+
+
+class PermissionResolver(object):
+    """Permissions of one user, loaded with a single query per batch of nodes."""
+
+    def __init__(self, user):
+        self.user_id = user.id if user else None
+        # Node id -> NodePermissions
+        self._nodes = {}
+        # Private link key -> (whether it is anonymous, ids of the nodes it grants access to)
+        self._private_links = {}
+
+    def prefetch(self, nodes):
+        node_ids = set(node.id for node in nodes) - set(self._nodes)
+        if not node_ids:
+            return
+        if self.user_id is None:
+            for node_id in node_ids:
+                self._nodes[node_id] = NodePermissions()
+            return
+
+        AbstractNode = apps.get_model('osf.AbstractNode')
+        contributor = Contributor.objects.filter(node=models.OuterRef('pk'), user_id=self.user_id)
+        permissions = AbstractNode.objects.filter(id__in=node_ids).annotate(
+            _read=models.Exists(contributor.filter(read=True)),
+            _write=models.Exists(contributor.filter(write=True)),
+            _admin=models.Exists(contributor.filter(admin=True)),
+            _admin_ancestor=models.Exists(Contributor.objects.filter(
+                user_id=self.user_id,
+                admin=True,
+                node___closure_descendants__descendant=models.OuterRef('pk'),
+            )),
+        ).values_list('id', '_read', '_write', '_admin', '_admin_ancestor')
+        for node_id, read, write, admin, admin_ancestor in permissions:
+            self._nodes[node_id] = NodePermissions(read, write, admin, admin or admin_ancestor)
+
+    def get(self, node):
+        if node.id not in self._nodes:
+            self.prefetch([node])
+        return self._nodes.get(node.id) or NodePermissions()
+
+    def has_permission(self, node, permission, check_parent=True):
+        permissions = self.get(node)
+        if getattr(permissions, permission):
+            return True
+        return permission == READ and check_parent and permissions.admin_parent
+
+    def is_admin_parent(self, node):
+        return self.get(node).admin_parent
+
+    def private_link(self, key):
+        """Whether the active private link ``key`` is anonymous, and the ids of its nodes"""
+        if key not in self._private_links:
+            anonymous, node_ids = False, set()
+            for anonymous, node_id in PrivateLink.objects.filter(key=key, is_deleted=False).values_list('anonymous', 'nodes'):
+                node_ids.add(node_id)
+            self._private_links[key] = (anonymous, node_ids)
+        return self._private_links[key]
+
+
+def get_permission_resolver(user):
+    """The resolver of ``user`` for the current request. Outside of a request every call
+    returns a new resolver, as nothing would tell a memoized one when to forget.
+    """
+    request = get_current_request()
+    if isinstance(request, DummyRequest):
+        return PermissionResolver(user)
+    resolvers = getattr(request, '_permission_resolvers', None)
+    if resolvers is None:
+        resolvers = request._permission_resolvers = {}
+    key = user.id if user else None
+    if key not in resolvers:
+        resolvers[key] = PermissionResolver(user)
+    return resolvers[key]
+
+
+def clear_permission_resolvers():
+    request = get_current_request()
+    if not isinstance(request, DummyRequest):
+        request._permission_resolvers = {}
+
+
+##### Signal listeners #####
+@receiver(post_save, sender=Contributor)
+@receiver(post_delete, sender=Contributor)
+@receiver(post_save, sender=NodeRelation)
+@receiver(post_delete, sender=NodeRelation)
+@receiver(post_save, sender=PrivateLink)
+@receiver(m2m_changed, sender=PrivateLink.nodes.through)
+def clear_permissions_on_change(sender, instance, **kwargs):
+    clear_permission_resolvers()
+
+
+@receiver(post_save)
+def clear_permissions_on_node_save(sender, instance, **kwargs):
+    # Merged users, changed parents and deleted nodes
+    if isinstance(instance, apps.get_model('osf.AbstractNode')):
+        clear_permission_resolvers()
@@ -0,0 +1,143 @@
+import datetime
+import logging
+
+from django.db import connection, models, transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from osf.utils.fields import NonNaiveDateTimeField
+from website import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueuedSearchUpdateQuerySet(models.QuerySet):
+
+    def enqueue(self, doc_type, object_ids):
+        """Queue a search update for each of `object_ids`. Objects that are already
+        queued are coalesced into a single entry and have their debounce window reset.
+
+        :param str doc_type: One of QueuedSearchUpdate.DOC_TYPES
+        :param object_ids: Primary keys, or a values_list queryset of primary keys
+        """
+        if isinstance(object_ids, models.QuerySet):
+            select, params = object_ids.query.sql_with_params()
+        else:
+            object_ids = list(object_ids)
+            if not object_ids:
+                return
+            select, params = 'SELECT unnest(%s)', (object_ids, )
+        sql = """
+            INSERT INTO {table} (doc_type, object_id, first_queued, last_queued, attempts)
+            SELECT %s, ids.id, now(), now(), 0
+            FROM ({select}) AS ids (id)
+            ON CONFLICT (doc_type, object_id) DO UPDATE SET last_queued = EXCLUDED.last_queued;
+        """.format(table=self.model._meta.db_table, select=select)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, (doc_type, ) + tuple(params))
+
+    def ready(self, now=None):
+        """Entries whose debounce window has passed, or that have been waiting longer
+        than SEARCH_UPDATE_MAX_WAIT because they keep being re-queued.
+        """
+        now = now or timezone.now()
+        return self.filter(
+            models.Q(last_queued__lte=now - datetime.timedelta(seconds=settings.SEARCH_UPDATE_DEBOUNCE)) |
+            models.Q(first_queued__lte=now - datetime.timedelta(seconds=settings.SEARCH_UPDATE_MAX_WAIT))
+        )
+
+    def stats(self):
+        """Queue depth and lag, in seconds, of the oldest entry."""
+        oldest = self.aggregate(oldest=Min('first_queued'))['oldest']
+        return {
+            'depth': self.count(),
+            'lag': (timezone.now() - oldest).total_seconds() if oldest else 0,
+        }
+
+    def drain(self, handler, batch_size=None):
+        """Pass ready entries to `handler` one batch at a time, as a dict of doc type to
+        a list of object ids. Each batch is claimed by deleting it in a short transaction
+        that skips rows locked by a concurrent drain, and `handler` is called outside of
+        it. If `handler` fails, the batch is queued again, unless it has already failed
+        SEARCH_UPDATE_MAX_ATTEMPTS times, and the error is raised.
+
+        :return int: Number of entries processed
+        """
+        batch_size = batch_size or settings.SEARCH_UPDATE_BATCH_SIZE
+        processed = 0
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    self.ready().order_by('first_queued')
+                    .select_for_update(skip_locked=True)
+                    .values_list('id', 'doc_type', 'object_id', 'attempts')[:batch_size]
+                )
+                if not batch:
+                    return processed
+                self.filter(id__in=[pk for pk, _, _, _ in batch]).delete()
+            by_type = {}
+            for _, doc_type, object_id, _ in batch:
+                by_type.setdefault(doc_type, []).append(object_id)
+            try:
+                handler(by_type)
+            except Exception:
+                self.requeue_failed(batch)
+                raise
+            processed += len(batch)
+
+    def requeue_failed(self, batch):
+        """Queue the entries of a failed `batch` of (id, doc_type, object_id, attempts)
+        again, at the end of the queue. Entries that have failed SEARCH_UPDATE_MAX_ATTEMPTS
+        times are dropped and logged instead.
+        """
+        retry, dropped = [], []
+        for _, doc_type, object_id, attempts in batch:
+            (retry if attempts + 1 < settings.SEARCH_UPDATE_MAX_ATTEMPTS else dropped).append((doc_type, object_id, attempts + 1))
+        if dropped:
+            logger.error('Dropped search updates that failed {} times: {}'.format(
+                settings.SEARCH_UPDATE_MAX_ATTEMPTS,
+                ', '.join('{} {}'.format(doc_type, object_id) for doc_type, object_id, _ in dropped)
+            ))
+        if not retry:
+            return
+        sql = """
+            INSERT INTO {table} (doc_type, object_id, first_queued, last_queued, attempts)
+            SELECT entries.doc_type, entries.object_id, now(), now(), entries.attempts
+            FROM unnest(%s::varchar[], %s::integer[], %s::integer[]) AS entries (doc_type, object_id, attempts)
+            ON CONFLICT (doc_type, object_id) DO UPDATE SET
+                attempts = GREATEST({table}.attempts, EXCLUDED.attempts);
+        """.format(table=self.model._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [list(column) for column in zip(*retry)])
+
+
+class QueuedSearchUpdate(models.Model):
+    """A pending elasticsearch update for a node or user.
+
+    Saves enqueue a row here instead of a celery task when SEARCH_UPDATE_DEBOUNCE
+    is set, so a burst of edits to one object results in a single reindex.
+    """
+    NODE = 'node'
+    # Nodes whose contributors changed, reindexed without their files
+    CONTRIBUTORS = 'contrib'
+    USER = 'user'
+    DOC_TYPES = (
+        (NODE, NODE),
+        (CONTRIBUTORS, CONTRIBUTORS),
+        (USER, USER),
+    )
+
+    doc_type = models.CharField(max_length=10, choices=DOC_TYPES)
+    object_id = models.PositiveIntegerField()
+    first_queued = NonNaiveDateTimeField(db_index=True)
+    last_queued = NonNaiveDateTimeField(db_index=True)
+    # Number of times a batch with this entry failed to be processed
+    attempts = models.PositiveIntegerField(default=0)
+
+    objects = QueuedSearchUpdateQuerySet.as_manager()
+
+    def __repr__(self):
+        return '<QueuedSearchUpdate {} {} queued at {}>'.format(self.doc_type, self.object_id, self.first_queued)
+
+    class Meta:
+        unique_together = ('doc_type', 'object_id')
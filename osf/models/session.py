@@ -1,3 +1,7 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from framework.sessions.store import store
 from osf.models.base import BaseModel, ObjectIDMixin
 from osf.utils.datetime_aware_jsonfield import DateTimeAwareJSONField
 
@@ -12,3 +16,10 @@ class Session(ObjectIDMixin, BaseModel):
     @property
     def is_external_first_login(self):
         return 'auth_user_external_first_login' in self.data
+
+
+##### Signal listeners #####
+@receiver(post_save, sender=Session)
+@receiver(post_delete, sender=Session)
+def invalidate_cached_session(sender, instance, **kwargs):
+    store.invalidate_session(instance._id)
@@ -31,6 +31,7 @@ from framework.auth.exceptions import (ChangePasswordError, ExpiredTokenError,
                                        MergeConfirmedRequiredError,
                                        MergeConflictError)
 from framework.exceptions import PermissionsError
+from framework.sessions.store import store as session_store
 from framework.sessions.utils import remove_sessions_for_user
 from osf.utils.requests import get_current_request
 from osf.exceptions import reraise_django_validation_errors, MaxRetriesError
@@ -772,6 +773,7 @@ class OSFUser(DirtyFieldsMixin, GuidMixin, BaseModel, AbstractBaseUser, Permissi
         # Call to `unsubscribe` above saves, and can lead to stale data
         self.reload()
         self.is_disabled = True
+        session_store.invalidate_user(self._id)
 
         # we must call both methods to ensure the current session is cleared and all existing
         # sessions are revoked.
@@ -797,8 +799,23 @@ class OSFUser(DirtyFieldsMixin, GuidMixin, BaseModel, AbstractBaseUser, Permissi
             not self.is_disabled
         )
 
+    def _refresh_unchanged_fields(self):
+        """Reload the fields of a user served by the session store that have not been
+        changed since, so that saving it doesn't write back stale values over newer
+        writes by other processes.
+        """
+        self._from_session_cache = False
+        session_store.invalidate_user(self._id)
+        dirty_fields = self.get_dirty_fields(check_relationship=True)
+        self.refresh_from_db(fields=[
+            field.name for field in self._meta.concrete_fields
+            if not field.primary_key and field.name not in dirty_fields and field.attname not in dirty_fields
+        ])
+
     # Overrides BaseModel
     def save(self, *args, **kwargs):
+        if getattr(self, '_from_session_cache', False) and self.pk:
+            self._refresh_unchanged_fields()
         self.update_is_active()
         self.username = self.username.lower().strip() if self.username else None
         dirty_fields = set(self.get_dirty_fields(check_relationship=True))
@@ -1493,3 +1510,9 @@ def create_quickfiles_project(sender, instance, created, **kwargs):
 
     if created:
         QuickFilesNode.objects.create_for_user(instance)
+
+
+@receiver(post_save, sender=OSFUser)
+def invalidate_cached_user(sender, instance, created, **kwargs):
+    if not created:
+        session_store.invalidate_user(instance._id)
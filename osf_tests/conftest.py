@@ -3,8 +3,10 @@ import logging
 import pytest
 from faker import Factory
 
+from framework.auth import cas
 from framework.django.handlers import handlers as django_handlers
 from framework.flask import rm_handlers
+from framework.sessions.store import store as session_store
 from website import settings
 from website.app import init_app
 from website.project.signals import contributor_added
@@ -74,6 +76,12 @@ def patched_settings():
     settings.ENABLE_EMAIL_SUBSCRIPTIONS = False
     settings.BCRYPT_LOG_ROUNDS = 1
 
+@pytest.fixture(autouse=True)
+def clear_auth_caches():
+    """Cached sessions, users and tokens don't survive the previous test"""
+    session_store.clear()
+    cas.token_cache.clear()
+
 @pytest.fixture()
 def fake():
     return Factory.create()
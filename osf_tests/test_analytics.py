@@ -14,7 +14,7 @@ from datetime import datetime
 
 from framework import analytics, sessions
 from framework.sessions import session
-from osf.models import PageCounter, Session
+from osf.models import DailyPageCounter, PageCounter, PageCounterEvent, Session
 
 from tests.base import OsfTestCase
 from osf_tests.factories import UserFactory, ProjectFactory
@@ -165,6 +165,53 @@ class TestUpdateCounters(UpdateCountersTestCase):
         count = analytics.get_basic_counters(page)
         assert_equal(count, (3, 5))
 
+    def test_rollup(self):
+        @analytics.update_counters('download:{target_id}:{fid}', node_info=self.node_info)
+        def download_file_(**kwargs):
+            return kwargs.get('node') or kwargs.get('project')
+
+        page = 'download:{0}:{1}'.format(self.node._id, self.fid)
+        download_file_(node=self.node, fid=self.fid)
+        download_file_(node=self.node, fid=self.fid)
+        # Contributor downloads only count towards the daily counter
+        session.data['auth_user_id'] = self.userid
+        download_file_(node=self.node, fid=self.fid)
+
+        # Every hit is recorded as it happens
+        assert_equal(PageCounterEvent.objects.filter(page=page).count(), 3)
+        assert_equal(analytics.get_basic_counters(page), (1, 2))
+
+        PageCounterEvent.objects.rollup()
+
+        assert_false(PageCounterEvent.objects.exists())
+        counter = PageCounter.objects.get(_id=page)
+        assert_equal((counter.unique, counter.total), (1, 2))
+        daily = DailyPageCounter.objects.get(page=page, date=timezone.now().date())
+        assert_equal((daily.unique, daily.total), (1, 3))
+        assert_equal(analytics.get_basic_counters(page), (1, 2))
+
+    def test_rollup_adds_to_existing_counters(self):
+        page = 'node:' + str(self.node._id)
+        PageCounter.objects.create(_id=page, total=5, unique=3)
+        PageCounterEvent.objects.create(page=page, date=timezone.now().date(), total=2, unique=1, date_total=2, date_unique=1)
+
+        assert_equal(analytics.get_basic_counters(page), (4, 7))
+        PageCounterEvent.objects.rollup()
+        assert_equal(analytics.get_basic_counters(page), (4, 7))
+
+    def test_get_basic_counters_by_prefix(self):
+        prefix = 'download:{0}:{1}:'.format(self.node._id, self.fid)
+        PageCounter.objects.create(_id=prefix + '0', total=5, unique=3)
+        PageCounter.objects.create(_id='download:{0}:other:0'.format(self.node._id), total=5, unique=3)
+        PageCounterEvent.objects.create(page=prefix + '0', date=timezone.now().date(), total=2, unique=1, date_total=2, date_unique=1)
+        PageCounterEvent.objects.create(page=prefix + '1', date=timezone.now().date(), total=1, unique=1, date_total=1, date_unique=1)
+        analytics.record_hit(prefix + '1', timezone.now().date(), total=1, unique=0, date_total=1, date_unique=0)
+
+        counts = PageCounter.get_basic_counters_by_prefix(prefix)
+        assert_equal(counts, {prefix + '0': (4, 7), prefix + '1': (1, 2)})
+        for page, count in counts.items():
+            assert_equal(analytics.get_basic_counters(page), count)
+
     @unittest.skip('Reverted the fix for #2281. Unskip this once we use GUIDs for keys in the download counts collection')
     def test_update_counters_different_files(self):
         # Regression test for https://github.com/CenterForOpenScience/osf.io/issues/2281
@@ -979,6 +979,30 @@ class TestArchiverUtils(ArchiverTestCase):
             archiver_utils.get_file_map(node)
             assert_equal(mock_get_file_tree.call_count, call_count)
 
+    def test_clear_file_map_cache(self):
+        node = factories.NodeFactory()
+        factories.NodeFactory(parent=node)
+
+        with mock.patch.object(BaseStorageAddon, '_get_file_tree') as mock_get_file_tree:
+            mock_get_file_tree.return_value = file_tree_factory(1, 1, 1)
+
+            list(archiver_utils.get_file_map(node))
+            call_count = mock_get_file_tree.call_count
+            archiver_utils.clear_file_map_cache(node)
+            list(archiver_utils.get_file_map(node))
+            assert_equal(mock_get_file_tree.call_count, call_count * 2)
+
+    def test_get_file_index(self):
+        file_tree = file_tree_factory(2, 2, 2)
+        node = factories.NodeFactory(creator=self.user)
+
+        with test_utils.mock_archive(node, autocomplete=True, autoapprove=True) as registration:
+            with mock.patch.object(BaseStorageAddon, '_get_file_tree', mock.Mock(return_value=file_tree)):
+                index = archiver_utils.get_file_index(registration)
+
+        for sha256, value in archiver_utils._do_get_file_map(file_tree):
+            assert_equal(index[(sha256, value['name'], node._id)], (value, registration._id))
+
 
 class TestArchiverListeners(ArchiverTestCase):
 
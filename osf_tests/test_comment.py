@@ -1,7 +1,10 @@
+import mock
 import pytest
 from collections import OrderedDict
 
 from django.core.exceptions import ValidationError
+from django.db import connection
+from django.utils import timezone
 
 from addons.box.models import BoxFile
 from addons.dropbox.models import DropboxFile
@@ -12,11 +15,12 @@ from addons.s3.models import S3File
 from website import settings
 from website.util import permissions
 from addons.osfstorage import settings as osfstorage_settings
+from addons.wiki.tests.factories import NodeWikiFactory
 from website.project.views.comment import update_file_guid_referent
 from website.project.signals import comment_added, mention_added, contributor_added
 from framework.exceptions import PermissionsError
 from tests.base import capture_signals
-from osf.models import Comment, NodeLog, Guid, BaseFileNode
+from osf.models import Comment, NodeLog, Guid, BaseFileNode, UnreadCommentCount
 from framework.auth.core import Auth
 from .factories import (
     CommentFactory,
@@ -384,6 +388,80 @@ class TestCommentModel:
         n_unread = Comment.find_n_unread(user=user, node=project, page='node')
         assert n_unread == 0
 
+    def test_find_unread_counts_are_maintained(self, django_assert_num_queries):
+        project = ProjectFactory()
+        user = UserFactory()
+        project.add_contributor(user, save=True)
+        CommentFactory(node=project, user=project.creator)
+        assert Comment.find_n_unread(user=user, node=project, page='node') == 1
+        counter = UnreadCommentCount.objects.get(user=user, root_target=Guid.load(project._id))
+        assert counter.count == 1
+
+        # New comments increment the count instead of invalidating it
+        CommentFactory(node=project, user=project.creator)
+        CommentFactory(node=project, user=user)
+        counter.refresh_from_db()
+        assert counter.count == 2
+        assert Comment.find_n_unread(user=user, node=project, page='node') == 2
+
+        # Viewing the comments resets it
+        user.comments_viewed_timestamp[project._id] = timezone.now()
+        user.save()
+        UnreadCommentCount.reset(user, project._id, user.comments_viewed_timestamp[project._id])
+        with django_assert_num_queries(3):
+            assert Comment.find_n_unread(user=user, node=project, page='node') == 0
+
+    def test_find_unread_recounts_after_edits(self):
+        project = ProjectFactory()
+        user = UserFactory()
+        project.add_contributor(user, save=True)
+        comment = CommentFactory(node=project, user=project.creator)
+        assert Comment.find_n_unread(user=user, node=project, page='node') == 1
+        comment.is_deleted = True
+        comment.save()
+        assert Comment.find_n_unread(user=user, node=project, page='node') == 0
+
+    def test_find_unread_many(self):
+        project = ProjectFactory()
+        user = UserFactory()
+        project.add_contributor(user, save=True)
+        wiki = NodeWikiFactory(node=project)
+        wiki_target = Guid.load(wiki._id)
+        CommentFactory(node=project, user=project.creator)
+        CommentFactory(node=project, user=project.creator, target=wiki_target)
+        CommentFactory(node=project, user=project.creator, target=wiki_target)
+        assert Comment.find_n_unread_many(user, project, [project._id, wiki._id]) == {project._id: 1, wiki._id: 2}
+        assert Comment.find_n_unread_many(UserFactory(), project, [project._id]) == {project._id: 0}
+
+    def test_counts_are_not_stored_if_comments_change_while_counting(self):
+        project = ProjectFactory()
+        user = UserFactory()
+        project.add_contributor(user, save=True)
+        CommentFactory(node=project, user=project.creator)
+
+        def cursor():
+            # A comment is added after counting, before the count is stored
+            CommentFactory(node=project, user=project.creator)
+            return connection.cursor()
+
+        with mock.patch('osf.models.comment.connection') as mock_connection:
+            mock_connection.cursor.side_effect = cursor
+            assert Comment.find_n_unread(user=user, node=project, page='node') == 1
+        assert not UnreadCommentCount.objects.filter(user=user).exists()
+        assert Comment.find_n_unread(user=user, node=project, page='node') == 2
+
+    def test_find_unread_many_unknown_root(self):
+        project = ProjectFactory()
+        user = UserFactory()
+        project.add_contributor(user, save=True)
+        assert Comment.find_n_unread_many(user, project, [project._id, 'notaguid']) == {project._id: 0, 'notaguid': 0}
+
+    def test_find_unread_unknown_root(self):
+        project = ProjectFactory()
+        user = UserFactory()
+        project.add_contributor(user, save=True)
+        assert Comment.find_n_unread(user=user, node=project, page=Comment.FILES, root_id='notaguid') == 0
+
 
 # copied from tests/test_comments.py
 class FileCommentMoveRenameTestMixin(object):
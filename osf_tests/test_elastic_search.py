@@ -1001,3 +1001,52 @@ class TestSearchFiles(OsfTestCase):
 
         find = query_file('GreenLight.mp3')['results']
         assert_equal(len(find), 0)
+
+
+class TestBulkIndexing(OsfTestCase):
+
+    def setUp(self):
+        super(TestBulkIndexing, self).setUp()
+        self.node = factories.ProjectFactory(is_public=True, title='Soul Man')
+        self.node.add_tag('stax', auth=Auth(self.node.creator))
+        self.root = self.node.get_addon('osfstorage').get_root()
+        self.files = [self.root.append_file('Track{}.wav'.format(i)) for i in range(3)]
+        self.actions = []
+
+    def fake_streaming_bulk(self, client, actions, **kwargs):
+        self.bulk_kwargs = kwargs
+        for action in actions:
+            self.actions.append(action)
+            yield True, {action['_op_type']: {'_id': action['_id'], 'status': 200}}
+
+    def test_node_and_files_are_sent_in_one_bulk_request(self):
+        with mock.patch.object(elastic_search.helpers, 'streaming_bulk', side_effect=self.fake_streaming_bulk) as mock_bulk:
+            elastic_search.bulk_index_nodes([self.node])
+        assert_equal(mock_bulk.call_count, 1)
+        assert_true(self.bulk_kwargs['refresh'])
+        assert_equal(self.bulk_kwargs['chunk_size'], settings.ELASTIC_BULK_CHUNK_SIZE)
+
+        file_ids = {action['_id'] for action in self.actions if action['_type'] == 'file'}
+        assert_equal(file_ids, {file_._id for file_ in self.files})
+        node_action = next(action for action in self.actions if action['_id'] == self.node._id)
+        assert_equal(node_action['_op_type'], 'index')
+        assert_equal(node_action['_source']['tags'], ['stax'])
+        assert_equal(node_action['_source']['contributors'][0]['fullname'], self.node.creator.fullname)
+
+    def test_private_node_and_files_are_deleted(self):
+        self.node.is_public = False
+        self.node.save()
+        with mock.patch.object(elastic_search.helpers, 'streaming_bulk', side_effect=self.fake_streaming_bulk):
+            elastic_search.bulk_index_nodes([self.node])
+        assert_equal(len(self.actions), 4)
+        assert_true(all(action['_op_type'] == 'delete' for action in self.actions))
+
+    def test_prefetched_data_matches_single_node_serialization(self):
+        other = factories.ProjectFactory(is_public=True)
+        prefetched = elastic_search.prefetch_node_data([self.node, other])
+        for node in (self.node, other):
+            category = elastic_search.get_doctype_from_node(node)
+            assert_equal(
+                elastic_search.serialize_node(node, category, prefetched[node.id]),
+                elastic_search.serialize_node(node, category)
+            )
@@ -1,3 +1,4 @@
+import gzip
 import os
 
 import pytest
@@ -13,21 +14,38 @@ from osf_tests.factories import (AuthUserFactory, ProjectFactory, RegistrationFa
 from website import settings
 
 
-def get_all_sitemap_urls():
-    # Create temporary directory for the sitemaps to be generated
+# Note: namespace was defined in the XML file, therefore necessary to include in tag
+NAMESPACE = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
 
-    generate_sitemap.main()
 
-    # Parse the generated XML sitemap file
-    with open(os.path.join(settings.STATIC_FOLDER, 'sitemaps/sitemap_0.xml')) as f:
-        tree = xml.etree.ElementTree.parse(f)
+def get_sitemap_files():
+    """Parse the shards listed in the generated sitemap index"""
+    sitemap_dir = os.path.join(settings.STATIC_FOLDER, 'sitemaps')
+    with open(os.path.join(sitemap_dir, 'sitemap_index.xml')) as f:
+        index = xml.etree.ElementTree.parse(f)
+    files = {}
+    for element in index.iter(NAMESPACE + 'loc'):
+        name = element.text.rsplit('/', 1)[1]
+        with open(os.path.join(sitemap_dir, name)) as f:
+            files[name] = xml.etree.ElementTree.parse(f)
+        with gzip.open(os.path.join(sitemap_dir, name + '.gz')) as f:
+            assert xml.etree.ElementTree.tostring(xml.etree.ElementTree.parse(f).getroot()) == \
+                xml.etree.ElementTree.tostring(files[name].getroot())
+    return files
 
-    shutil.rmtree(settings.STATIC_FOLDER)
+
+def get_all_sitemap_urls(incremental=False):
+    # Workers in other processes would not see the data of the test transaction
+    with mock.patch('website.settings.SITEMAP_PROCESSES', 1):
+        generate_sitemap.main(incremental=incremental)
 
     # Get all the urls in the sitemap
-    # Note: namespace was defined in the XML file, therefore necessary to include in tag
-    namespace = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
-    urls = [element.text for element in tree.iter(namespace + 'loc')]
+    urls = [
+        element.text for tree in get_sitemap_files().values()
+        for element in tree.iter(NAMESPACE + 'loc')
+    ]
+
+    shutil.rmtree(settings.STATIC_FOLDER)
 
     return urls
 
@@ -166,3 +184,29 @@ class TestGenerateSitemap:
             urls = get_all_sitemap_urls()
 
         assert urlparse.urljoin(settings.DOMAIN, project_deleted.url) not in urls
+
+    def test_incremental_picks_up_changes(self, project_private, create_tmp_directory):
+
+        with mock.patch('website.settings.STATIC_FOLDER', create_tmp_directory), \
+                mock.patch('website.settings.SITEMAP_PROCESSES', 1):
+            generate_sitemap.main()
+            project_private.is_public = True
+            project_private.save()
+            urls = get_all_sitemap_urls(incremental=True)
+
+        assert urlparse.urljoin(settings.DOMAIN, project_private.url) in urls
+
+    def test_incremental_keeps_unchanged_shards(self, user_admin_project_public, create_tmp_directory):
+
+        with mock.patch('website.settings.STATIC_FOLDER', create_tmp_directory), \
+                mock.patch('website.settings.SITEMAP_PROCESSES', 1):
+            generate_sitemap.main()
+            user_shard = os.path.join(
+                create_tmp_directory, 'sitemaps',
+                'sitemap_user_{}.xml'.format(user_admin_project_public.id // settings.SITEMAP_URL_MAX)
+            )
+            os.utime(user_shard, (0, 0))
+            generate_sitemap.main(incremental=True)
+            assert os.path.getmtime(user_shard) == 0
+            generate_sitemap.main()
+            assert os.path.getmtime(user_shard) != 0
@@ -25,6 +25,7 @@ from osf.models import (
     Contributor,
     MetaSchema,
     Sanction,
+    NodeClosure,
     NodeRelation,
     Registration,
     DraftRegistration,
@@ -515,6 +516,60 @@ class TestRoot:
                 assert p.parent_node._id in parent_list
 
 
+class TestNodeClosure:
+
+    def test_closure_rows_created_for_component_tree(self, project):
+        child = NodeFactory(parent=project)
+        grandchild = NodeFactory(parent=child)
+
+        assert NodeClosure.objects.get(ancestor=project, descendant=child).depth == 1
+        assert NodeClosure.objects.get(ancestor=child, descendant=grandchild).depth == 1
+        assert NodeClosure.objects.get(ancestor=project, descendant=grandchild).depth == 2
+        assert not NodeClosure.objects.filter(descendant=project).exists()
+
+    def test_node_links_are_not_in_closure(self, project, auth):
+        linked = ProjectFactory()
+        project.add_node_link(linked, auth=auth, save=True)
+
+        assert not NodeClosure.objects.filter(descendant=linked).exists()
+        assert linked not in AbstractNode.objects.get_descendants(project)
+
+    def test_get_ancestors_nearest_first(self, project):
+        child = NodeFactory(parent=project)
+        grandchild = NodeFactory(parent=child)
+
+        assert list(AbstractNode.objects.get_ancestors(grandchild)) == [child, project]
+        assert grandchild.parents == [child, project]
+        assert grandchild.get_root() == project
+
+    def test_is_descendant(self, project):
+        child = NodeFactory(parent=project)
+        grandchild = NodeFactory(parent=child)
+
+        assert AbstractNode.objects.is_descendant(grandchild, project)
+        assert AbstractNode.objects.is_descendant(grandchild, child)
+        assert not AbstractNode.objects.is_descendant(project, grandchild)
+        assert not AbstractNode.objects.is_descendant(grandchild, ProjectFactory())
+
+    def test_deleting_relation_removes_subtree_paths(self, project):
+        child = NodeFactory(parent=project)
+        grandchild = NodeFactory(parent=child)
+
+        NodeRelation.objects.get(parent=project, child=child).delete()
+
+        assert not NodeClosure.objects.filter(ancestor=project).exists()
+        assert NodeClosure.objects.filter(ancestor=child, descendant=grandchild).exists()
+
+    def test_can_view_implicit_admin_uses_closure(self, project, user):
+        child = NodeFactory(parent=project, creator=UserFactory())
+        grandchild = NodeFactory(parent=child, creator=child.creator)
+
+        viewable = AbstractNode.objects.can_view(user)
+        assert child in viewable
+        assert grandchild in viewable
+        assert grandchild not in AbstractNode.objects.can_view(UserFactory())
+
+
 class TestNodeMODMCompat:
 
     def test_basic_querying(self):
@@ -1693,6 +1748,44 @@ class TestRegisterNode:
             assert r.registered_meta[meta_schema._id] == data
             assert r.registered_schema.first() == meta_schema
 
+    @mock.patch('website.project.signals.after_create_registration')
+    def test_register_node_copies_component_tree(self, mock_signal, user, auth):
+        root = ProjectFactory(creator=user)
+        child = NodeFactory(creator=user, parent=root)
+        grandchild = NodeFactory(creator=user, parent=child)
+        contrib = UserFactory()
+        child.add_contributor(contrib, permissions=[READ, WRITE], visible=False, auth=auth, save=True)
+        institution = InstitutionFactory()
+        grandchild.affiliated_institutions.add(institution)
+        grandchild.add_tag('tree', auth=auth)
+
+        reg = root.register_node(get_default_metaschema(), auth, '', None)
+        reg_child = reg.nodes[0]
+        reg_grandchild = reg_child.nodes[0]
+
+        assert set(AbstractNode.objects.get_descendants(reg)) == {reg_child, reg_grandchild}
+        assert list(AbstractNode.objects.get_ancestors(reg_grandchild)) == [reg_child, reg]
+        assert reg_grandchild.root == reg
+        assert list(reg_child.contributors.all()) == [user, contrib]
+        copied = reg_child.contributor_set.get(user=contrib)
+        assert (copied.read, copied.write, copied.admin, copied.visible) == (True, True, False, False)
+        assert list(reg_grandchild.affiliated_institutions.all()) == [institution]
+        assert list(reg_grandchild.tags.values_list('name', flat=True)) == ['tree']
+        for original, copy in [(root, reg), (child, reg_child), (grandchild, reg_grandchild)]:
+            assert sorted(copy.logs.values_list('action', flat=True)) == sorted(original.logs.values_list('action', flat=True))
+            assert not set(copy.logs.values_list('_id', flat=True)) & set(original.logs.values_list('_id', flat=True))
+        # Components are announced before the registrations they belong to
+        assert [call[1]['dst'] for call in mock_signal.send.call_args_list] == [reg_grandchild, reg_child, reg]
+
+    def test_register_node_requires_permission_on_components(self, user, auth):
+        root = ProjectFactory(creator=user)
+        NodeFactory(parent=root, creator=UserFactory())
+        writer = UserFactory()
+        root.add_contributor(writer, permissions=[READ, WRITE], auth=auth, save=True)
+        with pytest.raises(PermissionsError):
+            root.register_node(get_default_metaschema(), Auth(writer), '', None)
+        assert not Registration.objects.filter(registered_from=root).exists()
+
 
 # Copied from tests/test_models.py
 class TestAddUnregisteredContributor:
@@ -2858,6 +2951,34 @@ class TestForkNode:
         assert registration_wiki_version.node == fork
         assert registration_wiki_version._id != wiki._id
 
+    def test_fork_copies_component_tree(self, user, auth):
+        project = ProjectFactory(creator=user)
+        child = NodeFactory(creator=user, parent=project)
+        grandchild = NodeFactory(creator=user, parent=child)
+        pointee = ProjectFactory()
+        child.add_pointer(pointee, auth=auth)
+        with mock.patch('osf.models.AbstractNode.update_search'):
+            wiki = NodeWikiFactory(node=grandchild)
+            current_wiki = NodeWikiFactory(node=grandchild, version=2)
+
+        fork = project.fork_node(auth)
+        fork_child = fork.nodes[0]
+        fork_grandchild = fork_child.nodes[0]
+
+        assert set(AbstractNode.objects.get_descendants(fork)) == {fork_child, fork_grandchild}
+        assert fork_grandchild.root == fork
+        assert list(fork_child.linked_nodes.all()) == [pointee]
+        assert list(fork_grandchild.contributors.all()) == [user]
+        assert fork_grandchild.logs.latest().action == NodeLog.NODE_FORKED
+        assert fork_grandchild.logs.count() == grandchild.logs.count() + 1
+
+        versions = fork_grandchild.wiki_pages_versions[wiki.page_name]
+        assert len(versions) == 2
+        assert fork_grandchild.wiki_pages_current[wiki.page_name] == versions[1]
+        assert NodeWikiPage.load(versions[1]).content == current_wiki.content
+        assert NodeWikiPage.load(versions[1]).node == fork_grandchild
+        assert wiki._id not in versions
+
 class TestContributorOrdering:
 
     def test_can_get_contributor_order(self, node):
@@ -4056,20 +4177,29 @@ class TestAddonCallbacks:
                 node, 'private'
             )
 
+    def _patch_hooks(self, node, hook):
+        # Forks and registrations run the hooks of each add-on for the whole tree at once
+        callbacks = {}
+        for addon in node.addons:
+            patch = mock.patch.object(addon.__class__, hook, return_value=[])
+            callbacks[addon] = patch.start()
+            self.patches.append(patch)
+        return callbacks
+
     def test_fork_callback(self, node, auth):
+        callbacks = self._patch_hooks(node, 'after_fork_many')
         fork = node.fork_node(auth=auth)
-        for addon in node.addons:
-            callback = addon.after_fork
+        for addon, callback in callbacks.items():
             callback.assert_called_once_with(
-                node, fork, auth.user
+                [(addon, node, fork)], auth.user
             )
 
     def test_register_callback(self, node, auth):
+        callbacks = self._patch_hooks(node, 'after_register_many')
         with mock_archive(node) as registration:
-            for addon in node.addons:
-                callback = addon.after_register
+            for addon, callback in callbacks.items():
                 callback.assert_called_once_with(
-                    node, registration, auth.user
+                    [(addon, node, registration)], auth.user
                 )
 
 
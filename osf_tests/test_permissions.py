@@ -0,0 +1,70 @@
+import pytest
+
+from framework.auth.core import Auth
+from osf.models.permissions import PermissionResolver, get_permission_resolver
+from osf_tests.factories import NodeFactory, PrivateLinkFactory, ProjectFactory, UserFactory
+from website.util.permissions import ADMIN, READ, WRITE
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def user():
+    return UserFactory()
+
+
+@pytest.fixture()
+def project(user):
+    return ProjectFactory(creator=user)
+
+
+class TestPermissionResolver:
+
+    def test_prefetch_resolves_many_nodes_in_one_query(self, user, project, django_assert_num_queries):
+        component = NodeFactory(parent=project, creator=UserFactory())
+        other = ProjectFactory()
+        resolver = PermissionResolver(user)
+        with django_assert_num_queries(1):
+            resolver.prefetch([project, component, other])
+        with django_assert_num_queries(0):
+            assert resolver.get(project).as_list() == [READ, WRITE, ADMIN]
+            assert resolver.get(component).as_list() == []
+            assert resolver.has_permission(component, READ)
+            assert resolver.has_permission(component, READ, check_parent=False) is False
+            assert resolver.is_admin_parent(component)
+            assert resolver.has_permission(other, READ) is False
+
+    def test_anonymous(self, project):
+        resolver = PermissionResolver(None)
+        assert resolver.get(project).as_list() == []
+        assert resolver.is_admin_parent(project) is False
+
+    def test_private_link(self, project):
+        link = PrivateLinkFactory(anonymous=True)
+        link.nodes.add(project)
+        assert PermissionResolver(None).private_link(link.key) == (True, {project.id})
+        assert PermissionResolver(None).private_link('notakey') == (False, set())
+
+
+class TestRequestScope:
+
+    def test_memoized_for_the_request(self, user, project, request_context, django_assert_num_queries):
+        resolver = get_permission_resolver(user)
+        assert resolver is get_permission_resolver(user)
+        assert project.has_permission(user, ADMIN)
+        with django_assert_num_queries(0):
+            assert project.can_view(Auth(user))
+            assert project.can_edit(user=user)
+            assert project.is_admin_parent(user)
+
+    def test_new_resolver_outside_of_requests(self, user):
+        assert get_permission_resolver(user) is not get_permission_resolver(user)
+
+    def test_contributor_changes_clear_resolvers(self, user, project, request_context):
+        contrib = UserFactory()
+        assert project.has_permission(contrib, READ) is False
+        project.add_contributor(contrib, auth=Auth(user), permissions=[READ])
+        assert project.has_permission(contrib, READ)
+        assert project.has_permission(contrib, WRITE) is False
+        project.set_permissions(contrib, [READ, WRITE])
+        assert project.has_permission(contrib, WRITE)
@@ -0,0 +1,143 @@
+import datetime as dt
+
+import mock
+import pytest
+from django.utils import timezone
+
+from osf.models import QueuedSearchUpdate
+from website import settings
+from website.search import elastic_search, search
+
+from .factories import NodeFactory, UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def node():
+    return NodeFactory()
+
+
+def age_queue(seconds):
+    past = timezone.now() - dt.timedelta(seconds=seconds)
+    QueuedSearchUpdate.objects.update(first_queued=past, last_queued=past)
+
+
+class TestQueuedSearchUpdate:
+
+    def test_enqueue_coalesces_repeated_updates(self, node):
+        QueuedSearchUpdate.objects.enqueue(QueuedSearchUpdate.NODE, [node.id])
+        QueuedSearchUpdate.objects.enqueue(QueuedSearchUpdate.NODE, [node.id])
+        QueuedSearchUpdate.objects.enqueue(QueuedSearchUpdate.USER, [node.creator.id])
+
+        assert QueuedSearchUpdate.objects.count() == 2
+        assert QueuedSearchUpdate.objects.stats()['depth'] == 2
+
+    def test_enqueue_from_queryset(self, node):
+        other = NodeFactory()
+        QueuedSearchUpdate.objects.enqueue(
+            QueuedSearchUpdate.NODE,
+            type(node).objects.filter(id__in=[node.id, other.id]).include(None).values_list('id', flat=True)
+        )
+        assert set(QueuedSearchUpdate.objects.values_list('object_id', flat=True)) == {node.id, other.id}
+
+    def test_requeue_resets_debounce_window(self, node):
+        QueuedSearchUpdate.objects.enqueue(QueuedSearchUpdate.NODE, [node.id])
+        age_queue(settings.SEARCH_UPDATE_DEBOUNCE + 1)
+        assert QueuedSearchUpdate.objects.ready().count() == 1
+
+        QueuedSearchUpdate.objects.enqueue(QueuedSearchUpdate.NODE, [node.id])
+        entry = QueuedSearchUpdate.objects.get()
+        assert entry.first_queued < entry.last_queued
+        assert QueuedSearchUpdate.objects.ready().count() == 0
+
+    def test_max_wait_overrides_debounce(self, node):
+        QueuedSearchUpdate.objects.enqueue(QueuedSearchUpdate.NODE, [node.id])
+        QueuedSearchUpdate.objects.update(first_queued=timezone.now() - dt.timedelta(seconds=settings.SEARCH_UPDATE_MAX_WAIT + 1))
+        assert QueuedSearchUpdate.objects.ready().count() == 1
+
+    def test_drain_passes_batches_to_handler(self, node):
+        user = UserFactory()
+        QueuedSearchUpdate.objects.enqueue(QueuedSearchUpdate.NODE, [node.id])
+        QueuedSearchUpdate.objects.enqueue(QueuedSearchUpdate.USER, [user.id])
+        age_queue(settings.SEARCH_UPDATE_DEBOUNCE + 1)
+        handler = mock.Mock()
+
+        assert QueuedSearchUpdate.objects.drain(handler) == 2
+        handler.assert_called_once_with({'node': [node.id], 'user': [user.id]})
+        assert not QueuedSearchUpdate.objects.exists()
+
+    def test_failed_drain_keeps_entries(self, node):
+        QueuedSearchUpdate.objects.enqueue(QueuedSearchUpdate.NODE, [node.id])
+        age_queue(settings.SEARCH_UPDATE_DEBOUNCE + 1)
+
+        with pytest.raises(ValueError):
+            QueuedSearchUpdate.objects.drain(mock.Mock(side_effect=ValueError))
+        entry = QueuedSearchUpdate.objects.get()
+        assert entry.attempts == 1
+        # Retried after the debounce window, at the end of the queue
+        assert QueuedSearchUpdate.objects.ready().count() == 0
+
+    def test_handler_runs_outside_of_claiming_transaction(self, node):
+        QueuedSearchUpdate.objects.enqueue(QueuedSearchUpdate.NODE, [node.id])
+        age_queue(settings.SEARCH_UPDATE_DEBOUNCE + 1)
+
+        def handler(by_type):
+            # The batch was claimed and committed before the handler is called
+            assert not QueuedSearchUpdate.objects.exists()
+
+        assert QueuedSearchUpdate.objects.drain(handler) == 1
+
+    @mock.patch.object(settings, 'SEARCH_UPDATE_MAX_ATTEMPTS', 2)
+    def test_failing_entries_are_dropped_after_max_attempts(self, node):
+        QueuedSearchUpdate.objects.enqueue(QueuedSearchUpdate.NODE, [node.id])
+        for attempt in range(2):
+            age_queue(settings.SEARCH_UPDATE_DEBOUNCE + 1)
+            with pytest.raises(ValueError):
+                QueuedSearchUpdate.objects.drain(mock.Mock(side_effect=ValueError))
+        assert not QueuedSearchUpdate.objects.exists()
+
+    def test_stats_lag(self, node):
+        assert QueuedSearchUpdate.objects.stats() == {'depth': 0, 'lag': 0}
+        QueuedSearchUpdate.objects.enqueue(QueuedSearchUpdate.NODE, [node.id])
+        age_queue(30)
+        assert QueuedSearchUpdate.objects.stats()['lag'] >= 30
+
+
+class TestSearchUpdateDebounce:
+
+    @mock.patch.object(settings, 'USE_CELERY', True)
+    @mock.patch('website.search.search.search_engine')
+    def test_update_node_is_queued_when_debouncing(self, mock_search_engine, node):
+        search.update_node(node)
+        assert QueuedSearchUpdate.objects.filter(doc_type='node', object_id=node.id).exists()
+        assert not mock_search_engine.update_node_async.s.called
+
+    @mock.patch.object(settings, 'USE_CELERY', True)
+    @mock.patch('website.search.search.search_engine')
+    def test_update_user_is_queued_when_debouncing(self, mock_search_engine, node):
+        search.update_user(node.creator)
+        assert QueuedSearchUpdate.objects.filter(doc_type='user', object_id=node.creator.id).exists()
+
+    @mock.patch.object(settings, 'USE_CELERY', True)
+    @mock.patch('website.search.search.search_engine')
+    def test_contributor_updates_are_queued_separately(self, mock_search_engine, node):
+        search.update_contributors_async(node.creator.id)
+        assert QueuedSearchUpdate.objects.filter(doc_type='contrib', object_id=node.id).exists()
+
+    @mock.patch('website.search.elastic_search.bulk_update_contributors')
+    @mock.patch('website.search.elastic_search.bulk_index_nodes')
+    def test_contributor_updates_do_not_reindex_files(self, mock_bulk_index_nodes, mock_bulk_update_contributors, node):
+        other = NodeFactory()
+        elastic_search.process_search_updates({'node': [node.id], 'contrib': [node.id, other.id]})
+        assert list(mock_bulk_index_nodes.call_args[0][0]) == [node]
+        assert list(mock_bulk_update_contributors.call_args[0][0]) == [other]
+
+    @mock.patch.object(settings, 'USE_CELERY', True)
+    @mock.patch.object(settings, 'SEARCH_UPDATE_DEBOUNCE', 0)
+    @mock.patch('website.search.search.enqueue_task')
+    @mock.patch('website.search.search.search_engine')
+    def test_debounce_disabled(self, mock_search_engine, mock_enqueue, node):
+        search.update_node(node)
+        assert not QueuedSearchUpdate.objects.exists()
+        assert mock_enqueue.called
@@ -1,6 +1,13 @@
+import time
+
+import mock
 import pytest
+from django.core.cache import caches
+from django.utils import timezone
 
 from framework.sessions import utils
+from framework.sessions import store as store_module
+from framework.sessions.store import LRUCache, store
 from tests.base import DbTestCase
 from osf_tests.factories import SessionFactory, UserFactory
 from osf.models import OSFUser, Session
@@ -74,3 +81,140 @@ class SessionUtilsTestCase(DbTestCase):
         assert Session.objects.all().count() == 1
         utils.remove_session(session)
         assert Session.objects.all().count() == 0
+
+
+@pytest.mark.django_db
+class TestSessionStore:
+
+    @pytest.fixture()
+    def shared_cache(self):
+        # Django's default cache is an in-process LocMemCache, standing in for a shared cache
+        with mock.patch('framework.sessions.store.settings.SESSION_CACHE_ALIAS', 'default'):
+            caches['default'].clear()
+            yield caches['default']
+            caches['default'].clear()
+
+    def test_lru_cache_evicts_least_recently_used(self):
+        cache = LRUCache(max_size=2, timeout=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        assert cache.get('a') == 1
+        cache.set('c', 3)
+        assert cache.get('b') is None
+        assert cache.get('a') == 1
+        assert cache.get('c') == 3
+        assert len(cache) == 2
+
+    def test_lru_cache_expires_entries(self):
+        cache = LRUCache(max_size=2, timeout=60)
+        cache.set('a', 1)
+        with mock.patch('framework.sessions.store.time.time', return_value=time.time() + 61):
+            assert cache.get('a') is None
+
+    def test_get_session_is_cached(self, django_assert_num_queries):
+        session = SessionFactory()
+        assert store.get_session(session._id).data == session.data
+        with django_assert_num_queries(0):
+            cached = store.get_session(session._id)
+        assert cached._id == session._id
+        # Every lookup returns its own instance
+        cached.data['foo'] = 'bar'
+        assert 'foo' not in store.get_session(session._id).data
+
+    def test_saving_session_invalidates_it(self):
+        session = SessionFactory()
+        store.get_session(session._id)
+        session.data['foo'] = 'bar'
+        session.save()
+        assert store.get_session(session._id).data['foo'] == 'bar'
+
+    def test_removing_sessions_invalidates_them(self):
+        user = UserFactory()
+        session = SessionFactory(user=user)
+        assert store.get_session(session._id)
+        utils.remove_sessions_for_user(user)
+        assert store.get_session(session._id) is None
+
+    def test_get_user_is_cached_and_invalidated_on_save(self, django_assert_num_queries):
+        user = UserFactory()
+        assert store.get_user(user._id) == user
+        with django_assert_num_queries(0):
+            assert store.get_user(user._id).fullname == user.fullname
+        user.fullname = 'Freddie Mercury'
+        user.save()
+        assert store.get_user(user._id).fullname == 'Freddie Mercury'
+
+    def test_saving_cached_user_keeps_newer_writes(self):
+        user = UserFactory()
+        store.get_user(user._id)
+        cached = store.get_user(user._id)
+
+        # Another process changes the user after it was cached
+        OSFUser.objects.filter(id=user.id).update(fullname='Freddie Mercury')
+
+        cached.given_name = 'Farrokh'
+        cached.save()
+        user.reload()
+        assert user.fullname == 'Freddie Mercury'
+        assert user.given_name == 'Farrokh'
+        assert store.get_user(user._id).fullname == 'Freddie Mercury'
+
+    @mock.patch('website.mailchimp_utils.get_mailchimp_api')
+    def test_disable_account_invalidates_user(self, mock_mailchimp):
+        user = UserFactory()
+        assert not store.get_user(user._id).is_disabled
+        user.disable_account()
+        user.save()
+        assert store.get_user(user._id).is_disabled
+
+    def test_shared_cache(self, shared_cache, django_assert_num_queries):
+        session = SessionFactory()
+        store.get_session(session._id)
+        assert shared_cache.get('session:{}'.format(session._id))
+
+        # Another process only has the shared cache
+        store.clear()
+        with django_assert_num_queries(0):
+            assert store.get_session(session._id)._id == session._id
+
+        session.delete()
+        assert shared_cache.get('session:{}'.format(session._id)) is None
+
+    def test_disabled(self):
+        session = SessionFactory()
+        with mock.patch('framework.sessions.store.settings.SESSION_CACHE_ENABLED', False):
+            store.get_session(session._id)
+            assert store.get_session(session._id) is not None
+            assert len(store.local) == 0
+
+
+@pytest.mark.django_db
+class TestRecordLastLogin:
+
+    @pytest.fixture(autouse=True)
+    def reset(self):
+        store_module._recent_logins.clear()
+
+    @mock.patch('framework.postcommit_tasks.handlers.enqueue_postcommit_task')
+    def test_logins_are_throttled_once_updated(self, mock_enqueue):
+        user = UserFactory(date_last_login=None)
+        store_module.record_last_login(user._id)
+        assert mock_enqueue.call_count == 1
+        assert mock_enqueue.call_args[0][:2] == (store_module.update_last_logins, ([user._id], ))
+
+        # Until the update is made, e.g. if the request failed, it is enqueued again
+        store_module.record_last_login(user._id)
+        assert mock_enqueue.call_count == 2
+
+        store_module.update_last_logins([user._id])
+        store_module.record_last_login(user._id)
+        assert mock_enqueue.call_count == 2
+
+    def test_update_last_logins(self):
+        recent = timezone.now()
+        stale, fresh = UserFactory(date_last_login=None), UserFactory(date_last_login=recent)
+        store_module.update_last_logins([stale._id, fresh._id])
+        stale.reload()
+        fresh.reload()
+        assert stale.date_last_login is not None
+        assert fresh.date_last_login == recent
@@ -57,6 +57,10 @@ class SnapshotAnalytics(BaseAnalytics):
 
 class SummaryAnalytics(BaseAnalytics):
 
+    def __init__(self, incremental=False):
+        # Summaries that support it only recount rows changed since their last incremental run
+        self.incremental = incremental
+
     @property
     def analytic_type(self):
         return 'summary'
@@ -86,6 +90,7 @@ class SummaryAnalytics(BaseAnalytics):
         )
         parser.add_argument('-d', '--date', dest='date')
         parser.add_argument('-y', '--yesterday', dest='yesterday', action='store_true')
+        parser.add_argument('-i', '--incremental', dest='incremental', action='store_true')
 
         return parser.parse_args()
 
@@ -182,15 +187,17 @@ class DateAnalyticsHarness(BaseAnalyticsHarness):
         )
         parser.add_argument('-d', '--date', dest='date', required=False)
         parser.add_argument('-y', '--yesterday', dest='yesterday', action='store_true')
+        parser.add_argument('-i', '--incremental', dest='incremental', action='store_true')
         return parser.parse_args()
 
-    def main(self, date=None, yesterday=False, command_line=True):
+    def main(self, date=None, yesterday=False, command_line=True, incremental=False):
         analytics_classes = self.analytics_classes
         if yesterday:
             date = (timezone.now() - timedelta(days=1)).date()
 
         if command_line:
             args = self.parse_args()
+            incremental = incremental or args.incremental
             if args.yesterday:
                 date = (timezone.now() - timedelta(days=1)).date()
             if not date:
@@ -202,6 +209,6 @@ class DateAnalyticsHarness(BaseAnalyticsHarness):
                 analytics_classes = self.try_to_import_from_args(args.analytics_scripts)
 
         for analytics_class in analytics_classes:
-            class_instance = analytics_class()
+            class_instance = analytics_class(incremental=incremental)
             events = class_instance.get_events(date)
             class_instance.send_events(events)
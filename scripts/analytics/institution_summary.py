@@ -6,13 +6,14 @@ import logging
 from dateutil.parser import parse
 from datetime import datetime, timedelta
 
-from django.db.models import Q
+from django.db.models import Case, IntegerField, Q, Sum, When
 from django.utils import timezone
 
 from framework.encryption import ensure_bytes
-from osf.models import Institution
+from osf.models import AbstractNode, Institution, OSFUser
 from website.app import init_app
 from scripts.analytics.base import SummaryAnalytics
+from scripts.analytics.node_summary import count_buckets, node_flags, summarize_buckets
 
 
 logger = logging.getLogger(__name__)
@@ -28,78 +29,46 @@ class InstitutionSummary(SummaryAnalytics):
     def get_events(self, date):
         super(InstitutionSummary, self).get_events(date)
 
-        institutions = Institution.objects.all()
-        counts = []
-
         # Convert to a datetime at midnight for queries and the timestamp
         timestamp_datetime = datetime(date.year, date.month, date.day).replace(tzinfo=pytz.UTC)
         query_datetime = timestamp_datetime + timedelta(days=1)
-        daily_query = Q(created__gte=timestamp_datetime)
-        public_query = Q(is_public=True)
-        private_query = Q(is_public=False)
 
-        # `embargoed` used private status to determine embargoes, but old registrations could be private and unapproved registrations can also be private
-        # `embargoed_v2` uses future embargo end dates on root
-        embargo_v2_query = Q(root__embargo__end_date__gt=query_datetime)
+        # Node buckets and user counts of every institution, with one query each
+        affiliations = AbstractNode.affiliated_institutions.through.objects.filter(
+            abstractnode__is_deleted=False,
+            abstractnode__created__lt=query_datetime,
+        )
+        buckets = count_buckets(
+            affiliations,
+            node_flags(timestamp_datetime, query_datetime, prefix='abstractnode__'),
+            group_by=['institution_id'],
+        )
+        users = OSFUser.affiliated_institutions.through.objects.values('institution_id').annotate(
+            total=Sum(Case(When(osfuser__is_active=True, then=1), default=0, output_field=IntegerField())),
+            total_daily=Sum(Case(
+                When(Q(osfuser__date_confirmed__gte=timestamp_datetime, osfuser__date_confirmed__lt=query_datetime), then=1),
+                default=0,
+                output_field=IntegerField()
+            )),
+        )
+        users = {row['institution_id']: row for row in users}
 
-        for institution in institutions:
-            node_qs = institution.nodes.filter(is_deleted=False, created__lt=query_datetime).exclude(type='osf.registration')
-            registration_qs = institution.nodes.filter(is_deleted=False, created__lt=query_datetime, type='osf.registration')
-
-            count = {
+        counts = []
+        for institution in Institution.objects.all():
+            count = summarize_buckets(buckets.get(institution.id, {}), withdrawn=False)
+            count.update({
                 'institution': {
                     'id': ensure_bytes(institution._id),
                     'name': ensure_bytes(institution.name),
                 },
                 'users': {
-                    'total': institution.osfuser_set.filter(is_active=True).count(),
-                    'total_daily': institution.osfuser_set.filter(date_confirmed__gte=timestamp_datetime, date_confirmed__lt=query_datetime).count(),
-                },
-                'nodes': {
-                    'total': node_qs.count(),
-                    'public': node_qs.filter(public_query).count(),
-                    'private': node_qs.filter(private_query).count(),
-
-                    'total_daily': node_qs.filter(daily_query).count(),
-                    'public_daily': node_qs.filter(public_query & daily_query).count(),
-                    'private_daily': node_qs.filter(private_query & daily_query).count(),
-                },
-                # Projects use get_roots to remove children
-                'projects': {
-                    'total': node_qs.get_roots().count(),
-                    'public': node_qs.filter(public_query).get_roots().count(),
-                    'private': node_qs.filter(private_query).get_roots().count(),
-
-                    'total_daily': node_qs.filter(daily_query).get_roots().count(),
-                    'public_daily': node_qs.filter(public_query & daily_query).get_roots().count(),
-                    'private_daily': node_qs.filter(private_query & daily_query).get_roots().count(),
-                },
-                'registered_nodes': {
-                    'total': registration_qs.count(),
-                    'public': registration_qs.filter(public_query).count(),
-                    'embargoed': registration_qs.filter(private_query).count(),
-                    'embargoed_v2': registration_qs.filter(private_query & embargo_v2_query).count(),
-
-                    'total_daily': registration_qs.filter(daily_query).count(),
-                    'public_daily': registration_qs.filter(public_query & daily_query).count(),
-                    'embargoed_daily': registration_qs.filter(private_query & daily_query).count(),
-                    'embargoed_v2_daily': registration_qs.filter(private_query & daily_query & embargo_v2_query).count(),
-                },
-                'registered_projects': {
-                    'total': registration_qs.get_roots().count(),
-                    'public': registration_qs.filter(public_query).get_roots().count(),
-                    'embargoed': registration_qs.filter(private_query).get_roots().count(),
-                    'embargoed_v2': registration_qs.filter(private_query & embargo_v2_query).get_roots().count(),
-
-                    'total_daily': registration_qs.filter(daily_query).get_roots().count(),
-                    'public_daily': registration_qs.filter(public_query & daily_query).get_roots().count(),
-                    'embargoed_daily': registration_qs.filter(private_query & daily_query).get_roots().count(),
-                    'embargoed_v2_daily': registration_qs.filter(private_query & daily_query & embargo_v2_query).get_roots().count(),
+                    'total': users.get(institution.id, {}).get('total', 0),
+                    'total_daily': users.get(institution.id, {}).get('total_daily', 0),
                 },
                 'keen': {
                     'timestamp': timestamp_datetime.isoformat()
                 }
-            }
+            })
 
             logger.info(
                 '{} Nodes counted. Nodes: {}, Projects: {}, Registered Nodes: {}, Registered Projects: {}'.format(
@@ -1,7 +1,9 @@
 import django
 django.setup()
 
-from django.db.models import Q
+import itertools
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Q, Value, When
 import pytz
 import logging
 from dateutil.parser import parse
@@ -15,6 +17,106 @@ from scripts.analytics.base import SummaryAnalytics
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+# Nodes are counted in buckets of flags, computed in SQL with a single pass over the table
+COUNTED = 1  # Not deleted and created by the end of the day
+REGISTRATION = 2
+PUBLIC = 4
+ROOT = 8
+WITHDRAWN = 16
+# These depend on the day being summarized, so incremental runs count them anew
+DAILY = 32
+EMBARGOED_V2 = 64
+
+BATCH_SIZE = 1000
+
+
+def _flag(query, value):
+    return Case(When(query, then=Value(value)), default=Value(0), output_field=IntegerField())
+
+
+def node_flags(timestamp_datetime, query_datetime, prefix='', stable=False):
+    """An expression of the buckets a node is counted in. `stable` leaves out the flags that
+    depend on the day, and gives 0 for nodes that are not counted at all.
+    """
+    def q(**kwargs):
+        return Q(**{prefix + key: value for key, value in kwargs.items()})
+
+    flags = (
+        _flag(q(type='osf.registration'), REGISTRATION) +
+        _flag(q(is_public=True), PUBLIC) +
+        # Same as `get_roots`, as a root is its own root
+        _flag(q(id=F(prefix + 'root_id')) & ~q(type__in=['osf.collection', 'osf.quickfilesnode']), ROOT) +
+        _flag(q(retraction__isnull=False), WITHDRAWN)
+    )
+    counted = q(is_deleted=False, created__lte=query_datetime)
+    if stable:
+        return Case(When(counted, then=flags + Value(COUNTED)), default=Value(0), output_field=IntegerField())
+    # `embargoed` used private status to determine embargoes, but old registrations could be private and unapproved registrations can also be private
+    # `embargoed_v2` uses future embargo end dates on root
+    return (
+        flags + _flag(counted, COUNTED) +
+        _flag(q(created__gte=timestamp_datetime), DAILY) +
+        _flag(q(root__embargo__end_date__gt=query_datetime), EMBARGOED_V2)
+    )
+
+
+def count_buckets(queryset, flags, group_by=()):
+    """Number of rows of `queryset` in each bucket of `flags`, with one query. Grouped by the
+    values of the `group_by` fields first if given.
+    """
+    counts = queryset.annotate(
+        flags=flags
+    ).order_by().values(*(tuple(group_by) + ('flags', ))).annotate(count=Count('pk'))
+    if not group_by:
+        return {row['flags']: row['count'] for row in counts}
+    grouped = {}
+    for row in counts:
+        key = tuple(row[field] for field in group_by)
+        grouped.setdefault(key if len(key) > 1 else key[0], {})[row['flags']] = row['count']
+    return grouped
+
+
+def summarize_buckets(buckets, daily_buckets=None, embargoed_buckets=None, withdrawn=True):
+    """Node, project and registration counts from the buckets of `node_flags`. Counts that
+    depend on the day are taken from `daily_buckets` and `embargoed_buckets` if given.
+    """
+    def count(required, excluded=0):
+        required |= COUNTED
+        source = buckets
+        if required & EMBARGOED_V2 and embargoed_buckets is not None:
+            source = embargoed_buckets
+        elif required & DAILY and daily_buckets is not None:
+            source = daily_buckets
+        return sum(
+            number for flags, number in source.items()
+            if flags & required == required and not flags & excluded
+        )
+
+    def counts(required, excluded, registrations):
+        result = {}
+        for suffix, daily in (('', 0), ('_daily', DAILY)):
+            result['total' + suffix] = count(required | daily, excluded)
+            result['public' + suffix] = count(required | daily | PUBLIC, excluded)
+            if registrations:
+                result['embargoed' + suffix] = count(required | daily, excluded | PUBLIC)
+                result['embargoed_v2' + suffix] = count(required | daily | EMBARGOED_V2, excluded | PUBLIC)
+                if withdrawn:
+                    result['withdrawn' + suffix] = count(required | daily | WITHDRAWN, excluded)
+            else:
+                result['private' + suffix] = count(required | daily, excluded | PUBLIC)
+        return result
+
+    return {
+        # Nodes - the number of projects and components
+        'nodes': counts(0, REGISTRATION, False),
+        # Projects - the number of top-level only projects
+        'projects': counts(ROOT, REGISTRATION, False),
+        # Registered Nodes - the number of registered projects and components
+        'registered_nodes': counts(REGISTRATION, 0, True),
+        # Registered Projects - the number of registered top level projects
+        'registered_projects': counts(REGISTRATION | ROOT, 0, True),
+    }
+
 
 class NodeSummary(SummaryAnalytics):
 
@@ -24,75 +126,26 @@ class NodeSummary(SummaryAnalytics):
 
     def get_events(self, date):
         super(NodeSummary, self).get_events(date)
-        from osf.models import Node, Registration
+        from osf.models import AbstractNode
 
         # Convert to a datetime at midnight for queries and the timestamp
         timestamp_datetime = datetime(date.year, date.month, date.day).replace(tzinfo=pytz.UTC)
         query_datetime = timestamp_datetime + timedelta(days=1)
 
-        node_qs = Node.objects.filter(is_deleted=False, created__lte=query_datetime)
-        registration_qs = Registration.objects.filter(is_deleted=False, created__lte=query_datetime)
-
-        public_query = Q(is_public=True)
-        private_query = Q(is_public=False)
-
-        # node_query encompasses lte query_datetime
-        daily_query = Q(created__gte=timestamp_datetime)
-        retracted_query = Q(retraction__isnull=False)
-
-        # `embargoed` used private status to determine embargoes, but old registrations could be private and unapproved registrations can also be private
-        # `embargoed_v2` uses future embargo end dates on root
-        embargo_v2_query = Q(root__embargo__end_date__gt=query_datetime)
-
-        totals = {
-            'keen': {
-                'timestamp': timestamp_datetime.isoformat()
-            },
-            # Nodes - the number of projects and components
-            'nodes': {
-                'total': node_qs.count(),
-                'public': node_qs.filter(public_query).count(),
-                'private': node_qs.filter(private_query).count(),
-                'total_daily': node_qs.filter(daily_query).count(),
-                'public_daily': node_qs.filter(public_query & daily_query).count(),
-                'private_daily': node_qs.filter(private_query & daily_query).count(),
-            },
-            # Projects - the number of top-level only projects
-            'projects': {
-                'total': node_qs.get_roots().count(),
-                'public': node_qs.filter(public_query).get_roots().count(),
-                'private': node_qs.filter(private_query).get_roots().count(),
-                'total_daily': node_qs.filter(daily_query).get_roots().count(),
-                'public_daily': node_qs.filter(public_query & daily_query).get_roots().count(),
-                'private_daily': node_qs.filter(private_query & daily_query).get_roots().count(),
-            },
-            # Registered Nodes - the number of registered projects and components
-            'registered_nodes': {
-                'total': registration_qs.count(),
-                'public': registration_qs.filter(public_query).count(),
-                'embargoed': registration_qs.filter(private_query).count(),
-                'embargoed_v2': registration_qs.filter(private_query & embargo_v2_query).count(),
-                'withdrawn': registration_qs.filter(retracted_query).count(),
-                'total_daily': registration_qs.filter(daily_query).count(),
-                'public_daily': registration_qs.filter(public_query & daily_query).count(),
-                'embargoed_daily': registration_qs.filter(private_query & daily_query).count(),
-                'embargoed_v2_daily': registration_qs.filter(private_query & daily_query & embargo_v2_query).count(),
-                'withdrawn_daily': registration_qs.filter(retracted_query & daily_query).count(),
-
-            },
-            # Registered Projects - the number of registered top level projects
-            'registered_projects': {
-                'total': registration_qs.get_roots().count(),
-                'public': registration_qs.filter(public_query).get_roots().count(),
-                'embargoed': registration_qs.filter(private_query).get_roots().count(),
-                'embargoed_v2': registration_qs.filter(private_query & embargo_v2_query).get_roots().count(),
-                'withdrawn': registration_qs.filter(retracted_query).get_roots().count(),
-                'total_daily': registration_qs.filter(daily_query).get_roots().count(),
-                'public_daily': registration_qs.filter(public_query & daily_query).get_roots().count(),
-                'embargoed_daily': registration_qs.filter(private_query & daily_query).get_roots().count(),
-                'embargoed_v2_daily': registration_qs.filter(private_query & daily_query & embargo_v2_query).get_roots().count(),
-                'withdrawn_daily': registration_qs.filter(retracted_query & daily_query).get_roots().count(),
-            }
+        node_qs = AbstractNode.objects.filter(type__in=['osf.node', 'osf.registration'])
+        flags = node_flags(timestamp_datetime, query_datetime)
+        if self.incremental:
+            buckets = self.update_buckets(node_qs, timestamp_datetime, query_datetime)
+            counted_qs = node_qs.filter(is_deleted=False, created__lte=query_datetime)
+            totals = summarize_buckets(
+                buckets,
+                daily_buckets=count_buckets(counted_qs.filter(created__gte=timestamp_datetime), flags),
+                embargoed_buckets=count_buckets(counted_qs.filter(root__embargo__end_date__gt=query_datetime), flags),
+            )
+        else:
+            totals = summarize_buckets(count_buckets(node_qs.filter(is_deleted=False, created__lte=query_datetime), flags))
+        totals['keen'] = {
+            'timestamp': timestamp_datetime.isoformat()
         }
 
         logger.info(
@@ -106,6 +159,59 @@ class NodeSummary(SummaryAnalytics):
 
         return [totals]
 
+    def update_buckets(self, node_qs, timestamp_datetime, query_datetime):
+        """Bring the stored buckets of `node_flags` up to date by recounting only the nodes
+        modified since the last run, and return them.
+
+        Nodes are recounted if modified after the end of the day they were last counted
+        for, so their creation on later days is picked up. Hard deleted nodes are not
+        noticed until the next full recount, which happens whenever there is no checkpoint
+        or when summarizing an earlier day than the checkpoint.
+        """
+        from osf.models import SummaryCheckpoint, SummaryRow
+
+        flags = node_flags(timestamp_datetime, query_datetime, stable=True)
+        watermark = min(timezone.now(), query_datetime)
+        with transaction.atomic():
+            checkpoint = SummaryCheckpoint.objects.select_for_update().filter(summary=self.collection_name).first()
+            if checkpoint is None or checkpoint.watermark > query_datetime:
+                logger.info('Recounting all nodes for the {} checkpoint'.format(self.collection_name))
+                SummaryRow.objects.filter(summary=self.collection_name).delete()
+                changed = node_qs
+                buckets = {}
+            else:
+                changed = node_qs.filter(modified__gte=checkpoint.watermark)
+                buckets = {int(key): value for key, value in checkpoint.buckets.items()}
+
+            changed = changed.annotate(flags=flags).order_by().values_list('id', 'flags').iterator()
+            recounted = 0
+            while True:
+                batch = dict(itertools.islice(changed, BATCH_SIZE))
+                if not batch:
+                    break
+                recounted += len(batch)
+                rows = SummaryRow.objects.filter(summary=self.collection_name, object_id__in=batch.keys())
+                previous = dict(rows.values_list('object_id', 'flags'))
+                for node_id, current in batch.items():
+                    before = previous.get(node_id, 0)
+                    if before:
+                        buckets[before] -= 1
+                    if current:
+                        buckets[current] = buckets.get(current, 0) + 1
+                rows.delete()
+                SummaryRow.objects.bulk_create([
+                    SummaryRow(summary=self.collection_name, object_id=node_id, flags=current)
+                    for node_id, current in batch.items() if current
+                ])
+
+            buckets = {key: value for key, value in buckets.items() if value}
+            SummaryCheckpoint.objects.update_or_create(
+                summary=self.collection_name,
+                defaults={'watermark': watermark, 'buckets': buckets},
+            )
+        logger.info('Recounted {} nodes for the {} checkpoint'.format(recounted, self.collection_name))
+        return buckets
+
 
 def get_class():
     return NodeSummary
@@ -113,8 +219,8 @@ def get_class():
 
 if __name__ == '__main__':
     init_app()
-    node_summary = NodeSummary()
-    args = node_summary.parse_args()
+    args = NodeSummary().parse_args()
+    node_summary = NodeSummary(incremental=args.incremental)
     yesterday = args.yesterday
     if yesterday:
         date = (timezone.now() - timedelta(days=1)).date()
@@ -17,8 +17,8 @@ class SummaryHarness(DateAnalyticsHarness):
 
 
 @celery_app.task(name='scripts.analytics.run_keen_summaries')
-def run_main(date=None, yesterday=False):
-    SummaryHarness().main(date, yesterday, False)
+def run_main(date=None, yesterday=False, incremental=False):
+    SummaryHarness().main(date, yesterday, False, incremental=incremental)
 
 
 if __name__ == '__main__':
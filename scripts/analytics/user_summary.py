@@ -9,13 +9,12 @@ import requests
 
 from dateutil.parser import parse
 from datetime import datetime, timedelta
-from django.db.models import Q
+from django.db.models import Case, Count, IntegerField, Q, Sum, When
 from django.utils import timezone
 
 from osf.models import OSFUser
 from website.app import init_app
 from website import settings
-from framework.database import paginated
 from framework import sentry
 from scripts.analytics.base import SummaryAnalytics
 
@@ -86,32 +85,45 @@ class UserSummary(SummaryAnalytics):
             Q(date_confirmed__lt=query_datetime)
         )
 
-        active_users = 0
+        def count_where(query):
+            return Sum(Case(When(query, then=1), default=0, output_field=IntegerField()))
+
+        new_users_query = Q(is_active=True, date_confirmed__gte=timestamp_datetime, date_confirmed__lt=query_datetime)
+        status = OSFUser.objects.aggregate(
+            active=count_where(active_user_query),
+            new_users_daily=count_where(new_users_query),
+            unconfirmed=count_where(Q(date_registered__lt=query_datetime, date_confirmed__isnull=True)),
+            deactivated=count_where(Q(date_disabled__isnull=False, date_disabled__lt=query_datetime)),
+            merged=count_where(Q(date_registered__lt=query_datetime, merged_by__isnull=False)),
+            profile_edited=count_where(active_user_query & (~Q(social={}) | ~Q(schools=[]) | ~Q(jobs=[]))),
+        )
+        status = {key: value or 0 for key, value in status.items()}
+        status['new_users_with_institution_daily'] = OSFUser.objects.filter(
+            new_users_query, affiliated_institutions__isnull=False
+        ).count()
+
+        # Only users with enough logs can be depth users. `count_user_logs` discounts the
+        # creation of the bookmark collection, which only matters right at the threshold
         depth_users = 0
-        profile_edited = 0
-        user_pages = paginated(OSFUser, query=active_user_query)
-        for user in user_pages:
-            active_users += 1
-            log_count = count_user_logs(user)
-            if log_count >= LOG_THRESHOLD:
+        log_counts = OSFUser.objects.filter(active_user_query).annotate(
+            log_count=Count('logs')
+        ).filter(log_count__gte=LOG_THRESHOLD).values_list('id', 'log_count')
+        at_threshold = []
+        for user_id, log_count in log_counts:
+            if log_count == LOG_THRESHOLD:
+                at_threshold.append(user_id)
+            else:
                 depth_users += 1
-            if user.social or user.schools or user.jobs:
-                profile_edited += 1
-        new_users = OSFUser.objects.filter(is_active=True, date_confirmed__gte=timestamp_datetime, date_confirmed__lt=query_datetime)
+        for user in OSFUser.objects.filter(id__in=at_threshold):
+            if count_user_logs(user) >= LOG_THRESHOLD:
+                depth_users += 1
+        status['depth'] = depth_users
+
         counts = {
             'keen': {
                 'timestamp': timestamp_datetime.isoformat()
             },
-            'status': {
-                'active': active_users,
-                'depth': depth_users,
-                'new_users_daily': new_users.count(),
-                'new_users_with_institution_daily': new_users.filter(affiliated_institutions__isnull=False).count(),
-                'unconfirmed': OSFUser.objects.filter(date_registered__lt=query_datetime, date_confirmed__isnull=True).count(),
-                'deactivated': OSFUser.objects.filter(date_disabled__isnull=False, date_disabled__lt=query_datetime).count(),
-                'merged': OSFUser.objects.filter(date_registered__lt=query_datetime, merged_by__isnull=False).count(),
-                'profile_edited': profile_edited,
-            }
+            'status': status,
         }
 
         try:
@@ -1,18 +1,34 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-"""Generate a sitemap for osf.io"""
-import boto3
+"""Generate a sitemap for osf.io
+
+Urls are streamed from the database into plain and gzipped shards as they are read.
+Every shard of users, nodes or preprints covers a fixed range of primary keys, so it
+holds the same rows from one run to the next, and each entity type is generated by
+its own worker process.
+
+A manifest of the rows in each shard is kept with the sitemaps. With `--incremental`,
+only the shards whose rows changed since the last run are regenerated.
+"""
+import argparse
 import datetime
 import gzip
+import json
 import os
 import shutil
+import tempfile
 import urlparse
-import xml
+from xml.sax.saxutils import escape
 
+# Unlike multiprocessing, billiard can fork from celery's daemonic worker processes
+from billiard import Pool
+import boto3
+from botocore.exceptions import ClientError
 import django
 django.setup()
+from django.db import connections
+from django.db.models import Count, ExpressionWrapper, F, IntegerField, Max, Sum
 import logging
-import tempfile
 
 from framework import sentry
 from framework.celery_tasks import app as celery_app
@@ -24,119 +40,211 @@ from website.app import init_app
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+MANIFEST = 'sitemap_manifest.json'
+
+
+class LocalStorage(object):
+    """Sitemaps served from the static folder"""
 
-class Sitemap(object):
     def __init__(self):
-        self.sitemap_count = 0
-        self.errors = 0
-        self.new_doc()
-        if not settings.SITEMAP_TO_S3:
-            self.sitemap_dir = os.path.join(settings.STATIC_FOLDER, 'sitemaps')
-            if not os.path.exists(self.sitemap_dir):
-                print('Creating sitemap directory at `{}`'.format(self.sitemap_dir))
-                os.makedirs(self.sitemap_dir)
-        else:
-            self.sitemap_dir = tempfile.mkdtemp()
-            assert settings.SITEMAP_AWS_BUCKET, 'SITEMAP_AWS_BUCKET must be set for sitemap files to be sent to S3'
-            assert settings.AWS_ACCESS_KEY_ID, 'AWS_ACCESS_KEY_ID must be set for sitemap files to be sent to S3'
-            assert settings.AWS_SECRET_ACCESS_KEY, 'AWS_SECRET_ACCESS_KEY must be set for sitemap files to be sent to S3'
-            self.s3 = boto3.resource(
-                's3',
-                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-                region_name='us-east-1'
-            )
+        self.work_dir = os.path.join(settings.STATIC_FOLDER, 'sitemaps')
+        if not os.path.exists(self.work_dir):
+            logger.info('Creating sitemap directory at `{}`'.format(self.work_dir))
+            os.makedirs(self.work_dir)
+
+    def put(self, name, path):
+        # Written in place
+        pass
+
+    def read(self, name):
+        path = os.path.join(self.work_dir, name)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def delete(self, name):
+        path = os.path.join(self.work_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
 
     def cleanup(self):
-        if settings.SITEMAP_TO_S3:
-            shutil.rmtree(self.sitemap_dir)
-
-    def new_doc(self):
-        """Creates new sitemap document and resets the url_count."""
-        self.doc = xml.dom.minidom.Document()
-        self.urlset = self.doc.createElement('urlset')
-        self.urlset.setAttribute('xmlns', 'http://www.sitemaps.org/schemas/sitemap/0.9')
-        self.doc.appendChild(self.urlset)
-        self.url_count = 0
+        pass
 
-    def add_tag(self, name, text):
-        """Adds a tag to the current url"""
-        tag = self.doc.createElement(name)
-        self.url.appendChild(tag)
-        tag_text = self.doc.createTextNode(text)
-        tag.appendChild(tag_text)
 
-    def add_url(self, config):
-        """Adds a url to the current urlset"""
-        if self.url_count >= settings.SITEMAP_URL_MAX:
-            self.write_doc()
-            self.new_doc()
-        self.url = self.doc.createElement('url')
-        self.urlset.appendChild(self.url)
-
-        for k, v in config.iteritems():
-            self.add_tag(k, v)
-        self.url_count += 1
+class S3Storage(object):
+    """Sitemaps shipped to S3, or to the S3 compatible service at SITEMAP_S3_ENDPOINT_URL"""
 
-    def write_doc(self):
-        """Writes and gzips each sitemap xml file"""
-        file_name = 'sitemap_{}.xml'.format(str(self.sitemap_count))
-        file_path = os.path.join(self.sitemap_dir, file_name)
-        zip_file_name = file_name + '.gz'
-        zip_file_path = file_path + '.gz'
-        print('Writing and gzipping `{}`: url_count = {}'.format(file_path, str(self.url_count)))
-
-        xml_str = self.doc.toprettyxml(indent="  ", encoding='utf-8')
-        with open(file_path, 'wb') as f:
-            f.write(xml_str)
-
-        # Write zipped file
-        with open(file_path, 'rb') as f_in, gzip.open(zip_file_path, 'wb') as f_out:
-            shutil.copyfileobj(f_in, f_out)
-        if settings.SITEMAP_TO_S3:
-            self.ship_to_s3(file_name, file_path)
-            self.ship_to_s3(zip_file_name, zip_file_path)
-        self.sitemap_count += 1
-
-    def ship_to_s3(self, name, path):
-        data = open(path, 'rb')
+    def __init__(self):
+        assert settings.SITEMAP_AWS_BUCKET, 'SITEMAP_AWS_BUCKET must be set for sitemap files to be sent to S3'
+        assert settings.AWS_ACCESS_KEY_ID, 'AWS_ACCESS_KEY_ID must be set for sitemap files to be sent to S3'
+        assert settings.AWS_SECRET_ACCESS_KEY, 'AWS_SECRET_ACCESS_KEY must be set for sitemap files to be sent to S3'
+        self.work_dir = tempfile.mkdtemp()
+        self.bucket = boto3.resource(
+            's3',
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+            region_name='us-east-1',
+            endpoint_url=settings.SITEMAP_S3_ENDPOINT_URL,
+        ).Bucket(settings.SITEMAP_AWS_BUCKET)
+
+    def put(self, name, path):
         try:
-            self.s3.Bucket(settings.SITEMAP_AWS_BUCKET).put_object(Key='sitemaps/{}'.format(name), Body=data)
+            with open(path, 'rb') as data:
+                self.bucket.put_object(Key='sitemaps/{}'.format(name), Body=data)
         except Exception as e:
             logger.info('Error sending data to s3 via boto3')
             logger.exception(e)
             sentry.log_message('ERROR: Sitemaps could not be uploaded to s3, see `generate_sitemap` logs')
-        data.close()
+        # Shipped shards are not needed locally anymore
+        os.remove(path)
 
-    def write_sitemap_index(self):
-        """Writes the index file for all of the sitemap files"""
-        doc = xml.dom.minidom.Document()
-        sitemap_index = self.doc.createElement('sitemapindex')
-        sitemap_index.setAttribute('xmlns', 'http://www.sitemaps.org/schemas/sitemap/0.9')
-        doc.appendChild(sitemap_index)
-
-        for f in range(self.sitemap_count):
-            sitemap = doc.createElement('sitemap')
-            sitemap_index.appendChild(sitemap)
-
-            loc = doc.createElement('loc')
-            sitemap.appendChild(loc)
-            loc_text = self.doc.createTextNode(urlparse.urljoin(settings.DOMAIN, 'sitemaps/sitemap_{}.xml'.format(str(f))))
-            loc.appendChild(loc_text)
-
-            datemod = doc.createElement('lastmod')
-            sitemap.appendChild(datemod)
-            datemod_text = self.doc.createTextNode(datetime.datetime.now().strftime('%Y-%m-%d'))
-            datemod.appendChild(datemod_text)
-
-        print('Writing `sitemap_index.xml`')
-        file_name = 'sitemap_index.xml'
-        file_path = os.path.join(self.sitemap_dir, file_name)
-        xml_str = doc.toprettyxml(indent="  ", encoding='utf-8')
-        with open(file_path, 'wb') as f:
-            f.write(xml_str)
-        if settings.SITEMAP_TO_S3:
-            self.ship_to_s3(file_name, file_path)
+    def read(self, name):
+        try:
+            return self.bucket.Object('sitemaps/{}'.format(name)).get()['Body'].read()
+        except ClientError:
+            return None
+
+    def delete(self, name):
+        self.bucket.Object('sitemaps/{}'.format(name)).delete()
+
+    def cleanup(self):
+        shutil.rmtree(self.work_dir)
+
+
+def get_storage():
+    return S3Storage() if settings.SITEMAP_TO_S3 else LocalStorage()
+
+
+class ShardWriter(object):
+    """Streams urls into the plain and gzipped xml files of one sitemap shard"""
+
+    def __init__(self, storage, name):
+        self.storage = storage
+        self.name = name
+        self.path = os.path.join(storage.work_dir, '{}.xml'.format(name))
+        self.plain = open(self.path, 'wb')
+        self.gzipped = gzip.open(self.path + '.gz', 'wb')
+        self.url_count = 0
+        self.write('<?xml version="1.0" encoding="utf-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+
+    def write(self, text):
+        data = text.encode('utf-8')
+        self.plain.write(data)
+        self.gzipped.write(data)
+
+    def add_url(self, config):
+        self.write(u'  <url>\n{}  </url>\n'.format(u''.join(
+            u'    <{0}>{1}</{0}>\n'.format(tag, escape(value)) for tag, value in config.items()
+        )))
+        self.url_count += 1
+
+    def close(self):
+        """Finish the shard and ship it. Returns the number of urls in it."""
+        self.write('</urlset>\n')
+        self.plain.close()
+        self.gzipped.close()
+        logger.info('Wrote `{}`: url_count = {}'.format(self.path, self.url_count))
+        self.storage.put('{}.xml'.format(self.name), self.path)
+        self.storage.put('{}.xml.gz'.format(self.name), self.path + '.gz')
+        return self.url_count
+
+
+class Entity(object):
+    """The urls of one type of object, sharded by ranges of primary keys"""
+    name = None
+    urls_per_row = 1
+    # Fields that, besides the primary keys, change the urls of a row
+    fingerprint_field = None
+
+    def __init__(self):
+        self.errors = 0
+        self.rows_per_shard = settings.SITEMAP_URL_MAX // self.urls_per_row
+
+    def queryset(self):
+        raise NotImplementedError
+
+    def rows(self, queryset):
+        """(id, row) pairs of `queryset`, read through a server side cursor"""
+        return ((obj.id, obj) for obj in queryset.iterator())
+
+    def urls(self, row):
+        raise NotImplementedError
+
+    def shard_name(self, number):
+        return 'sitemap_{}_{}'.format(self.name, number)
+
+    def fingerprints(self):
+        """Shard name -> the number and sum of the ids of its rows, and their latest
+        modification if that changes their urls. Computed with a single query.
+        """
+        aggregates = {'count': Count('id'), 'ids': Sum('id')}
+        if self.fingerprint_field:
+            aggregates['modified'] = Max(self.fingerprint_field)
+        shards = self.queryset().annotate(
+            shard=ExpressionWrapper(F('id') / self.rows_per_shard, output_field=IntegerField()),
+        ).order_by().values('shard').annotate(**aggregates)
+        return {
+            self.shard_name(shard['shard']): [
+                shard['count'],
+                int(shard['ids']),
+                shard['modified'].isoformat() if shard.get('modified') else None,
+            ]
+            for shard in shards
+        }
+
+    def write_shards(self, storage, queryset):
+        """Write the shards of the rows of `queryset`. Returns shard name -> url count."""
+        written = {}
+        writer = None
+        for row_id, row in self.rows(queryset.order_by('id')):
+            name = self.shard_name(row_id // self.rows_per_shard)
+            if writer is None or writer.name != name:
+                if writer:
+                    written[writer.name] = writer.close()
+                writer = ShardWriter(storage, name)
+            try:
+                for config in self.urls(row):
+                    writer.add_url(config)
+            except Exception as e:
+                self.log_errors(self.name.upper(), row_id, e)
+        if writer:
+            written[writer.name] = writer.close()
+        return written
+
+    def generate(self, storage, previous=None):
+        """Write the shards of this entity.
+
+        :param dict previous: Manifest entries of the shards from the last run. Only
+            shards whose rows changed since are written if given, all of them otherwise
+        :return dict: Manifest entries of the current shards, and the number of errors
+        """
+        fingerprints = self.fingerprints()
+        queryset = self.queryset()
+        shards = {}
+        if previous is None:
+            written = self.write_shards(storage, queryset)
+        else:
+            written = {}
+            for name, fingerprint in sorted(fingerprints.items()):
+                if previous.get(name, {}).get('fingerprint') == fingerprint:
+                    shards[name] = previous[name]
+                    continue
+                start = int(name.rsplit('_', 1)[1]) * self.rows_per_shard
+                written.update(self.write_shards(
+                    storage,
+                    queryset.filter(id__gte=start, id__lt=start + self.rows_per_shard)
+                ))
+        lastmod = datetime.date.today().strftime('%Y-%m-%d')
+        for name, url_count in written.items():
+            shards[name] = {
+                # Rows that changed while being written are picked up by the next run
+                'fingerprint': fingerprints.get(name),
+                'lastmod': lastmod,
+                'url_count': url_count,
+            }
+        logger.info('Wrote {} of the {} {} shards'.format(len(written), len(shards), self.name))
+        return {'shards': shards, 'errors': self.errors}
 
     def log_errors(self, obj, obj_id, error):
         if not self.errors:
@@ -152,117 +260,226 @@ class Sitemap(object):
             sentry.log_message('ERROR: generate_sitemap stopped execution after reaching 1000 errors. See logs for details.')
             raise Exception('Too many errors generating sitemap.')
 
-    def generate(self):
-        print('Generating Sitemap')
 
-        # Progress bar
-        progress = script_utils.Progress(precision=0)
+class StaticUrls(Entity):
+    name = 'static'
 
-        # Static urls
-        progress.start(len(settings.SITEMAP_STATIC_URLS), 'STAT: ')
+    def generate(self, storage, previous=None):
+        name = self.shard_name(0)
+        writer = ShardWriter(storage, name)
         for config in settings.SITEMAP_STATIC_URLS:
+            config = config.copy()
             config['loc'] = urlparse.urljoin(settings.DOMAIN, config['loc'])
-            self.add_url(config)
-            progress.increment()
-        progress.stop()
-
-        # User urls
-        objs = OSFUser.objects.filter(is_active=True).values_list('guids___id', flat=True)
-        progress.start(objs.count(), 'USER: ')
-        for obj in objs:
-            try:
-                config = settings.SITEMAP_USER_CONFIG
-                config['loc'] = urlparse.urljoin(settings.DOMAIN, '/{}/'.format(obj))
-                self.add_url(config)
-            except Exception as e:
-                self.log_errors('USER', obj, e)
-            progress.increment()
-        progress.stop()
+            writer.add_url(config)
+        return {
+            'shards': {
+                name: {
+                    'fingerprint': None,
+                    'lastmod': datetime.date.today().strftime('%Y-%m-%d'),
+                    'url_count': writer.close(),
+                }
+            },
+            'errors': 0,
+        }
+
+
+class Users(Entity):
+    name = 'user'
+
+    def queryset(self):
+        return OSFUser.objects.filter(is_active=True)
+
+    def rows(self, queryset):
+        return queryset.values_list('id', 'guids___id').iterator()
+
+    def urls(self, guid):
+        config = settings.SITEMAP_USER_CONFIG.copy()
+        config['loc'] = urlparse.urljoin(settings.DOMAIN, '/{}/'.format(guid))
+        yield config
+
+
+class Nodes(Entity):
+    """Nodes and Registrations, no Collections"""
+    name = 'node'
+    fingerprint_field = 'modified'
 
-        # AbstractNode urls (Nodes and Registrations, no Collections)
-        objs = (AbstractNode.objects
+    def queryset(self):
+        return (AbstractNode.objects
             .filter(is_public=True, is_deleted=False, retraction_id__isnull=True)
-            .exclude(type__in=["osf.collection", "osf.quickfilesnode"])
-            .values('guids___id', 'modified'))
-        progress.start(objs.count(), 'NODE: ')
-        for obj in objs:
-            try:
-                config = settings.SITEMAP_NODE_CONFIG
-                config['loc'] = urlparse.urljoin(settings.DOMAIN, '/{}/'.format(obj['guids___id']))
-                config['lastmod'] = obj['modified'].strftime('%Y-%m-%d')
-                self.add_url(config)
-            except Exception as e:
-                self.log_errors('NODE', obj['guids___id'], e)
-            progress.increment()
-        progress.stop()
+            .exclude(type__in=['osf.collection', 'osf.quickfilesnode']))
+
+    def rows(self, queryset):
+        return ((obj['id'], obj) for obj in queryset.values('id', 'guids___id', 'modified').iterator())
+
+    def urls(self, obj):
+        config = settings.SITEMAP_NODE_CONFIG.copy()
+        config['loc'] = urlparse.urljoin(settings.DOMAIN, '/{}/'.format(obj['guids___id']))
+        config['lastmod'] = obj['modified'].strftime('%Y-%m-%d')
+        yield config
+
 
-        # Preprint urls
-        objs = (PreprintService.objects
+class Preprints(Entity):
+    """Preprints and their primary files"""
+    name = 'preprint'
+    urls_per_row = 2
+    fingerprint_field = 'modified'
+
+    def __init__(self):
+        super(Preprints, self).__init__()
+        self.osf = PreprintProvider.objects.get(_id='osf')
+
+    def queryset(self):
+        return (PreprintService.objects
                     .filter(node__isnull=False, node__is_deleted=False, node__is_public=True, is_published=True)
                     .select_related('node', 'provider', 'node__preprint_file'))
-        progress.start(objs.count() * 2, 'PREP: ')
-        osf = PreprintProvider.objects.get(_id='osf')
-        for obj in objs:
+
+    def urls(self, obj):
+        preprint_date = obj.modified.strftime('%Y-%m-%d')
+        config = settings.SITEMAP_PREPRINT_CONFIG.copy()
+        preprint_url = obj.url
+        provider = obj.provider
+        domain = provider.domain if (provider.domain_redirect_enabled and provider.domain) else settings.DOMAIN
+        if provider == self.osf:
+            preprint_url = '/preprints/{}/'.format(obj._id)
+        config['loc'] = urlparse.urljoin(domain, preprint_url)
+        config['lastmod'] = preprint_date
+        yield config
+
+        # Preprint file urls
+        try:
+            file_config = settings.SITEMAP_PREPRINT_FILE_CONFIG.copy()
+            file_config['loc'] = urlparse.urljoin(
+                settings.DOMAIN,
+                os.path.join(
+                    'project',
+                    obj.node._id,   # Parent node id
+                    'files',
+                    'osfstorage',
+                    obj.primary_file._id,  # Preprint file deep_url
+                    '?action=download'
+                )
+            )
+            file_config['lastmod'] = preprint_date
+        except Exception as e:
+            self.log_errors(obj.primary_file, obj.primary_file._id, e)
+        else:
+            yield file_config
+
+
+ENTITIES = [StaticUrls, Users, Nodes, Preprints]
+
+
+def generate_entity(args):
+    """Worker process: write the shards of one entity type to its own storage"""
+    entity_name, previous = args
+    entity = next(cls for cls in ENTITIES if cls.name == entity_name)()
+    storage = get_storage()
+    try:
+        return entity.generate(storage, previous)
+    finally:
+        storage.cleanup()
+
+
+class Sitemap(object):
+
+    def __init__(self, incremental=False):
+        self.incremental = incremental
+        self.storage = get_storage()
+
+    def cleanup(self):
+        self.storage.cleanup()
+
+    def read_manifest(self):
+        manifest = self.storage.read(MANIFEST)
+        if manifest:
+            manifest = json.loads(manifest)
+            # Shards of another size cover other rows
+            if manifest.get('url_max') == settings.SITEMAP_URL_MAX:
+                return manifest['shards']
+        return {}
+
+    def write_file(self, name, text):
+        path = os.path.join(self.storage.work_dir, name)
+        with open(path, 'wb') as f:
+            f.write(text.encode('utf-8'))
+        self.storage.put(name, path)
+
+    def write_sitemap_index(self, shards):
+        """Writes the index file for all of the sitemap files"""
+        logger.info('Writing `sitemap_index.xml`')
+        self.write_file('sitemap_index.xml', u''.join(
+            [u'<?xml version="1.0" encoding="utf-8"?>\n<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'] + [
+                u'  <sitemap>\n    <loc>{}</loc>\n    <lastmod>{}</lastmod>\n  </sitemap>\n'.format(
+                    escape(urlparse.urljoin(settings.DOMAIN, 'sitemaps/{}.xml'.format(name))),
+                    shards[name]['lastmod'],
+                )
+                for name in sorted(shards)
+            ] + [u'</sitemapindex>\n']
+        ))
+
+    def generate(self):
+        logger.info('Generating {}sitemap'.format('incremental ' if self.incremental else ''))
+        previous = self.read_manifest()
+        tasks = [
+            (entity.name, {
+                name: entry for name, entry in previous.items()
+                if name.startswith('sitemap_{}_'.format(entity.name))
+            } if self.incremental else None)
+            for entity in ENTITIES
+        ]
+
+        processes = min(settings.SITEMAP_PROCESSES, len(tasks))
+        if processes > 1:
+            # Forked workers must not share the database connections of this process
+            for connection in connections.all():
+                connection.close()
+            pool = Pool(processes)
             try:
-                preprint_date = obj.modified.strftime('%Y-%m-%d')
-                config = settings.SITEMAP_PREPRINT_CONFIG
-                preprint_url = obj.url
-                provider = obj.provider
-                domain = provider.domain if (provider.domain_redirect_enabled and provider.domain) else settings.DOMAIN
-                if provider == osf:
-                    preprint_url = '/preprints/{}/'.format(obj._id)
-                config['loc'] = urlparse.urljoin(domain, preprint_url)
-                config['lastmod'] = preprint_date
-                self.add_url(config)
-
-                # Preprint file urls
-                try:
-                    file_config = settings.SITEMAP_PREPRINT_FILE_CONFIG
-                    file_config['loc'] = urlparse.urljoin(
-                        settings.DOMAIN,
-                        os.path.join(
-                            'project',
-                            obj.node._id,   # Parent node id
-                            'files',
-                            'osfstorage',
-                            obj.primary_file._id,  # Preprint file deep_url
-                            '?action=download'
-                        )
-                    )
-                    file_config['lastmod'] = preprint_date
-                    self.add_url(file_config)
-                except Exception as e:
-                    self.log_errors(obj.primary_file, obj.primary_file._id, e)
-            except Exception as e:
-                self.log_errors(obj, obj._id, e)
-            progress.increment(2)
-        progress.stop()
+                results = pool.map(generate_entity, tasks)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            results = map(generate_entity, tasks)
+
+        shards = {}
+        errors = 0
+        for result in results:
+            shards.update(result['shards'])
+            errors += result['errors']
+
+        for name in set(previous) - set(shards):
+            logger.info('Deleting `{}`, it has no urls left'.format(name))
+            self.storage.delete('{}.xml'.format(name))
+            self.storage.delete('{}.xml.gz'.format(name))
 
-        # Final write
-        self.write_doc()
         # Create index file
-        self.write_sitemap_index()
+        self.write_sitemap_index(shards)
+        self.write_file(MANIFEST, json.dumps({'url_max': settings.SITEMAP_URL_MAX, 'shards': shards}).decode('utf-8'))
 
         # TODO: once the sitemap is validated add a ping to google with sitemap index file location
-        # TODO: server side cursor query wrapper might be useful as the index gets larger.
         # Sitemap indexable limit check
-        if self.sitemap_count > settings.SITEMAP_INDEX_MAX * .90:  # 10% of urls remaining
+        if len(shards) > settings.SITEMAP_INDEX_MAX * .90:  # 10% of urls remaining
             sentry.log_message('WARNING: Max sitemaps nearly reached.')
-        print('Total url_count = {}'.format((self.sitemap_count - 1) * settings.SITEMAP_URL_MAX + self.url_count))
-        print('Total sitemap_count = {}'.format(str(self.sitemap_count)))
-        if self.errors:
+        logger.info('Total url_count = {}'.format(sum(shard['url_count'] for shard in shards.values())))
+        logger.info('Total sitemap_count = {}'.format(len(shards)))
+        if errors:
             sentry.log_message('WARNING: Generate sitemap encountered errors. See logs for details.')
-            print('Total errors = {}'.format(str(self.errors)))
+            logger.info('Total errors = {}'.format(errors))
         else:
-            print('No errors')
+            logger.info('No errors')
 
 @celery_app.task(name='scripts.generate_sitemap')
-def main():
+def main(incremental=False):
     init_app(routes=False)  # Sets the storage backends on all models
-    sitemap = Sitemap()
+    sitemap = Sitemap(incremental=incremental)
     sitemap.generate()
     sitemap.cleanup()
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate a sitemap for osf.io')
+    parser.add_argument('-i', '--incremental', dest='incremental', action='store_true',
+                        help='Only regenerate the shards whose rows changed since the last run')
+    args = parser.parse_args()
     init_app(set_backends=True, routes=False)
-    main()
+    main(incremental=args.incremental)
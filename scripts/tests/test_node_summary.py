@@ -1,6 +1,6 @@
 import datetime
 from django.utils import timezone
-from osf.models import AbstractNode
+from osf.models import AbstractNode, SummaryRow
 from tests.base import OsfTestCase
 from osf_tests.factories import UserFactory, RegistrationFactory, ProjectFactory, WithdrawnRegistrationFactory
 from nose.tools import *  # PEP8 asserts
@@ -163,3 +163,19 @@ class TestNodeCount(OsfTestCase):
         assert_equal(registered_projects['withdrawn_daily'], 0)
         assert_equal(registered_projects['embargoed_daily'], 0)
         assert_equal(registered_projects['embargoed_v2_daily'], 0)
+
+    def test_incremental_counts(self):
+        date = self.date.date()
+        assert_equal(NodeSummary(incremental=True).get_events(date)[0], self.results)
+        assert_equal(SummaryRow.objects.filter(summary='node_summary').count(), 8)
+
+        self.private_project.is_public = True
+        self.private_project.save()
+        self.deleted_node.is_deleted = False
+        self.deleted_node.save()
+
+        results = NodeSummary(incremental=True).get_events(date)[0]
+        assert_equal(results, NodeSummary().get_events(date)[0])
+        assert_equal(results['projects']['total'], 3)
+        assert_equal(results['projects']['public'], 2)
+        assert_equal(SummaryRow.objects.filter(summary='node_summary').count(), 9)
@@ -16,10 +16,13 @@ import pytest
 from django.test import TestCase as DjangoTestCase
 from django.test import override_settings
 from faker import Factory
+from addons.base.authorization import authorizations
+from framework.auth import cas
 from framework.auth.core import Auth
 from framework.celery_tasks.handlers import celery_before_request
 from framework.django.handlers import handlers as django_handlers
 from framework.flask import rm_handlers
+from framework.sessions.store import store as session_store
 from osf.models import MetaSchema
 from website import settings
 from website.app import init_app
@@ -98,6 +101,13 @@ class DbTestCase(unittest.TestCase):
         settings.ENABLE_EMAIL_SUBSCRIPTIONS = cls._original_enable_email_subscriptions
         settings.BCRYPT_LOG_ROUNDS = cls._original_bcrypt_log_rounds
 
+    def setUp(self):
+        super(DbTestCase, self).setUp()
+        # Cached sessions, users, tokens and authorizations don't survive the previous test
+        session_store.clear()
+        cas.token_cache.clear()
+        authorizations.clear()
+
 
 class AppTestCase(unittest.TestCase):
     """Base `TestCase` for OSF tests that require the WSGI app (but no database).
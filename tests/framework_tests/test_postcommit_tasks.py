@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+import mock
+import pytest
+from nose.tools import assert_equal, assert_false, assert_true, assert_in
+
+from framework.postcommit_tasks import handlers
+from osf_tests.factories import UserFactory
+from website import settings
+
+
+calls = []
+
+def record_call(*args, **kwargs):
+    calls.append((args, kwargs))
+
+def fail(*args, **kwargs):
+    raise ValueError('Oops')
+
+
+class Response(object):
+    status_code = 200
+
+
+@pytest.fixture(autouse=True)
+def postcommit_request():
+    del calls[:]
+    handlers.reset_postcommit_stats()
+    handlers.postcommit_before_request()
+    # Keep the stats until the tests have checked them, however long the test run has taken
+    with mock.patch.object(settings, 'POSTCOMMIT_STATS_LOG_INTERVAL', float('inf')):
+        yield
+        # End the request, treating it as failed so anything still queued is discarded
+        handlers.postcommit_after_request(Response(), base_status_error_code=Response.status_code)
+
+
+@pytest.mark.django_db
+def test_dedup_key_uses_model_identity():
+    user = UserFactory()
+    handlers.enqueue_postcommit_task(record_call, (user, ), {'value': 1}, once_per_request=True)
+    handlers.enqueue_postcommit_task(record_call, (type(user).objects.get(id=user.id), ), {'value': 1}, once_per_request=True)
+    assert_equal(len(handlers.postcommit_queue()), 1)
+
+    handlers.enqueue_postcommit_task(record_call, (user, ), {'value': 2}, once_per_request=True)
+    assert_equal(len(handlers.postcommit_queue()), 2)
+
+def test_once_per_request_false_runs_every_occurrence():
+    handlers.enqueue_postcommit_task(record_call, (1, ), {}, once_per_request=False)
+    handlers.enqueue_postcommit_task(record_call, (1, ), {}, once_per_request=False)
+    handlers.postcommit_after_request(Response())
+    assert_equal(len(calls), 2)
+
+def test_failures_do_not_raise_and_are_recorded():
+    handlers.enqueue_postcommit_task(fail, (), {})
+    handlers.enqueue_postcommit_task(record_call, (), {})
+    with mock.patch('framework.sentry.log_exception'):
+        handlers.postcommit_after_request(Response())
+
+    assert_equal(len(calls), 1)
+    stats = handlers.get_postcommit_stats()
+    assert_equal(stats['{}.fail'.format(__name__)]['failures'], 1)
+    assert_equal(stats['{}.fail'.format(__name__)]['runs'], 1)
+    assert_equal(stats['{}.record_call'.format(__name__)]['failures'], 0)
+    assert_true(stats['{}.record_call'.format(__name__)]['total_time'] >= 0)
+
+def test_stats_are_logged_and_reset_periodically():
+    handlers.enqueue_postcommit_task(record_call, (), {})
+    with mock.patch.object(settings, 'POSTCOMMIT_STATS_LOG_INTERVAL', 0), \
+            mock.patch.object(handlers.logger, 'info') as mock_info:
+        handlers.postcommit_after_request(Response())
+
+    assert_equal(mock_info.call_count, 1)
+    assert_in('{}.record_call: 1 runs, 0 failures'.format(__name__), mock_info.call_args[0][0])
+    assert_equal(handlers.get_postcommit_stats(), {})
+
+def test_full_pool_spills_celery_tasks():
+    task = mock.MagicMock(spec=handlers.PromiseProxy)
+    task.__name__ = 'task'
+    task.__module__ = __name__
+    handlers.enqueue_postcommit_task(task, (1, ), {})
+    with mock.patch.object(handlers, 'get_pool') as mock_pool, \
+            mock.patch.object(settings, 'USE_CELERY', True), \
+            mock.patch.object(handlers.postcommit_celery_task_wrapper, 'delay') as mock_delay:
+        mock_pool.return_value.full.return_value = True
+        handlers.postcommit_after_request(Response())
+
+    assert_true(mock_delay.called)
+    assert_in(task.si.return_value, mock_delay.call_args[0][0].values())
+    assert_equal(handlers.get_postcommit_stats()['{}.task'.format(__name__)]['overflows'], 1)
+
+def test_full_pool_runs_other_tasks_in_request():
+    handlers.enqueue_postcommit_task(record_call, (1, ), {})
+    with mock.patch.object(handlers, 'get_pool') as mock_pool, \
+            mock.patch.object(handlers.gevent, 'spawn') as mock_spawn:
+        mock_pool.return_value.full.return_value = True
+        mock_pool.return_value.wait_available.return_value = 0
+        handlers.postcommit_after_request(Response())
+
+    assert_equal(calls, [((1, ), {})])
+    assert_false(mock_pool.return_value.spawn.called)
+    assert_false(mock_spawn.called)
+    assert_equal(handlers.get_postcommit_stats()['{}.record_call'.format(__name__)]['overflows'], 1)
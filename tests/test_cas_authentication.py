@@ -205,6 +205,64 @@ class TestCASClient(OsfTestCase):
         assert 0
 
 
+class TestTokenCache(OsfTestCase):
+
+    def setUp(self):
+        super(TestTokenCache, self).setUp()
+        self.client = mock.Mock(spec=cas.CasClient)
+        self.user = UserFactory()
+
+    def test_valid_tokens_are_cached(self):
+        self.client.profile.return_value = make_successful_response(self.user)
+        first = cas.token_cache.profile(self.client, 'valid-token')
+        second = cas.token_cache.profile(self.client, 'valid-token')
+        assert_equal(self.client.profile.call_count, 1)
+        assert_equal(first.user, second.user)
+        assert_is_not(first, second)
+
+    def test_unauthenticated_tokens_are_cached(self):
+        self.client.profile.return_value = make_failure_response()
+        assert_false(cas.token_cache.profile(self.client, 'bad-token').authenticated)
+        assert_false(cas.token_cache.profile(self.client, 'bad-token').authenticated)
+        assert_equal(self.client.profile.call_count, 1)
+
+    def test_rejected_tokens_are_cached(self):
+        self.client.profile.side_effect = cas.CasHTTPError(401, 'Unauthorized', {}, '')
+        for _ in range(2):
+            with assert_raises(cas.CasHTTPError):
+                cas.token_cache.profile(self.client, 'bad-token')
+        assert_equal(self.client.profile.call_count, 1)
+
+    def test_server_errors_are_not_cached(self):
+        self.client.profile.side_effect = [
+            cas.CasHTTPError(502, 'Bad Gateway', {}, ''),
+            make_successful_response(self.user),
+        ]
+        with assert_raises(cas.CasHTTPError):
+            cas.token_cache.profile(self.client, 'valid-token')
+        assert_true(cas.token_cache.profile(self.client, 'valid-token').authenticated)
+
+    @mock.patch('framework.auth.cas._session')
+    def test_revoking_token_purges_it(self, mock_session):
+        mock_session.post.return_value = mock.Mock(status_code=204)
+        self.client.profile.return_value = make_successful_response(self.user)
+        cas.token_cache.profile(self.client, 'valid-token')
+
+        cas.get_client().revoke_tokens({'token': 'valid-token'})
+        cas.token_cache.profile(self.client, 'valid-token')
+        assert_equal(self.client.profile.call_count, 2)
+
+    @mock.patch('framework.auth.cas._session')
+    def test_revoking_application_tokens_purges_all(self, mock_session):
+        mock_session.post.return_value = mock.Mock(status_code=204)
+        self.client.profile.return_value = make_successful_response(self.user)
+        cas.token_cache.profile(self.client, 'valid-token')
+
+        cas.get_client().revoke_application_tokens('fake_id', 'fake_secret')
+        cas.token_cache.profile(self.client, 'valid-token')
+        assert_equal(self.client.profile.call_count, 2)
+
+
 class TestCASTicketAuthentication(OsfTestCase):
 
     def setUp(self):
@@ -1527,6 +1527,30 @@ class TestSendEmails(NotificationTestCase):
         subs = emails.check_node(self.project, 'comments')
         assert_equal(subs, {'email_transactional': [self.project.creator._id], 'email_digest': [], 'none': []})
 
+    def test_check_node_includes_admins_of_parent(self):
+        admin = factories.UserFactory()
+        self.project.add_contributor(admin, permissions=['read', 'write', 'admin'], auth=Auth(self.project.creator))
+        outsider = factories.UserFactory()
+        self.node_subscription.email_digest.add(admin, outsider)
+        subs = emails.check_node(self.node, 'comments')
+        assert_equal(subs['email_digest'], [admin._id])
+
+    def test_store_emails_renders_shared_message_once(self):
+        recipients = [factories.UserFactory(timezone='Etc/UTC', locale='en') for _ in range(3)]
+        other = factories.UserFactory(timezone='America/New_York', locale='en')
+        disabled = factories.UserFactory(date_disabled=timezone.now())
+        recipient_ids = [recipient._id for recipient in recipients] + [other._id, disabled._id, self.user._id]
+        with mock.patch.object(emails, 'template_uses_recipient', return_value=False):
+            with mock.patch('mako.template.Template.render', return_value='message') as mock_render:
+                emails.store_emails(recipient_ids, 'email_digest', 'comments', self.user, self.node, timezone.now())
+        assert_equal(mock_render.call_count, 2)
+        digests = NotificationDigest.objects.filter(event='comments')
+        assert_equal(
+            set(digests.values_list('user__guids___id', flat=True)),
+            set(recipient._id for recipient in recipients + [other])
+        )
+        assert_true(all(digest.node_lineage == [self.project._id, self.node._id] for digest in digests))
+
     @mock.patch('website.project.views.comment.notify')
     def test_check_user_comment_reply_subscription_if_email_not_sent_to_target_user(self, mock_notify):
         # user subscribed to comment replies
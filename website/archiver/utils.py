@@ -1,6 +1,8 @@
+import collections
 import functools
 
 from framework.auth import Auth
+from framework.sessions.store import LRUCache
 
 from website.archiver import (
     StatResult, AggregateStatResult,
@@ -177,27 +179,30 @@ def before_archive(node, user):
     job.set_targets()
 
 def _do_get_file_map(file_tree):
-    """Reduces a tree of folders and files into a list of (<sha256>, <file_metadata>) pairs
+    """Lazily reduces a tree of folders and files into (<sha256>, <file_metadata>) pairs
     """
-    file_map = []
-    stack = [file_tree]
-    while len(stack):
-        tree_node = stack.pop(0)
+    queue = collections.deque([file_tree])
+    while queue:
+        tree_node = queue.popleft()
         if tree_node['kind'] == 'file':
-            file_map.append((tree_node['extra']['hashes']['sha256'], tree_node))
+            yield (tree_node['extra']['hashes']['sha256'], tree_node)
         else:
-            stack = stack + tree_node['children']
-    return file_map
+            queue.extend(tree_node['children'])
+
+# File maps of recently archived nodes, bounded so that large file trees don't outlive
+# their archive jobs. See clear_file_map_cache
+_file_map_cache = LRUCache(settings.ARCHIVER_FILE_MAP_CACHE_SIZE, settings.ARCHIVER_FILE_MAP_CACHE_TIMEOUT)
 
 def _memoize_get_file_map(func):
-    cache = {}
     @functools.wraps(func)
     def wrapper(node):
-        if node._id not in cache:
+        file_map = _file_map_cache.get(node._id)
+        if file_map is None:
             osf_storage = node.get_addon('osfstorage')
             file_tree = osf_storage._get_file_tree(user=node.creator)
-            cache[node._id] = _do_get_file_map(file_tree)
-        return func(node, cache[node._id])
+            file_map = list(_do_get_file_map(file_tree))
+            _file_map_cache.set(node._id, file_map)
+        return func(node, file_map)
     return wrapper
 
 @_memoize_get_file_map
@@ -213,8 +218,27 @@ def get_file_map(node, file_map):
         for key, value, node_id in get_file_map(child):
             yield (key, value, node_id)
 
-def find_registration_file(value, node):
+def clear_file_map_cache(node):
+    """Drop the cached file maps of `node` and its components once its job is done."""
+    from osf.models import AbstractNode
+    _file_map_cache.delete(node._id)
+    for node_id in AbstractNode.objects.get_descendants(node).values_list('guids___id', flat=True):
+        _file_map_cache.delete(node_id)
+
+def get_file_index(node):
+    """Index the files of `node` and its components by (<sha256>, <name>, <id of the node
+    the file's node was registered from>), as matched by find_registration_file
+    """
     from osf.models import AbstractNode
+    index = {}
+    registered_from_ids = {}
+    for sha256, value, node_id in get_file_map(node):
+        if node_id not in registered_from_ids:
+            registered_from_ids[node_id] = AbstractNode.load(node_id).registered_from._id
+        index.setdefault((sha256, value['name'], registered_from_ids[node_id]), (value, node_id))
+    return index
+
+def find_registration_file(value, node, index=None):
     orig_sha256 = value['sha256']
     orig_name = sanitize.unescape_entities(
         value['selectedFileName'],
@@ -224,17 +248,16 @@ def find_registration_file(value, node):
         }
     )
     orig_node = value['nodeId']
-    file_map = get_file_map(node)
-    for sha256, value, node_id in file_map:
-        registered_from_id = AbstractNode.load(node_id).registered_from._id
-        if sha256 == orig_sha256 and registered_from_id == orig_node and orig_name == value['name']:
-            return value, node_id
-    return None, None
-
-def find_registration_files(values, node):
+    if index is None:
+        index = get_file_index(node)
+    return index.get((orig_sha256, orig_name, orig_node), (None, None))
+
+def find_registration_files(values, node, index=None):
+    if index is None:
+        index = get_file_index(node)
     ret = []
     for i in range(len(values.get('extra', []))):
-        ret.append(find_registration_file(values['extra'][i], node) + (i,))
+        ret.append(find_registration_file(values['extra'][i], node, index=index) + (i,))
     return ret
 
 def get_title_for_question(schema, path):
@@ -289,12 +312,17 @@ def deep_get(obj, path):
         item = item[key]
     return item
 
-def migrate_file_metadata(dst, schema):
+def migrate_file_metadata(dst, schema, file_index=None):
+    """
+    :param file_index: The result of get_file_index(dst), to share between schemas
+    """
     metadata = dst.registered_meta[schema._id]
     missing_files = []
     selected_files = find_selected_files(schema, metadata)
+    if selected_files and file_index is None:
+        file_index = get_file_index(dst)
     for path, selected in selected_files.items():
-        for registration_file, node_id, index in find_registration_files(selected, dst):
+        for registration_file, node_id, index in find_registration_files(selected, dst, index=file_index):
             if not registration_file:
                 missing_files.append({
                     'file_name': selected['extra'][index]['selectedFileName'],
@@ -67,9 +67,14 @@ class Mail(object):
         return Template(self._subject).render(**context)
 
 
+def get_template(tpl_name):
+    """Return the compiled email template ``tpl_name``, e.g. to render it many times."""
+    return _tpl_lookup.get_template(tpl_name)
+
+
 def render_message(tpl_name, **context):
     """Render an email message."""
-    tpl = _tpl_lookup.get_template(tpl_name)
+    tpl = get_template(tpl_name)
     return tpl.render(**context)
 
 
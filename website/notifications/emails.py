@@ -95,25 +95,51 @@ def store_emails(recipient_ids, notification_type, event, user, node, timestamp,
     context['user'] = user
     node_lineage_ids = get_node_lineage(node) if node else []
 
-    for recipient_id in recipient_ids:
-        if recipient_id == user._id:
-            continue
-        recipient = OSFUser.load(recipient_id)
-        if recipient.is_disabled:
-            continue
-        context['localized_timestamp'] = localize_timestamp(timestamp, recipient)
-        context['recipient'] = recipient
-        message = mails.render_message(template, **context)
-
-        digest = NotificationDigest(
+    recipients = OSFUser.objects.filter(
+        guids___id__in=recipient_ids,
+        date_disabled__isnull=True,
+    ).exclude(id=user.id)
+
+    template = mails.get_template(template)
+    per_recipient = template_uses_recipient(template)
+    timestamps = {}
+    messages = {}
+    digests = []
+    for recipient in recipients:
+        # Recipients only differ by their localized timestamp, unless the template
+        # addresses them directly, so render each distinct message once
+        locale_key = (recipient.timezone, recipient.locale)
+        if locale_key not in timestamps:
+            timestamps[locale_key] = localize_timestamp(timestamp, recipient)
+        message_key = (timestamps[locale_key], recipient.id if per_recipient else None)
+        if message_key not in messages:
+            context['localized_timestamp'] = timestamps[locale_key]
+            context['recipient'] = recipient
+            messages[message_key] = template.render(**context)
+
+        digests.append(NotificationDigest(
             timestamp=timestamp,
             send_type=notification_type,
             event=event,
             user=recipient,
-            message=message,
+            message=messages[message_key],
             node_lineage=node_lineage_ids
-        )
-        digest.save()
+        ))
+    NotificationDigest.objects.bulk_create(digests)
+
+
+# Template uri -> whether it may render differently per recipient
+_recipient_templates = {}
+
+
+def template_uses_recipient(template):
+    """Whether ``template`` may render differently for recipients with the same localized
+    timestamp. Templates that include or inherit from others are assumed to.
+    """
+    if template.uri not in _recipient_templates:
+        source = template.source
+        _recipient_templates[template.uri] = any(token in source for token in ('recipient', '<%include', '<%inherit', '<%namespace'))
+    return _recipient_templates[template.uri]
 
 
 def compile_subscriptions(node, event_type, event=None, level=0):
@@ -154,9 +180,10 @@ def check_node(node, event):
         for notification_type in node_subscriptions:
             users = getattr(subscription, notification_type, [])
             if users:
-                for user in users.exclude(date_disabled__isnull=False):
-                    if node.has_permission(user, 'read'):
-                        node_subscriptions[notification_type].append(user._id)
+                node_subscriptions[notification_type] = list(
+                    utils.filter_readable_users(node, users.filter(date_disabled__isnull=True))
+                    .values_list('guids___id', flat=True)
+                )
     return node_subscriptions
 
 
@@ -174,13 +201,8 @@ def get_node_lineage(node):
     """ Get a list of node ids in order from the node to top most project
         e.g. [parent._id, node._id]
     """
-    lineage = [node._id]
-
-    while node.parent_id:
-        node = node.parent_node
-        lineage = [node._id] + lineage
-
-    return lineage
+    ancestors = AbstractNode.objects.get_ancestors(node).values_list('guids___id', flat=True)
+    return list(ancestors)[::-1] + [node._id]
 
 
 def get_settings_url(uid, user):
@@ -1,7 +1,7 @@
 import collections
 
 from django.apps import apps
-from django.db.models import Q
+from django.db.models import Exists, OuterRef, Q
 
 from framework.postcommit_tasks.handlers import run_postcommit
 from website.notifications import constants
@@ -89,6 +89,21 @@ def remove_subscription_task(node_id):
         parent.save()
 
 
+def filter_readable_users(node, users):
+    """Narrow the ``OSFUser`` queryset ``users`` to users with read permission on ``node``,
+    i.e. read contributors on the node and admins of the node or any of its ancestors,
+    in a single query.
+    """
+    Contributor = apps.get_model('osf.Contributor')
+    NodeClosure = apps.get_model('osf.NodeClosure')
+    lineage = list(NodeClosure.objects.filter(descendant=node).values_list('ancestor_id', flat=True)) + [node.id]
+    permitted = Contributor.objects.filter(
+        Q(node=node, read=True) | Q(node_id__in=lineage, admin=True),
+        user=OuterRef('pk'),
+    )
+    return users.annotate(can_read=Exists(permitted)).filter(can_read=True)
+
+
 def separate_users(node, user_ids):
     """Separates users into ones with permissions and ones without given a list.
 
@@ -97,14 +112,15 @@ def separate_users(node, user_ids):
     :return: list of subbed, list of removed user ids
     """
     OSFUser = apps.get_model('osf.OSFUser')
+    guids = [user_id._id if isinstance(user_id, OSFUser) else user_id for user_id in user_ids]
+    readable = set(
+        filter_readable_users(node, OSFUser.objects.filter(guids___id__in=guids))
+        .values_list('guids___id', flat=True)
+    )
     removed = []
     subbed = []
-    for user_id in user_ids:
-        try:
-            user = OSFUser.load(user_id)
-        except TypeError:
-            user = user_id
-        if node.has_permission(user, 'read'):
+    for user_id, guid in zip(user_ids, guids):
+        if guid in readable:
             subbed.append(user_id)
         else:
             removed.append(user_id)
@@ -1516,6 +1516,13 @@ def make_url_map(app):
             json_renderer,
         ),
 
+        Rule(
+            '/files/auth/bulk/',
+            'get',
+            addon_views.get_auth_bulk,
+            json_renderer,
+        ),
+
         Rule(
             [
                 '/project/<pid>/waterbutler/logs/',
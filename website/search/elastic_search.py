@@ -333,8 +333,65 @@ def update_user_async(self, user_id, index=None):
     except Exception as exc:
         self.retry(exc)
 
-def serialize_node(node, category):
+def prefetch_node_data(nodes):
+    """Load the related rows `serialize_node` needs for a chunk of nodes, one query per relation.
+
+    :param list nodes: AbstractNodes to be serialized
+    :return dict: Maps node id to a dict of contributors, tags, institutions and wikis
+    """
     NodeWikiPage = apps.get_model('addons_wiki.NodeWikiPage')
+    RenderedWikiContent = apps.get_model('addons_wiki.RenderedWikiContent')
+    Contributor = apps.get_model('osf.Contributor')
+
+    data = {node.id: {'contributors': [], 'tags': [], 'all_tags': [], 'institutions': [], 'wikis': {}} for node in nodes}
+
+    contributors = Contributor.objects.filter(
+        node_id__in=data.keys(), visible=True
+    ).order_by('node_id', '_order').values_list('node_id', 'user__fullname', 'user__guids___id', 'user__is_active')
+    for node_id, fullname, guid, is_active in contributors:
+        data[node_id]['contributors'].append({
+            'fullname': fullname,
+            'url': '/{}/'.format(guid) if is_active else None
+        })
+
+    tags = AbstractNode.tags.through.objects.filter(
+        abstractnode_id__in=data.keys()
+    ).values_list('abstractnode_id', 'tag__name', 'tag__system')
+    for node_id, name, system in tags:
+        # System tags are not indexed, but still count towards DO_NOT_INDEX_LIST
+        data[node_id]['all_tags'].append(name)
+        if not system:
+            data[node_id]['tags'].append(name)
+
+    institutions = AbstractNode.affiliated_institutions.through.objects.filter(
+        abstractnode_id__in=data.keys()
+    ).values_list('abstractnode_id', 'institution__name')
+    for node_id, name in institutions:
+        data[node_id]['institutions'].append(name)
+
+    wiki_guids = {
+        guid: node for node in nodes if not node.is_retracted
+        for guid in node.wiki_pages_current.values()
+    }
+    wikis = [
+        (wiki, wiki_guids[wiki._id])
+        for wiki in NodeWikiPage.objects.filter(guids___id__in=wiki_guids.keys())
+    ]
+    RenderedWikiContent.prefetch(wikis)
+    for wiki, node in wikis:
+        # '.' is not allowed in field names in ES2
+        data[node.id]['wikis'][wiki.page_name.replace('.', ' ')] = wiki.raw_text(node)
+
+    return data
+
+def serialize_node(node, category, prefetched=None):
+    """Serialize `node` for elasticsearch.
+
+    :param dict prefetched: Related data for this node from `prefetch_node_data`. Loaded
+        for just this node if not given.
+    """
+    if prefetched is None:
+        prefetched = prefetch_node_data([node])[node.id]
 
     elastic_document = {}
     parent_id = node.parent_id
@@ -346,19 +403,12 @@ def serialize_node(node, category):
     normalized_title = unicodedata.normalize('NFKD', normalized_title).encode('ascii', 'ignore')
     elastic_document = {
         'id': node._id,
-        'contributors': [
-            {
-                'fullname': x['fullname'],
-                'url': '/{}/'.format(x['guids___id']) if x['is_active'] else None
-            }
-            for x in node._contributors.filter(contributor__visible=True).order_by('contributor___order')
-            .values('fullname', 'guids___id', 'is_active')
-        ],
+        'contributors': prefetched['contributors'],
         'title': node.title,
         'normalized_title': normalized_title,
         'category': category,
         'public': node.is_public,
-        'tags': list(node.tags.filter(system=False).values_list('name', flat=True)),
+        'tags': prefetched['tags'],
         'description': node.description,
         'url': node.url,
         'is_registration': node.is_registration,
@@ -368,39 +418,111 @@ def serialize_node(node, category):
         'embargo_end_date': node.embargo_end_date.strftime('%A, %b. %d, %Y') if node.embargo_end_date else False,
         'is_pending_embargo': node.is_pending_embargo,
         'registered_date': node.registered_date,
-        'wikis': {},
+        'wikis': prefetched['wikis'],
         'parent_id': parent_id,
         'date_created': node.created,
         'license': serialize_node_license_record(node.license),
-        'affiliated_institutions': list(node.affiliated_institutions.values_list('name', flat=True)),
+        'affiliated_institutions': prefetched['institutions'],
         'boost': int(not node.is_registration) + 1,  # This is for making registered projects less relevant
         'extra_search_terms': clean_splitters(node.title),
         'preprint_url': node.preprint_url,
     }
-    if not node.is_retracted:
-        for wiki in NodeWikiPage.objects.filter(guids___id__in=node.wiki_pages_current.values()):
-            # '.' is not allowed in field names in ES2
-            elastic_document['wikis'][wiki.page_name.replace('.', ' ')] = wiki.raw_text(node)
 
     return elastic_document
 
+def is_qa_node(node, tag_names=None):
+    if tag_names is None:
+        tag_names = node.tags.values_list('name', flat=True)
+    return bool(set(settings.DO_NOT_INDEX_LIST['tags']).intersection(tag_names)) or any(substring in node.title for substring in settings.DO_NOT_INDEX_LIST['titles'])
+
+def node_should_be_removed(node, tag_names=None):
+    return node.is_deleted or not node.is_public or node.archiving or (node.is_spammy and settings.SPAM_FLAGGED_REMOVE_FROM_SEARCH) or node.is_quickfiles or is_qa_node(node, tag_names)
+
+def get_delete_doctype_from_node(node):
+    if node.is_registration:
+        return 'registration'
+    elif node.is_preprint:
+        return 'preprint'
+    return node.project_or_component
+
+def bulk_index(actions):
+    """Send `actions` to elasticsearch in chunks of `settings.ELASTIC_BULK_CHUNK_SIZE`,
+    refreshing the index once per chunk rather than once per document. Deleting a
+    document that is not in the index is not treated as an error.
+
+    :return int: Number of successful actions
+    """
+    succeeded = 0
+    for ok, item in helpers.streaming_bulk(client(), actions, chunk_size=settings.ELASTIC_BULK_CHUNK_SIZE,
+                                           refresh=True, raise_on_error=False):
+        op_type, result = item.items()[0]
+        if ok or (op_type == 'delete' and result.get('status') == 404):
+            succeeded += 1
+        else:
+            logger.error('Failed to {} {} document {}: {}'.format(op_type, result.get('_type'), result.get('_id'), result.get('error')))
+    return succeeded
+
+def file_actions(node, index=None):
+    """Yield bulk actions that index or remove every OsfStorageFile on `node`.
+
+    Node-level checks are done once for the whole node, and file tags and guids are
+    prefetched one page at a time.
+    """
+    from addons.osfstorage.models import OsfStorageFile
+    index = index or INDEX
+    remove = not node.is_public or node.is_deleted or node.archiving or is_qa_node(node)
+    for page in paginated(OsfStorageFile, Q(node=node), increment=settings.ELASTIC_BULK_CHUNK_SIZE, each=False):
+        for file_ in page.prefetch_related('tags', 'guids'):
+            # TODO: Can remove 'not file_.name' if we remove all base file nodes with name=None
+            if remove or not file_.name:
+                yield {'_op_type': 'delete', '_index': index, '_type': 'file', '_id': file_._id}
+            else:
+                yield {'_op_type': 'index', '_index': index, '_type': 'file', '_id': file_._id,
+                       '_source': serialize_file(file_, node)}
+
+def node_actions(nodes, index=None, include_files=True):
+    """Yield bulk actions that index or remove each of `nodes` and, optionally, their files.
+    Related data is prefetched for `settings.ELASTIC_BULK_CHUNK_SIZE` nodes at a time.
+    """
+    index = index or INDEX
+    nodes = list(nodes)
+    for i in range(0, len(nodes), settings.ELASTIC_BULK_CHUNK_SIZE):
+        chunk = nodes[i:i + settings.ELASTIC_BULK_CHUNK_SIZE]
+        prefetched = prefetch_node_data(chunk)
+        for node in chunk:
+            if include_files:
+                for action in file_actions(node, index=index):
+                    yield action
+            if node_should_be_removed(node, prefetched[node.id]['all_tags']):
+                yield {'_op_type': 'delete', '_index': index, '_type': get_delete_doctype_from_node(node), '_id': node._id}
+            else:
+                category = get_doctype_from_node(node)
+                yield {'_op_type': 'index', '_index': index, '_type': category, '_id': node._id,
+                       '_source': serialize_node(node, category, prefetched[node.id])}
+
+@requires_search
+def bulk_index_nodes(nodes, index=None, include_files=True):
+    """Index or remove `nodes` and their files through the bulk API.
+
+    :param Node[] nodes: Projects, components, registrations, or preprints
+    :param str index: Index of the nodes
+    :param bool include_files: Whether to also reindex the nodes' OsfStorageFiles
+    :return int: Number of successful actions
+    """
+    return bulk_index(node_actions(nodes, index=index, include_files=include_files))
+
 @requires_search
 def update_node(node, index=None, bulk=False, async=False):
-    from addons.osfstorage.models import OsfStorageFile
     index = index or INDEX
-    for file_ in paginated(OsfStorageFile, Q(node=node)):
-        update_file(file_, index=index)
+    if not bulk:
+        bulk_index_nodes([node], index=index)
+        return
 
-    is_qa_node = bool(set(settings.DO_NOT_INDEX_LIST['tags']).intersection(node.tags.all().values_list('name', flat=True))) or any(substring in node.title for substring in settings.DO_NOT_INDEX_LIST['titles'])
-    if node.is_deleted or not node.is_public or node.archiving or (node.is_spammy and settings.SPAM_FLAGGED_REMOVE_FROM_SEARCH) or node.is_quickfiles or is_qa_node:
+    bulk_index(file_actions(node, index=index))
+    if node_should_be_removed(node):
         delete_doc(node._id, node, index=index)
     else:
-        category = get_doctype_from_node(node)
-        elastic_document = serialize_node(node, category)
-        if bulk:
-            return elastic_document
-        else:
-            client().index(index=index, doc_type=category, id=node._id, body=elastic_document, refresh=True)
+        return serialize_node(node, get_doctype_from_node(node))
 
 def bulk_update_nodes(serialize, nodes, index=None):
     """Updates the list of input projects
@@ -424,7 +546,7 @@ def bulk_update_nodes(serialize, nodes, index=None):
                 'doc_as_upsert': True,
             })
     if actions:
-        return helpers.bulk(client(), actions)
+        return helpers.bulk(client(), actions, chunk_size=settings.ELASTIC_BULK_CHUNK_SIZE)
 
 def serialize_contributors(node):
     return {
@@ -471,6 +593,9 @@ def update_user(user, index=None):
             pass
         return
 
+    client().index(index=index, doc_type='user', body=serialize_user(user), id=user._id, refresh=True)
+
+def serialize_user(user):
     names = dict(
         fullname=user.fullname,
         given_name=user.given_name,
@@ -505,56 +630,97 @@ def update_user(user, index=None):
         'boost': 2,  # TODO(fabianvf): Probably should make this a constant or something
     }
 
-    client().index(index=index, doc_type='user', body=user_doc, id=user._id, refresh=True)
+    return user_doc
 
 @requires_search
-def update_file(file_, index=None, delete=False):
+def bulk_index_users(users, index=None):
+    """Index `users` through the bulk API. Inactive users are removed one at a time
+    by `update_user`, which also cleans up after spam.
+    """
     index = index or INDEX
+    actions = []
+    for user in users:
+        if user.is_active:
+            actions.append({'_op_type': 'index', '_index': index, '_type': 'user', '_id': user._id,
+                            '_source': serialize_user(user)})
+        else:
+            update_user(user, index=index)
+    return bulk_index(actions)
 
-    # TODO: Can remove 'not file_.name' if we remove all base file nodes with name=None
-    file_node_is_qa = bool(set(settings.DO_NOT_INDEX_LIST['tags']).intersection(file_.node.tags.all().values_list('name', flat=True))) or any(substring in file_.node.title for substring in settings.DO_NOT_INDEX_LIST['titles'])
-    if not file_.name or not file_.node.is_public or delete or file_.node.is_deleted or file_.node.archiving or file_node_is_qa:
-        client().delete(
-            index=index,
-            doc_type='file',
-            id=file_._id,
-            refresh=True,
-            ignore=[404]
-        )
-        return
+def process_search_updates(doc_ids):
+    """Reindex a batch from the QueuedSearchUpdate queue.
 
+    :param dict doc_ids: Maps doc type ('node', 'contrib' or 'user') to a list of primary keys
+    """
+    if doc_ids.get('node'):
+        bulk_index_nodes(AbstractNode.objects.filter(id__in=doc_ids['node']))
+    # Nodes whose contributors changed only need that part of their documents updated,
+    # unless they are reindexed as a whole anyway
+    contributor_ids = set(doc_ids.get('contrib', [])).difference(doc_ids.get('node', []))
+    if contributor_ids:
+        bulk_update_contributors(AbstractNode.objects.filter(id__in=contributor_ids).order_by('id'))
+    if doc_ids.get('user'):
+        bulk_index_users(OSFUser.objects.filter(id__in=doc_ids['user']))
+
+@celery_app.task(ignore_results=True)
+def drain_search_queue():
+    """Reindex everything in the QueuedSearchUpdate queue whose debounce window has passed."""
+    QueuedSearchUpdate = apps.get_model('osf.QueuedSearchUpdate')
+    stats = QueuedSearchUpdate.objects.stats()
+    logger.info('Search update queue depth: {depth}, lag: {lag:.1f}s'.format(**stats))
+    stats['processed'] = QueuedSearchUpdate.objects.drain(process_search_updates)
+    return stats
+
+def serialize_file(file_, node=None):
+    node = node or file_.node
     # We build URLs manually here so that this function can be
     # run outside of a Flask request context (e.g. in a celery task)
     file_deep_url = '/{node_id}/files/{provider}{path}/'.format(
-        node_id=file_.node._id,
+        node_id=node._id,
         provider=file_.provider,
         path=file_.path,
     )
-    node_url = '/{node_id}/'.format(node_id=file_.node._id)
+    node_url = '/{node_id}/'.format(node_id=node._id)
 
     guid_url = None
-    file_guid = file_.get_guid(create=False)
-    if file_guid:
-        guid_url = '/{file_guid}/'.format(file_guid=file_guid._id)
-    file_doc = {
+    # Equivalent to file_.get_guid(create=False), but uses prefetched guids if available
+    file_guids = sorted(file_.guids.all(), key=lambda guid: guid.pk)
+    if file_guids:
+        guid_url = '/{file_guid}/'.format(file_guid=file_guids[0]._id)
+    return {
         'id': file_._id,
         'deep_url': file_deep_url,
         'guid_url': guid_url,
-        'tags': list(file_.tags.filter(system=False).values_list('name', flat=True)),
+        'tags': [tag.name for tag in file_.tags.all() if not tag.system],
         'name': file_.name,
         'category': 'file',
         'node_url': node_url,
-        'node_title': file_.node.title,
-        'parent_id': file_.node.parent_node._id if file_.node.parent_node else None,
-        'is_registration': file_.node.is_registration,
-        'is_retracted': file_.node.is_retracted,
+        'node_title': node.title,
+        'parent_id': node.parent_node._id if node.parent_node else None,
+        'is_registration': node.is_registration,
+        'is_retracted': node.is_retracted,
         'extra_search_terms': clean_splitters(file_.name),
     }
 
+@requires_search
+def update_file(file_, index=None, delete=False):
+    index = index or INDEX
+
+    # TODO: Can remove 'not file_.name' if we remove all base file nodes with name=None
+    if not file_.name or not file_.node.is_public or delete or file_.node.is_deleted or file_.node.archiving or is_qa_node(file_.node):
+        client().delete(
+            index=index,
+            doc_type='file',
+            id=file_._id,
+            refresh=True,
+            ignore=[404]
+        )
+        return
+
     client().index(
         index=index,
         doc_type='file',
-        body=file_doc,
+        body=serialize_file(file_),
         id=file_._id,
         refresh=True
     )
@@ -642,13 +808,7 @@ def create_index(index=None):
 @requires_search
 def delete_doc(elastic_document_id, node, index=None, category=None):
     index = index or INDEX
-    if not category:
-        if node.is_registration:
-            category = 'registration'
-        elif node.is_preprint:
-            category = 'preprint'
-        else:
-            category = node.project_or_component
+    category = category or get_delete_doctype_from_node(node)
     client().delete(index=index, doc_type=category, id=elastic_document_id, refresh=True, ignore=[404])
 
 
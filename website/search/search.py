@@ -1,5 +1,7 @@
 import logging
 
+from django.apps import apps
+
 from framework.celery_tasks.handlers import enqueue_task
 
 from website import settings
@@ -24,13 +26,25 @@ def search(query, index=None, doc_type=None, raw=None):
     index = index or settings.ELASTIC_INDEX
     return search_engine.search(query, index=index, doc_type=doc_type, raw=raw)
 
+def should_debounce(index=None, bulk=False):
+    """Whether updates should go through the coalescing QueuedSearchUpdate queue
+    rather than a celery task per save.
+    """
+    return bool(settings.USE_CELERY and settings.SEARCH_UPDATE_DEBOUNCE and index is None and not bulk)
+
+def enqueue_search_update(doc_type, object_ids):
+    QueuedSearchUpdate = apps.get_model('osf.QueuedSearchUpdate')
+    QueuedSearchUpdate.objects.enqueue(doc_type, object_ids)
+
 @requires_search
 def update_node(node, index=None, bulk=False, async=True, saved_fields=None):
     kwargs = {
         'index': index,
         'bulk': bulk
     }
-    if async:
+    if async and should_debounce(index=index, bulk=bulk):
+        enqueue_search_update('node', [node.id])
+    elif async:
         node_id = node._id
         # We need the transaction to be committed before trying to run celery tasks.
         # For example, when updating a Node's privacy, is_public must be True in the
@@ -49,6 +63,11 @@ def bulk_update_nodes(serialize, nodes, index=None):
     index = index or settings.ELASTIC_INDEX
     search_engine.bulk_update_nodes(serialize, nodes, index=index)
 
+@requires_search
+def bulk_index_nodes(nodes, index=None, include_files=True):
+    index = index or settings.ELASTIC_INDEX
+    return search_engine.bulk_index_nodes(nodes, index=index, include_files=include_files)
+
 @requires_search
 def delete_node(node, index=None):
     index = index or settings.ELASTIC_INDEX
@@ -62,13 +81,20 @@ def delete_node(node, index=None):
 @requires_search
 def update_contributors_async(user_id):
     """Async version of update_contributors above"""
-    if settings.USE_CELERY:
+    if should_debounce():
+        OSFUser = apps.get_model('osf.OSFUser')
+        user = OSFUser.objects.get(id=user_id)
+        enqueue_search_update('contrib', user.visible_contributor_to.include(None).values_list('id', flat=True))
+    elif settings.USE_CELERY:
         enqueue_task(search_engine.update_contributors_async.s(user_id))
     else:
         search_engine.update_contributors_async(user_id)
 
 @requires_search
 def update_user(user, index=None, async=True):
+    if async and should_debounce(index=index):
+        enqueue_search_update('user', [user.id])
+        return
     index = index or settings.ELASTIC_INDEX
     if async:
         user_id = user.id
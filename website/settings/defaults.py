@@ -49,6 +49,15 @@ SEND_EMAIL_THROTTLE = 30
 # Seconds that must elapse before updating a user's date_last_login field
 DATE_LAST_LOGIN_THROTTLE = 60
 
+# Cache sessions, and the users they belong to, for authentication (see framework.sessions.store)
+SESSION_CACHE_ENABLED = True
+# Name of a django cache (api.base.settings CACHES) shared by all processes, or None to only cache in-process
+SESSION_CACHE_ALIAS = None
+SESSION_CACHE_TIMEOUT = 5 * 60
+SESSION_LOCAL_CACHE_SIZE = 10000
+# In-process entries aren't invalidated by other processes, so keep them short lived
+SESSION_LOCAL_CACHE_TIMEOUT = 5
+
 # Hours before pending embargo/retraction/registration automatically becomes active
 RETRACTION_PENDING_TIME = datetime.timedelta(days=2)
 EMBARGO_PENDING_TIME = datetime.timedelta(days=2)
@@ -98,6 +107,16 @@ SEARCH_ENGINE = 'elastic'  # Can be 'elastic', or None
 ELASTIC_URI = 'localhost:9200'
 ELASTIC_TIMEOUT = 10
 ELASTIC_INDEX = 'website'
+# Number of documents sent per elasticsearch bulk request. The index is refreshed once per request
+ELASTIC_BULK_CHUNK_SIZE = 500
+# Node and user saves are coalesced in the QueuedSearchUpdate table and reindexed once nothing
+# has changed for SEARCH_UPDATE_DEBOUNCE seconds, or after SEARCH_UPDATE_MAX_WAIT seconds at most.
+# Set SEARCH_UPDATE_DEBOUNCE to 0 to queue a celery task per save instead. Only applies if USE_CELERY
+SEARCH_UPDATE_DEBOUNCE = 5
+SEARCH_UPDATE_MAX_WAIT = 60
+SEARCH_UPDATE_BATCH_SIZE = 500
+# Times a queued search update is retried before it is dropped and logged
+SEARCH_UPDATE_MAX_ATTEMPTS = 5
 ELASTIC_KWARGS = {
     # 'use_ssl': False,
     # 'verify_certs': True,
@@ -345,8 +364,21 @@ SHARE_URL = None
 SHARE_API_TOKEN = None  # Required to send project updates to SHARE
 
 CAS_SERVER_URL = 'http://localhost:8080'
+# Connections kept open to CAS by each process
+CAS_POOL_SIZE = 10
+# Seconds to cache CAS' response for valid, and rejected, OAuth2 access tokens
+CAS_TOKEN_CACHE_TIMEOUT = 60
+CAS_TOKEN_NEGATIVE_CACHE_TIMEOUT = 10
+CAS_TOKEN_CACHE_SIZE = 10000
 MFR_SERVER_URL = 'http://localhost:7778'
 
+###### ANALYTICS ###########
+# Page views and downloads are written to the PageCounterEvent table, and rolled up into
+# PageCounter and DailyPageCounter every PAGE_COUNTER_ROLLUP_INTERVAL seconds
+PAGE_COUNTER_ROLLUP_INTERVAL = 10
+# Events rolled up into PageCounter per transaction
+PAGE_COUNTER_ROLLUP_BATCH_SIZE = 5000
+
 ###### ARCHIVER ###########
 ARCHIVE_PROVIDER = 'osfstorage'
 
@@ -357,6 +389,21 @@ ARCHIVE_TIMEOUT_TIMEDELTA = timedelta(1)  # 24 hours
 
 ENABLE_ARCHIVER = True
 
+# Number of nodes whose osfstorage file maps are kept between archiver tasks, and for how many seconds
+ARCHIVER_FILE_MAP_CACHE_SIZE = 100
+ARCHIVER_FILE_MAP_CACHE_TIMEOUT = 60 * 60
+
+###### CITATIONS ###########
+# Number of parsed citation styles kept per process, and for how many seconds
+CITATION_STYLE_CACHE_SIZE = 50
+CITATION_STYLE_CACHE_TIMEOUT = 24 * 60 * 60
+# Number of rendered citations kept per process, and for how many seconds. Entries are
+# keyed on everything that goes into a citation, so they never need invalidating.
+CITATION_CACHE_SIZE = 10000
+CITATION_CACHE_TIMEOUT = 60 * 60
+# Most citations rendered by a single bulk citation request
+CITATION_BULK_MAX = 100
+
 JWT_SECRET = 'changeme'
 JWT_ALGORITHM = 'HS256'
 
@@ -372,6 +419,19 @@ RABBITMQ_VHOST = os.environ.get('RABBITMQ_VHOST', '/')
 # Seconds, not an actual celery setting
 CELERY_RETRY_BACKOFF_BASE = 5
 
+# Postcommit tasks run on a pool of greenlets shared by all requests in a process.
+# Celery tasks are sent to celery instead when the pool is full; other tasks wait for room.
+POSTCOMMIT_POOL_SIZE = 30  # one db connection per greenlet
+# Seconds a postcommit task that is not a celery task waits for room in a full pool. It is run
+# by the request itself if there is still none
+POSTCOMMIT_OVERFLOW_WAIT = 0.5
+# Seconds a request waits for its postcommit tasks before returning. Tasks keep running afterwards
+POSTCOMMIT_JOIN_TIMEOUT = 5.0
+# Postcommit tasks slower than this many seconds are logged
+POSTCOMMIT_SLOW_TASK_THRESHOLD = 1.0
+# Seconds between the summaries of postcommit task timings and failures each process logs
+POSTCOMMIT_STATS_LOG_INTERVAL = 300
+
 class CeleryConfig:
     """
     Celery Configuration
@@ -452,6 +512,7 @@ class CeleryConfig:
 
     # Modules to import when celery launches
     imports = (
+        'framework.analytics',
         'framework.celery_tasks',
         'framework.email.tasks',
         'website.mailchimp_utils',
@@ -569,7 +630,7 @@ class CeleryConfig:
             'run_keen_summaries': {
                 'task': 'scripts.analytics.run_keen_summaries',
                 'schedule': crontab(minute=0, hour=6),  # Daily 1:00 a.m.
-                'kwargs': {'yesterday': True}
+                'kwargs': {'yesterday': True, 'incremental': True}
             },
             'run_keen_snapshots': {
                 'task': 'scripts.analytics.run_keen_snapshots',
@@ -583,11 +644,20 @@ class CeleryConfig:
             'generate_sitemap': {
                 'task': 'scripts.generate_sitemap',
                 'schedule': crontab(minute=0, hour=5),  # Daily 12:00 a.m.
+                'kwargs': {'incremental': True}
             },
             'generate_prereg_csv': {
                 'task': 'scripts.generate_prereg_csv',
                 'schedule': crontab(minute=0, hour=10, day_of_week=0),  # Sunday 5:00 a.m.
             },
+            'drain_search_queue': {
+                'task': 'website.search.elastic_search.drain_search_queue',
+                'schedule': SEARCH_UPDATE_DEBOUNCE or 5,  # Seconds
+            },
+            'rollup_page_counters': {
+                'task': 'framework.analytics.rollup_page_counters',
+                'schedule': PAGE_COUNTER_ROLLUP_INTERVAL,  # Seconds
+            },
         }
 
         # Tasks that need metrics and release requirements
@@ -641,6 +711,14 @@ WATERBUTLER_JWE_SECRET = 'CirclesAre4Squares'
 WATERBUTLER_JWT_SECRET = 'ILiekTrianglesALot'
 WATERBUTLER_JWT_ALGORITHM = 'HS256'
 WATERBUTLER_JWT_EXPIRATION = 15
+# Seconds that get_auth payloads are reused for; must be well below WATERBUTLER_JWT_EXPIRATION. 0 disables caching
+WATERBUTLER_AUTH_CACHE_TIMEOUT = 5
+WATERBUTLER_AUTH_CACHE_SIZE = 10000
+# Seconds that folder listings of storage providers other than osfstorage are reused for, by
+# node, provider and path. Listings are still checked against the requester's permission on
+# the node, but not against the provider. 0 disables caching
+WATERBUTLER_LISTING_CACHE_TIMEOUT = 0
+WATERBUTLER_LISTING_CACHE_SIZE = 1000
 
 SENSITIVE_DATA_SALT = 'yusaltydough'
 SENSITIVE_DATA_SECRET = 'TrainglesAre5Squares'
@@ -1868,7 +1946,11 @@ AWS_SECRET_ACCESS_KEY = None
 # sitemap default settings
 SITEMAP_TO_S3 = False
 SITEMAP_AWS_BUCKET = None
+# Endpoint of an S3 compatible service to use instead of AWS
+SITEMAP_S3_ENDPOINT_URL = None
 SITEMAP_URL_MAX = 25000
+# Worker processes generating the shards of users, nodes and preprints side by side
+SITEMAP_PROCESSES = 4
 SITEMAP_INDEX_MAX = 50000
 SITEMAP_STATIC_URLS = [
     OrderedDict([('loc', ''), ('changefreq', 'yearly'), ('priority', '0.5')]),